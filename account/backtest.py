@@ -15,8 +15,10 @@ from setup_logger import setup_logger
 setup_logger(filename='logsBackTest/vnpy_{0}.log'.format(datetime.now().strftime('%m%d_%H%M')), debug=False)
 
 from vnpy.app.cta_strategy.backtesting import BacktestingEngine, OptimizationSetting
-from vnpy.app.cta_strategy.backtestingPatch import BacktestingEnginePatch
+from vnpy.app.cta_strategy.backtestingPatch import BacktestingEnginePatch, backtestingSharedData
+from vnpy.app.cta_strategy.optimization import OptimizationPool
 from datetime import datetime,date,timedelta
+from pathlib import Path
 import time
 import json
 import traceback
@@ -25,19 +27,20 @@ import traceback
 '''
 backtesting
 '''
-def backtesting(settingFile, kLineCycle = 30, vt_symbol = 'rb1801', vt_symbol2 = None, mode = 'B', startDate = None, days = 1, historyDays = 0, optimization = False):
-
-    # 创建回测引擎
-    engine = BacktestingEnginePatch()
-    
-    # 设置回测用的数据起始日期
+def getBacktestingRange(startDate = None, days = 1, historyDays = 0):
+    """回测用的数据起始日期"""
     if startDate:
-        startDate = startDate
-        endDate = datetime.strptime(startDate, '%Y%m%d') + timedelta(days)
+        startDate = datetime.strptime(startDate, '%Y%m%d')
+        endDate = startDate + timedelta(days)
     else:
-        startDate = date.today() - timedelta(days + historyDays)
-        endDate = date.today()
+        endDate = datetime.combine(date.today(), datetime.min.time())
+        startDate = endDate - timedelta(days + historyDays)
+
+    return startDate, endDate
 
+
+def setBacktestingParameters(engine, vt_symbol, startDate, endDate):
+    """设置回测参数"""
     engine.set_parameters(
         vt_symbol=vt_symbol,
         interval="1m",
@@ -50,6 +53,16 @@ def backtesting(settingFile, kLineCycle = 30, vt_symbol = 'rb1801', vt_symbol2 =
         capital=1_000_000,
     )
 
+
+def backtesting(settingFile, kLineCycle = 30, vt_symbol = 'rb1801', vt_symbol2 = None, mode = 'B', startDate = None, days = 1, historyDays = 0, optimization = False):
+
+    # 创建回测引擎
+    engine = BacktestingEnginePatch()
+
+    # 设置回测用的数据起始日期
+    startDate, endDate = getBacktestingRange(startDate, days, historyDays)
+    setBacktestingParameters(engine, vt_symbol, startDate, endDate)
+
     setting = {}
     setting['vt_symbol'] = vt_symbol
     setting['kLineCycle'] = kLineCycle
@@ -124,6 +137,95 @@ def backtesting(settingFile, kLineCycle = 30, vt_symbol = 'rb1801', vt_symbol2 =
         print ('Failed to plot candles')
         traceback.print_exc() 
 
+########################################################################
+'''
+batch backtesting
+'''
+def batch_backtesting(vt_symbols, settingFiles, kLineCycle = 30, startDate = None, days = 1, historyDays = 0, processes = 0, resultFile = ''):
+    """
+    批量回测：品种 × 配置文件的所有组合
+
+    每个品种的历史数据只加载一次，共享给进程池中的所有组合，
+    结果合并为一张表（每个组合一行）并保存为csv
+    """
+    startDate, endDate = getBacktestingRange(startDate, days, historyDays)
+    settingFiles = [str(Path(settingFile).absolute()) for settingFile in settingFiles]
+
+    pool = OptimizationPool(processes)
+    folders = []
+    tasks = []
+
+    try:
+        for vt_symbol in vt_symbols:
+            engine = BacktestingEnginePatch()
+            setBacktestingParameters(engine, vt_symbol, startDate, endDate)
+
+            # 不经过lru_cache加载，共享后即可释放
+            engine.history_data = []
+            for progress, data in engine.load_history_chunks(cached=False):
+                engine.history_data.extend(data)
+
+            if not engine.history_data:
+                engine.output(f'{vt_symbol}历史数据为空，跳过')
+                continue
+
+            engine.output(f'{vt_symbol}历史数据加载完成，数据量：{len(engine.history_data)}')
+            folder = pool.share_data(engine.get_history_batch())
+            folders.append(folder)
+            engine.history_data = []
+
+            for settingFile in settingFiles:
+                setting = {}
+                setting['vt_symbol'] = vt_symbol
+                setting['kLineCycle'] = kLineCycle
+                setting['settingFile'] = settingFile
+
+                result = pool.apply_async(backtestingSharedData, (
+                    MultiStrategy,
+                    setting,
+                    engine.get_engine_parameters(),
+                    folder
+                ))
+                tasks.append((vt_symbol, settingFile, result))
+
+        rows = []
+        for vt_symbol, settingFile, result in tasks:
+            row = {'vt_symbol': vt_symbol, 'settingFile': Path(settingFile).name}
+
+            try:
+                row.update(result.get())
+            except Exception:
+                print('-' * 20)
+                print(f'Failed to backtest {vt_symbol} {settingFile}')
+                traceback.print_exc()
+                row['error'] = traceback.format_exc(limit=1)
+
+            rows.append(row)
+            print(f'{len(rows)}/{len(tasks)}\t{vt_symbol}\t{row["settingFile"]}\t{row.get("resultPnl", "")}')
+    finally:
+        pool.close()
+        for folder in folders:
+            pool.release_data(folder)
+
+    df = pd.DataFrame(rows)
+
+    if not resultFile:
+        resultFile = 'logsBackTest/batch_{0}.csv'.format(datetime.now().strftime('%m%d_%H%M'))
+    Path(resultFile).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(resultFile, index=False, encoding='utf-8-sig')
+
+    pd.options.display.max_rows = 999
+    pd.options.display.width = 300
+    pd.options.display.max_columns = 20
+    pd.options.display.precision = 2
+    columns = [c for c in ['vt_symbol', 'settingFile', 'resultPnl', 'totalResult', 'winningRate',
+                           'profitLossRatio', 'maxDrawdown', 'total_net_pnl', 'sharpe_ratio', 'error']
+               if c in df.columns]
+    print(df[columns])
+    print(f'结果已保存：{resultFile}')
+
+    return df
+
 def main(argv):
     # setup the argument parser
     arg_parser = argparse.ArgumentParser(description='backtest')
@@ -144,8 +246,9 @@ def main(argv):
 
     arg_parser.add_argument('-s', '--vt_symbol',
                             required=False,
-                            default='rb1801',
-                            help="set backtest vt_symbol")
+                            default=['rb1801'],
+                            nargs='+',
+                            help="set backtest vt_symbol, batch backtest if more than one")
 
     arg_parser.add_argument('-s2', '--vt_symbol2',
                             required=False,
@@ -160,8 +263,20 @@ def main(argv):
 
     arg_parser.add_argument('-sf', '--settingFile',
                             required=False,
-                            default='CTA_setting_multi.json',
-                            help="setting file name")
+                            default=['CTA_setting_multi.json'],
+                            nargs='+',
+                            help="setting file name, batch backtest if more than one")
+
+    arg_parser.add_argument('-p', '--processes',
+                            required=False,
+                            default=0,
+                            type = int,
+                            help="batch backtest processes, cpu count if 0")
+
+    arg_parser.add_argument('-r', '--resultFile',
+                            required=False,
+                            default='',
+                            help="batch backtest result csv file")
 
     arg_parser.add_argument('-o', '--optimization',
                             required=False,
@@ -183,7 +298,10 @@ def main(argv):
         yappi.set_clock_type("cpu")
         yappi.start()
 
-    backtesting(settingFile = cmd.settingFile, startDate = cmd.startDate, days = cmd.days, mode = cmd.mode,vt_symbol = cmd.vt_symbol, vt_symbol2 = cmd.vt_symbol2, historyDays = cmd.historyDays , optimization = cmd.optimization)
+    if len(cmd.vt_symbol) > 1 or len(cmd.settingFile) > 1:
+        batch_backtesting(vt_symbols = cmd.vt_symbol, settingFiles = cmd.settingFile, startDate = cmd.startDate, days = cmd.days, historyDays = cmd.historyDays, processes = cmd.processes, resultFile = cmd.resultFile)
+    else:
+        backtesting(settingFile = cmd.settingFile[0], startDate = cmd.startDate, days = cmd.days, mode = cmd.mode,vt_symbol = cmd.vt_symbol[0], vt_symbol2 = cmd.vt_symbol2, historyDays = cmd.historyDays , optimization = cmd.optimization)
 
     if cmd.yappi:
         yappi.get_func_stats().print_all()
@@ -193,4 +311,5 @@ if __name__ == "__main__":
     main(sys.argv[1:])
     #main("-d 1 -s rb1905 -hd 0 -sf CTA_setting_Spread.json -s2 rb1910 -m T".split())
     #main('-d 240 -s rb000.SHFE -sf CTA_setting_alpha_real_rb.json'.split())
+    #main('-d 240 -s rb000.SHFE hc000.SHFE -sf renxg/CTA_setting_KTrend.json renxg/CTA_setting_Turtle.json'.split())
 
@@ -0,0 +1,157 @@
+"""
+Benchmark of calculating daily result of CTA BacktestingEngine.
+
+Ten years of daily close prices are used with different number of trades.
+The legacy engine calculates pnl of every day with DailyResult objects,
+while current engine calculates all days with numpy arrays.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import numpy as np
+from pandas import DataFrame
+
+from vnpy.trader.constant import Direction, Exchange, Offset
+from vnpy.trader.object import TradeData
+from vnpy.app.cta_strategy.backtesting import BacktestingEngine, DailyResult
+
+
+DAY_COUNT = 250 * 10        # trading days per year * years
+TRADE_COUNTS = [1_000, 10_000, 100_000]
+
+
+class LegacyBacktestingEngine(BacktestingEngine):
+    """
+    Backtesting engine with daily result calculated by iteration.
+    """
+
+    def calculate_result(self):
+        """"""
+        for trade in self.trades.values():
+            d = trade.datetime.date()
+            daily_result = self.daily_results[d]
+            daily_result.add_trade(trade)
+
+        pre_close = 0
+        start_pos = 0
+
+        for daily_result in self.daily_results.values():
+            daily_result.calculate_pnl(
+                pre_close,
+                start_pos,
+                self.size,
+                self.rate,
+                self.slippage,
+                self.inverse
+            )
+
+            pre_close = daily_result.close_price
+            start_pos = daily_result.end_pos
+
+        results = defaultdict(list)
+
+        for daily_result in self.daily_results.values():
+            for key, value in daily_result.__dict__.items():
+                results[key].append(value)
+
+        self.daily_df = DataFrame.from_dict(results).set_index("date")
+        return self.daily_df
+
+
+def generate_data(trade_count: int) -> tuple:
+    """"""
+    rng = np.random.default_rng(0)
+    start = datetime(2010, 1, 1)
+
+    closes = {}
+    price = 4000.0
+    for i in range(DAY_COUNT):
+        price += round(rng.standard_normal() * 20)
+        closes[(start + timedelta(days=i)).date()] = price
+
+    trades = []
+    minutes = np.sort(rng.integers(0, DAY_COUNT * 24 * 60, trade_count))
+    for i, minute in enumerate(minutes):
+        if i % 2:
+            direction = Direction.SHORT
+        else:
+            direction = Direction.LONG
+
+        trade = TradeData(
+            symbol="rb2101",
+            exchange=Exchange.SHFE,
+            orderid=str(i),
+            tradeid=str(i),
+            direction=direction,
+            offset=Offset.NONE,
+            price=4000.0 + rng.integers(-50, 50),
+            volume=1,
+            datetime=start + timedelta(minutes=int(minute)),
+            gateway_name="BENCHMARK"
+        )
+        trades.append(trade)
+
+    return closes, trades
+
+
+def run_benchmark(engine_class: type, closes: dict, trades: list) -> dict:
+    """"""
+    engine = engine_class()
+    engine.output = lambda msg: None
+
+    engine.set_parameters(
+        vt_symbol="rb2101.SHFE",
+        interval="1m",
+        start=datetime(2010, 1, 1),
+        rate=1 / 10000,
+        slippage=1,
+        size=10,
+        pricetick=1,
+        capital=1_000_000,
+    )
+
+    for d, close_price in closes.items():
+        engine.daily_results[d] = DailyResult(d, close_price)
+
+    for trade in trades:
+        engine.trades[trade.vt_tradeid] = trade
+
+    start = perf_counter()
+    df = engine.calculate_result()
+    result_cost = perf_counter() - start
+
+    start = perf_counter()
+    statistics = engine.calculate_statistics(output=False)
+    statistics_cost = perf_counter() - start
+
+    return {
+        "result": result_cost,
+        "statistics": statistics_cost,
+        "net_pnl": df["net_pnl"].tolist(),
+        "total_net_pnl": statistics["total_net_pnl"],
+    }
+
+
+if __name__ == "__main__":
+    for trade_count in TRADE_COUNTS:
+        closes, trades = generate_data(trade_count)
+
+        results = {}
+        for engine_class in [LegacyBacktestingEngine, BacktestingEngine]:
+            result = run_benchmark(engine_class, closes, trades)
+            results[engine_class] = result
+
+            print(
+                f"{engine_class.__name__:<28}"
+                f"trades: {trade_count:>8,}  "
+                f"result: {result['result'] * 1000:>8.1f}ms  "
+                f"statistics: {result['statistics'] * 1000:>8.1f}ms"
+            )
+
+        same = (
+            results[LegacyBacktestingEngine]["net_pnl"]
+            == results[BacktestingEngine]["net_pnl"]
+        )
+        print(f"identical daily pnl: {same}")
@@ -0,0 +1,163 @@
+"""
+Benchmark of loading history data from every database backend.
+
+Bars and ticks of a dedicated symbol on LOCAL exchange are saved into
+each database, then loaded both as data object list by load_bar_data/
+load_tick_data and as columnar batch by load_bar_arrays/load_tick_arrays,
+and deleted afterwards. Backends which can not be imported or connected
+with current vt_setting are skipped.
+
+Run with driver names (e.g. "sqlite mysql") to only benchmark them.
+"""
+
+from datetime import datetime, timedelta
+from importlib import import_module
+from time import perf_counter
+import sys
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData, BarBatch, TickBatch
+from vnpy.trader.database import BaseDatabase, DB_TZ
+
+
+DRIVERS = ["sqlite", "mysql", "postgresql", "mongodb", "influxdb"]
+SYMBOL = "benchmark"
+EXCHANGE = Exchange.LOCAL
+BAR_COUNT = 345 * 250 * 5     # minutes per day * trading days per year * 5 years
+TICK_COUNT = 100_000
+
+
+def generate_bars() -> list:
+    """"""
+    rng = np.random.default_rng(0)
+    prices = 4000 + rng.standard_normal(BAR_COUNT).cumsum().round()
+    start = DB_TZ.localize(datetime(2015, 1, 1, 9))
+
+    bars = []
+    for i, price in enumerate(prices.tolist()):
+        bar = BarData(
+            symbol=SYMBOL,
+            exchange=EXCHANGE,
+            datetime=start + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            volume=float(i % 100),
+            open_interest=5000.0,
+            open_price=price,
+            high_price=price + 2,
+            low_price=price - 2,
+            close_price=price + 1,
+            gateway_name="BENCHMARK"
+        )
+        bars.append(bar)
+
+    return bars
+
+
+def generate_ticks() -> list:
+    """"""
+    rng = np.random.default_rng(0)
+    prices = 4000 + rng.standard_normal(TICK_COUNT).cumsum().round()
+    start = DB_TZ.localize(datetime(2020, 1, 1, 9))
+
+    ticks = []
+    for i, price in enumerate(prices.tolist()):
+        tick = TickData(
+            symbol=SYMBOL,
+            exchange=EXCHANGE,
+            datetime=start + timedelta(milliseconds=500 * i),
+            name="基准",
+            volume=float(i),
+            last_price=price,
+            last_volume=1.0,
+            bid_price_1=price - 1,
+            ask_price_1=price + 1,
+            bid_volume_1=10.0,
+            ask_volume_1=10.0,
+            gateway_name="BENCHMARK"
+        )
+        ticks.append(tick)
+
+    return ticks
+
+
+def is_identical(batch: BarBatch, reference: BarBatch) -> bool:
+    """"""
+    if len(batch) != len(reference):
+        return False
+
+    if not (batch.datetime == reference.datetime).all():
+        return False
+
+    for column in batch.columns:
+        if not (batch.arrays[column] == reference.arrays[column]).all():
+            return False
+
+    return True
+
+
+def run_benchmark(database: BaseDatabase) -> dict:
+    """"""
+    database.save_bar_data(generate_bars())
+    database.save_tick_data(generate_ticks())
+
+    start = datetime(2010, 1, 1)
+    end = datetime(2030, 1, 1)
+
+    try:
+        begin = perf_counter()
+        bars = database.load_bar_data(SYMBOL, EXCHANGE, Interval.MINUTE, start, end)
+        bar_list_time = perf_counter() - begin
+
+        begin = perf_counter()
+        bar_batch = database.load_bar_arrays(SYMBOL, EXCHANGE, Interval.MINUTE, start, end)
+        bar_batch_time = perf_counter() - begin
+
+        begin = perf_counter()
+        ticks = database.load_tick_data(SYMBOL, EXCHANGE, start, end)
+        tick_list_time = perf_counter() - begin
+
+        begin = perf_counter()
+        tick_batch = database.load_tick_arrays(SYMBOL, EXCHANGE, start, end)
+        tick_batch_time = perf_counter() - begin
+    finally:
+        database.delete_bar_data(SYMBOL, EXCHANGE, Interval.MINUTE)
+        database.delete_tick_data(SYMBOL, EXCHANGE)
+
+    same = (
+        is_identical(bar_batch, BarBatch.from_list(bars))
+        and is_identical(tick_batch, TickBatch.from_list(ticks))
+        and tick_batch.name == ticks[0].name
+    )
+
+    return {
+        "bar": (len(bars), bar_list_time, bar_batch_time),
+        "tick": (len(ticks), tick_list_time, tick_batch_time),
+        "same": same,
+    }
+
+
+if __name__ == "__main__":
+    drivers = sys.argv[1:] or DRIVERS
+
+    for driver in drivers:
+        try:
+            database = import_module(f"vnpy.database.{driver}").database_manager
+        except Exception as e:
+            print(f"{driver:<12}skipped: {e!r}")
+            continue
+
+        result = run_benchmark(database)
+
+        for name in ["bar", "tick"]:
+            count, list_time, batch_time = result[name]
+            print(
+                f"{driver:<12}{name:<6}"
+                f"rows: {count:>10,}  "
+                f"list: {list_time:>8.2f}s  "
+                f"arrays: {batch_time:>8.2f}s  "
+                f"speedup: {list_time / batch_time:>6.1f}x"
+            )
+
+        print(f"{driver:<12}identical data: {result['same']}")
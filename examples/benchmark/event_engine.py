@@ -0,0 +1,96 @@
+"""
+Benchmark of EventEngine dispatch throughput and latency.
+
+Compares the legacy one-event-per-get dispatch loop with the batched
+drain and cached handler tuple loop of current EventEngine.
+"""
+
+from queue import Empty
+from threading import Thread
+from time import perf_counter, sleep
+
+from vnpy.event import Event, EventEngine
+
+
+EVENT_COUNT = 200_000
+HANDLER_COUNT = 3
+TYPE_COUNT = 20
+
+
+class LegacyEventEngine(EventEngine):
+    """
+    Event engine with dispatch loop before batched drain.
+    """
+
+    def _run(self) -> None:
+        """"""
+        while self._active:
+            try:
+                event = self._queue.get(block=True, timeout=1)
+                self._process(event)
+            except Empty:
+                pass
+
+    def _process(self, event: Event) -> None:
+        """"""
+        if event.type in self._handlers:
+            [handler(event) for handler in self._handlers[event.type]]
+
+        if self._general_handlers:
+            [handler(event) for handler in self._general_handlers]
+
+
+def run_benchmark(engine_class: type) -> dict:
+    """
+    Put events from a producer thread as fast as possible, and record
+    the delay from put to the last handler called.
+    """
+    engine = engine_class()
+    latencies = []
+    received = []
+
+    def last_handler(event: Event) -> None:
+        latencies.append(perf_counter() - event.data)
+        received.append(1)
+
+    for i in range(TYPE_COUNT):
+        type = f"eTick.{i}"
+        for n in range(HANDLER_COUNT - 1):
+            engine.register(type, lambda event: None)
+        engine.register(type, last_handler)
+
+    engine.start()
+
+    def produce() -> None:
+        for i in range(EVENT_COUNT):
+            engine.put(Event(f"eTick.{i % TYPE_COUNT}", perf_counter()))
+
+    start = perf_counter()
+
+    producer = Thread(target=produce)
+    producer.start()
+    producer.join()
+
+    while len(received) < EVENT_COUNT:
+        sleep(0.001)
+
+    cost = perf_counter() - start
+    engine.stop()
+
+    latencies.sort()
+    return {
+        "throughput": EVENT_COUNT / cost,
+        "p50": latencies[int(EVENT_COUNT * 0.50)],
+        "p99": latencies[int(EVENT_COUNT * 0.99)],
+    }
+
+
+if __name__ == "__main__":
+    for engine_class in [LegacyEventEngine, EventEngine]:
+        result = run_benchmark(engine_class)
+        print(
+            f"{engine_class.__name__:<20}"
+            f"events/sec: {result['throughput']:>12,.0f}  "
+            f"p50: {result['p50'] * 1000:>8.3f}ms  "
+            f"p99: {result['p99'] * 1000:>8.3f}ms"
+        )
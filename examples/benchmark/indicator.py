@@ -0,0 +1,103 @@
+"""
+Benchmark of calculating indicators on every new bar, with talib over
+the whole ArrayManager window versus streaming indicators.
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import BarData
+from vnpy.trader.utility import ArrayManager
+from vnpy.trader.indicator import (
+    SmaIndicator,
+    AtrIndicator,
+    RsiIndicator,
+    MacdIndicator,
+    BollIndicator
+)
+
+
+BAR_COUNT = 20_000
+
+
+def generate_bars() -> list:
+    """"""
+    rng = np.random.default_rng(0)
+    price = 4000.0
+    bars = []
+
+    for i in range(BAR_COUNT):
+        price += rng.standard_normal() * 5
+        bar = BarData(
+            symbol="rb2101",
+            exchange=Exchange.SHFE,
+            datetime=None,
+            open_price=price,
+            high_price=price + abs(rng.standard_normal()) * 3,
+            low_price=price - abs(rng.standard_normal()) * 3,
+            close_price=price,
+            gateway_name="BENCHMARK"
+        )
+        bars.append(bar)
+
+    return bars
+
+
+def run_talib(bars: list, size: int) -> float:
+    """"""
+    am = ArrayManager(size)
+
+    start = perf_counter()
+    for bar in bars:
+        am.update_bar(bar)
+        if not am.inited:
+            continue
+
+        am.sma(20)
+        am.atr(14)
+        am.rsi(14)
+        am.macd(12, 26, 9)
+        am.boll(20, 2)
+
+    return perf_counter() - start
+
+
+def run_streaming(bars: list, size: int) -> float:
+    """"""
+    am = ArrayManager(size)
+    sma = am.add_indicator("sma", SmaIndicator(20))
+    atr = am.add_indicator("atr", AtrIndicator(14))
+    rsi = am.add_indicator("rsi", RsiIndicator(14))
+    macd = am.add_indicator("macd", MacdIndicator(12, 26, 9))
+    boll = am.add_indicator("boll", BollIndicator(20, 2))
+
+    start = perf_counter()
+    for bar in bars:
+        am.update_bar(bar)
+        if not am.inited:
+            continue
+
+        sma.value
+        atr.value
+        rsi.value
+        macd.value
+        boll.value
+
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    bars = generate_bars()
+
+    for size in [100, 1000, 5000]:
+        talib_cost = run_talib(bars, size)
+        streaming_cost = run_streaming(bars, size)
+
+        print(
+            f"size: {size:<6}"
+            f"talib: {talib_cost / BAR_COUNT * 1_000_000:>8.2f}us/bar  "
+            f"streaming: {streaming_cost / BAR_COUNT * 1_000_000:>8.2f}us/bar  "
+            f"speedup: {talib_cost / streaming_cost:>6.1f}x"
+        )
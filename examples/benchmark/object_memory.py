@@ -0,0 +1,113 @@
+"""
+Benchmark of memory usage and creation time of BarData and SlotBarData.
+
+Simulates loading one year of 1-minute bars for 50 symbols, which is
+the typical size of history data in a portfolio backtesting.
+"""
+
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, SlotBarData, to_slotted
+
+
+SYMBOL_COUNT = 50
+BAR_COUNT = 240 * 225       # trading days per year * minutes per day
+
+
+def generate_rows(symbol: str):
+    """
+    Generate rows like those fetched from database, each one with its
+    own symbol string object.
+    """
+    start = datetime(2020, 1, 1, 9, 0)
+    price = 4000.0
+
+    for i in range(BAR_COUNT):
+        yield (
+            "".join(symbol),
+            start + timedelta(minutes=i),
+            price,
+            price + 2,
+            price - 2,
+            price + 1,
+            100.0,
+            5000.0
+        )
+
+
+def create_bars(data_class: type, convert: bool = False) -> list:
+    """"""
+    bars = []
+
+    for n in range(SYMBOL_COUNT):
+        for row in generate_rows(f"rb{n:04d}"):
+            bar = data_class(
+                symbol=row[0],
+                exchange=Exchange.SHFE,
+                datetime=row[1],
+                interval=Interval.MINUTE,
+                open_price=row[2],
+                high_price=row[3],
+                low_price=row[4],
+                close_price=row[5],
+                volume=row[6],
+                open_interest=row[7],
+                gateway_name="DB"
+            )
+
+            if convert:
+                bar = to_slotted(bar)
+
+            bars.append(bar)
+
+    return bars
+
+
+def run_benchmark(data_class: type, convert: bool = False) -> dict:
+    """
+    Time is measured without tracemalloc, which slows down allocation.
+    """
+    gc.collect()
+    start = perf_counter()
+    bars = create_bars(data_class, convert)
+    cost = perf_counter() - start
+
+    count = len(bars)
+    del bars
+
+    # Keep bars alive until memory is measured
+    gc.collect()
+    tracemalloc.start()
+    bars = create_bars(data_class, convert)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del bars
+
+    return {
+        "count": count,
+        "time": cost,
+        "memory": current / 1024 / 1024,
+        "peak": peak / 1024 / 1024,
+    }
+
+
+if __name__ == "__main__":
+    cases = [
+        ("BarData", BarData, False),
+        ("SlotBarData", SlotBarData, False),
+        ("BarData -> to_slotted", BarData, True),
+    ]
+
+    for name, data_class, convert in cases:
+        result = run_benchmark(data_class, convert)
+        print(
+            f"{name:<24}"
+            f"bars: {result['count']:>10,}  "
+            f"time: {result['time']:>8.2f}s  "
+            f"memory: {result['memory']:>8.1f}MB  "
+            f"peak: {result['peak']:>8.1f}MB"
+        )
@@ -0,0 +1,217 @@
+"""
+Benchmark of crossing resting orders in CTA BacktestingEngine.
+
+A grid strategy keeps 500 limit orders resting around the price over one
+year of 1-minute bars. The legacy engine checks every active order on
+every bar, while current engine only touches orders crossed by the bar
+with price index.
+"""
+
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import numpy as np
+
+from vnpy.trader.constant import Direction, Exchange, Interval, Status
+from vnpy.trader.object import BarData, OrderData, TradeData
+from vnpy.app.cta_strategy.backtesting import BacktestingEngine
+from vnpy.app.cta_strategy.base import BacktestingMode
+from vnpy.app.cta_strategy.template import CtaTemplate
+
+
+BAR_COUNT = 240 * 225       # trading days per year * minutes per day
+GRID_COUNT = 250            # orders on each side
+GRID_STEP = 2
+
+
+class LegacyBacktestingEngine(BacktestingEngine):
+    """
+    Backtesting engine with order crossing before price index.
+    """
+
+    def cross_limit_order(self):
+        """"""
+        long_cross_price = self.bar.low_price
+        short_cross_price = self.bar.high_price
+        long_best_price = self.bar.open_price
+        short_best_price = self.bar.open_price
+
+        # Submitting orders are only used by price index crossing
+        self.submitting_orders.clear()
+
+        for order in list(self.active_limit_orders.values()):
+            if order.status == Status.SUBMITTING:
+                order.status = Status.NOTTRADED
+                self.strategy.on_order(order)
+
+            long_cross = (
+                order.direction == Direction.LONG
+                and order.price >= long_cross_price
+                and long_cross_price > 0
+            )
+
+            short_cross = (
+                order.direction == Direction.SHORT
+                and order.price <= short_cross_price
+                and short_cross_price > 0
+            )
+
+            if not long_cross and not short_cross:
+                continue
+
+            order.traded = order.volume
+            order.status = Status.ALLTRADED
+            self.strategy.on_order(order)
+
+            self.remove_active_limit_order(order.vt_orderid)
+
+            self.trade_count += 1
+
+            if long_cross:
+                trade_price = min(order.price, long_best_price)
+                pos_change = order.volume
+            else:
+                trade_price = max(order.price, short_best_price)
+                pos_change = -order.volume
+
+            trade = TradeData(
+                symbol=order.symbol,
+                exchange=order.exchange,
+                orderid=order.orderid,
+                tradeid=str(self.trade_count),
+                direction=order.direction,
+                offset=order.offset,
+                price=trade_price,
+                volume=order.volume,
+                datetime=self.datetime,
+                gateway_name=self.gateway_name,
+            )
+
+            self.strategy.pos += pos_change
+            self.strategy.on_trade(trade)
+
+            self.trades[trade.vt_tradeid] = trade
+
+    def cross_stop_order(self):
+        """
+        The grid strategy sends no stop order, only the cost of checking
+        is kept here.
+        """
+        for stop_order in list(self.active_stop_orders.values()):
+            pass
+
+
+class GridStrategy(CtaTemplate):
+    """
+    Keeps buy orders below and sell orders above the price, and places
+    a new order on the other side for every trade.
+    """
+
+    author = "benchmark"
+
+    def on_init(self):
+        """"""
+        self.load_bar(1)
+
+    def on_bar(self, bar: BarData):
+        """"""
+        if self.trading and not self.pos and not self.cta_engine.active_limit_orders:
+            for i in range(1, GRID_COUNT + 1):
+                self.buy(bar.close_price - i * GRID_STEP, 1)
+                self.short(bar.close_price + i * GRID_STEP, 1)
+
+    def on_trade(self, trade: TradeData):
+        """"""
+        if trade.direction == Direction.LONG:
+            self.sell(trade.price + GRID_STEP, 1)
+        else:
+            self.cover(trade.price - GRID_STEP, 1)
+
+    def on_order(self, order: OrderData):
+        """"""
+        pass
+
+
+def generate_bars() -> list:
+    """"""
+    rng = np.random.default_rng(0)
+    start = datetime(2020, 1, 1, 9)
+    price = 4000.0
+    bars = []
+
+    for i in range(BAR_COUNT):
+        open_price = price
+        price = round(price + rng.standard_normal() * 3)
+        bar = BarData(
+            symbol="rb2101",
+            exchange=Exchange.SHFE,
+            datetime=start + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            open_price=open_price,
+            high_price=max(open_price, price) + 1,
+            low_price=min(open_price, price) - 1,
+            close_price=price,
+            gateway_name="BENCHMARK"
+        )
+        bars.append(bar)
+
+    return bars
+
+
+def run_benchmark(engine_class: type, bars: list) -> dict:
+    """"""
+    engine = engine_class()
+    engine.output = lambda msg: None
+
+    engine.set_parameters(
+        vt_symbol="rb2101.SHFE",
+        interval=Interval.MINUTE,
+        start=bars[0].datetime,
+        end=bars[-1].datetime,
+        rate=0,
+        slippage=0,
+        size=10,
+        pricetick=1,
+        capital=1_000_000,
+        mode=BacktestingMode.BAR
+    )
+    engine.add_strategy(GridStrategy, {})
+    engine.history_data = bars
+
+    start = perf_counter()
+    engine.run_backtesting()
+    cost = perf_counter() - start
+
+    trades = [
+        (trade.tradeid, trade.direction, trade.price, trade.datetime)
+        for trade in engine.trades.values()
+    ]
+
+    return {
+        "time": cost,
+        "trades": trades,
+        "active": len(engine.active_limit_orders),
+    }
+
+
+if __name__ == "__main__":
+    bars = generate_bars()
+
+    results = {}
+    for engine_class in [LegacyBacktestingEngine, BacktestingEngine]:
+        result = run_benchmark(engine_class, bars)
+        results[engine_class] = result
+
+        print(
+            f"{engine_class.__name__:<28}"
+            f"time: {result['time']:>8.2f}s  "
+            f"us/bar: {result['time'] / BAR_COUNT * 1_000_000:>8.1f}  "
+            f"trades: {len(result['trades']):>8,}  "
+            f"resting: {result['active']:>5}"
+        )
+
+    same = (
+        results[LegacyBacktestingEngine]["trades"]
+        == results[BacktestingEngine]["trades"]
+    )
+    print(f"identical trades: {same}")
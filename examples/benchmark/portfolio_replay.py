@@ -0,0 +1,266 @@
+"""
+Benchmark of replaying history data in portfolio BacktestingEngine.
+
+Minute bars of many symbols with random missing bars are replayed by a
+strategy rebalancing all symbols periodically. The legacy engine stores
+bars in dict keyed by (datetime, vt_symbol) and looks up every symbol on
+every datetime, while current engine takes one row of aligned matrix and
+only updates daily close prices once a day.
+
+Memory is measured for the history data container, not including bar
+objects themselves which are created by database in both engines.
+"""
+
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Dict, List
+import traceback
+import tracemalloc
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from vnpy.app.portfolio_strategy.backtesting import (
+    BacktestingEngine,
+    PortfolioDailyResult
+)
+from vnpy.app.portfolio_strategy.template import StrategyTemplate
+
+
+SYMBOL_COUNT = 300
+DAY_COUNT = 5
+MINUTE_COUNT = 240          # minutes per trading day
+MISSING_RATE = 0.05
+REBALANCE_WINDOW = 30
+
+
+class LegacyBacktestingEngine(BacktestingEngine):
+    """
+    Backtesting engine with history data stored in dict.
+    """
+
+    def set_history_data(self, history_data: Dict[str, List[BarData]]) -> None:
+        """"""
+        self.history_data = {}
+        dts = set()
+
+        for vt_symbol, bars in history_data.items():
+            for bar in bars:
+                dts.add(bar.datetime)
+                self.history_data[(bar.datetime, vt_symbol)] = bar
+
+        self.dts = dts
+
+    def run_backtesting(self) -> None:
+        """"""
+        self.strategy.on_init()
+
+        dts = list(self.dts)
+        dts.sort()
+
+        day_count = 0
+        ix = 0
+
+        for ix, dt in enumerate(dts):
+            if self.datetime and dt.day != self.datetime.day:
+                day_count += 1
+                if day_count >= self.days:
+                    break
+
+            try:
+                self.new_bars(dt)
+            except Exception:
+                self.output("触发异常，回测终止")
+                self.output(traceback.format_exc())
+                return
+
+        self.strategy.inited = True
+        self.strategy.on_start()
+        self.strategy.trading = True
+
+        for dt in dts[ix:]:
+            try:
+                self.new_bars(dt)
+            except Exception:
+                self.output("触发异常，回测终止")
+                self.output(traceback.format_exc())
+                return
+
+    def update_daily_close(self, bars: Dict[str, BarData], dt: datetime) -> None:
+        """"""
+        d = dt.date()
+
+        close_prices = {}
+        for bar in bars.values():
+            close_prices[bar.vt_symbol] = bar.close_price
+
+        daily_result = self.daily_results.get(d, None)
+
+        if daily_result:
+            daily_result.update_close_prices(close_prices)
+        else:
+            self.daily_results[d] = PortfolioDailyResult(d, close_prices)
+
+    def new_bars(self, dt: datetime) -> None:
+        """"""
+        self.datetime = dt
+
+        for vt_symbol in self.vt_symbols:
+            bar = self.history_data.get((dt, vt_symbol), None)
+
+            if bar:
+                self.bars[vt_symbol] = bar
+            elif vt_symbol in self.bars:
+                old_bar = self.bars[vt_symbol]
+
+                bar = BarData(
+                    symbol=old_bar.symbol,
+                    exchange=old_bar.exchange,
+                    datetime=dt,
+                    open_price=old_bar.close_price,
+                    high_price=old_bar.close_price,
+                    low_price=old_bar.close_price,
+                    close_price=old_bar.close_price,
+                    gateway_name=old_bar.gateway_name
+                )
+                self.bars[vt_symbol] = bar
+
+        self.cross_limit_order()
+        self.strategy.on_bars(self.bars)
+
+        self.update_daily_close(self.bars, dt)
+
+
+class RebalanceStrategy(StrategyTemplate):
+    """
+    Flips position of every symbol between long and short periodically.
+    """
+
+    author = "benchmark"
+
+    def on_init(self):
+        """"""
+        self.bar_count = 0
+        self.load_bars(1)
+
+    def on_bars(self, bars: Dict[str, BarData]):
+        """"""
+        self.bar_count += 1
+        if self.bar_count % REBALANCE_WINDOW:
+            return
+
+        self.cancel_all()
+
+        direction = (self.bar_count // REBALANCE_WINDOW) % 2 * 2 - 1
+        for i, (vt_symbol, bar) in enumerate(bars.items()):
+            target = direction if i % 2 else -direction
+            diff = target - self.get_pos(vt_symbol)
+
+            if diff > 0:
+                self.buy(vt_symbol, bar.close_price + 5, diff)
+            elif diff < 0:
+                self.short(vt_symbol, bar.close_price - 5, -diff)
+
+
+def generate_history_data() -> Dict[str, List[BarData]]:
+    """"""
+    rng = np.random.default_rng(0)
+    start = datetime(2020, 1, 1, 9)
+
+    history_data = {}
+    for i in range(SYMBOL_COUNT):
+        symbol = f"bench{i}"
+        price = 4000.0
+        bars = []
+
+        # Some symbols are listed later than others
+        first_day = i % DAY_COUNT if i % 10 == 0 else 0
+
+        for d in range(first_day, DAY_COUNT):
+            for m in range(MINUTE_COUNT):
+                open_price = price
+                price = round(price + rng.standard_normal() * 3)
+
+                if rng.random() < MISSING_RATE:
+                    continue
+
+                bar = BarData(
+                    symbol=symbol,
+                    exchange=Exchange.SHFE,
+                    datetime=start + timedelta(days=d, minutes=m),
+                    interval=Interval.MINUTE,
+                    open_price=open_price,
+                    high_price=max(open_price, price) + 1,
+                    low_price=min(open_price, price) - 1,
+                    close_price=price,
+                    gateway_name="BENCHMARK"
+                )
+                bars.append(bar)
+
+        history_data[f"{symbol}.SHFE"] = bars
+
+    return history_data
+
+
+def run_benchmark(engine_class: type, history_data: Dict[str, List[BarData]]) -> dict:
+    """"""
+    vt_symbols = list(history_data.keys())
+
+    engine = engine_class()
+    engine.output = lambda msg: None
+
+    engine.set_parameters(
+        vt_symbols=vt_symbols,
+        interval=Interval.MINUTE,
+        start=datetime(2020, 1, 1),
+        end=datetime(2020, 1, 1) + timedelta(days=DAY_COUNT),
+        rates={vt_symbol: 1 / 10000 for vt_symbol in vt_symbols},
+        slippages={vt_symbol: 1 for vt_symbol in vt_symbols},
+        sizes={vt_symbol: 10 for vt_symbol in vt_symbols},
+        priceticks={vt_symbol: 1 for vt_symbol in vt_symbols},
+        capital=10_000_000,
+    )
+    engine.add_strategy(RebalanceStrategy, {})
+
+    tracemalloc.start()
+    engine.set_history_data(history_data)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = perf_counter()
+    engine.run_backtesting()
+    cost = perf_counter() - start
+
+    df = engine.calculate_result()
+
+    return {
+        "time": cost,
+        "memory": memory,
+        "trades": len(engine.trades),
+        "net_pnl": df["net_pnl"].tolist(),
+    }
+
+
+if __name__ == "__main__":
+    history_data = generate_history_data()
+    bar_count = sum(len(bars) for bars in history_data.values())
+
+    results = {}
+    for engine_class in [LegacyBacktestingEngine, BacktestingEngine]:
+        result = run_benchmark(engine_class, history_data)
+        results[engine_class] = result
+
+        print(
+            f"{engine_class.__name__:<28}"
+            f"bars: {bar_count:>10,}  "
+            f"time: {result['time']:>8.2f}s  "
+            f"history: {result['memory'] / 1024 / 1024:>8.1f}MB  "
+            f"trades: {result['trades']:>8,}"
+        )
+
+    same = (
+        results[LegacyBacktestingEngine]["net_pnl"]
+        == results[BacktestingEngine]["net_pnl"]
+    )
+    print(f"identical daily pnl: {same}")
@@ -0,0 +1,262 @@
+"""
+Benchmark of matching round trip trades in BacktestingEnginePatch.
+
+Random partial fills of several strategies are matched into TradingResult
+list. The legacy engine deep copies every trade, pairs them with list pops
+from the front and scans all exits for position of every result, while
+current engine pairs lightweight records in deques and looks up position
+with binary search.
+
+Legacy engine is quadratic, so it is skipped above LEGACY_TRADE_LIMIT.
+"""
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from time import perf_counter
+import copy
+
+import numpy as np
+
+from vnpy.trader.constant import Direction, Exchange, Offset
+from vnpy.trader.object import BarData, TradeData
+from vnpy.app.cta_strategy.base import BacktestingMode
+from vnpy.app.cta_strategy.backtestingPatch import (
+    BacktestingEnginePatch,
+    TradingResult
+)
+
+
+TRADE_COUNTS = [1_000, 10_000, 100_000]
+LEGACY_TRADE_LIMIT = 10_000
+STRATEGY_NAMES = ["strategy_a", "strategy_b", "strategy_c", "strategy_d"]
+
+
+class LegacyBacktestingEnginePatch(BacktestingEnginePatch):
+    """
+    Backtesting engine with trade matching before deques.
+    """
+
+    def matchTradingResults(self, tradearray, lifo=False):
+        """"""
+        resultList = []
+        longTradeList = []
+        shortTradeList = []
+        longTrade = []
+        shortTrade = []
+
+        for key, items in groupby(
+                sorted(tradearray, key=lambda t: t.name), lambda t: t.name):
+
+            tradeCount = len(resultList)
+            for trade in items:
+                trade = copy.deepcopy(trade)
+
+                if trade.volume == 0:
+                    pass
+                elif trade.direction == Direction.LONG:
+                    if not shortTrade:
+                        longTrade.append(trade)
+                    else:
+                        while True:
+                            entryTrade = shortTrade[0]
+                            exitTrade = trade
+
+                            closedVolume = min(exitTrade.volume,
+                                               entryTrade.volume)
+                            result = TradingResult(
+                                entryTrade.price, entryTrade.datetime,
+                                exitTrade.price, exitTrade.datetime,
+                                -closedVolume, self.rate, self.slippage,
+                                self.size, key)
+                            resultList.append(result)
+                            shortTradeList.append(result.pnl)
+
+                            entryTrade.volume -= closedVolume
+                            exitTrade.volume -= closedVolume
+
+                            if not entryTrade.volume:
+                                shortTrade.pop(0)
+
+                            if not exitTrade.volume:
+                                break
+
+                            if not shortTrade:
+                                longTrade.append(exitTrade)
+                                break
+                else:
+                    if not longTrade:
+                        shortTrade.append(trade)
+                    else:
+                        while True:
+                            entryTrade = longTrade[0]
+                            exitTrade = trade
+
+                            closedVolume = min(exitTrade.volume,
+                                               entryTrade.volume)
+                            result = TradingResult(
+                                entryTrade.price, entryTrade.datetime,
+                                exitTrade.price, exitTrade.datetime,
+                                closedVolume, self.rate, self.slippage,
+                                self.size, key)
+                            resultList.append(result)
+                            longTradeList.append(result.pnl)
+
+                            entryTrade.volume -= closedVolume
+                            exitTrade.volume -= closedVolume
+
+                            if not entryTrade.volume:
+                                longTrade.pop(0)
+
+                            if not exitTrade.volume:
+                                break
+
+                            if not longTrade:
+                                shortTrade.append(exitTrade)
+                                break
+
+            endPrice = self.bar.close_price
+
+            for trade in longTrade:
+                result = TradingResult(trade.price, trade.datetime, endPrice,
+                                       self.datetime, trade.volume, self.rate,
+                                       self.slippage, self.size, key)
+                resultList.append(result)
+                longTradeList.append(result.pnl)
+
+            for trade in shortTrade:
+                result = TradingResult(trade.price, trade.datetime, endPrice,
+                                       self.datetime, -trade.volume, self.rate,
+                                       self.slippage, self.size, key)
+                resultList.append(result)
+                shortTradeList.append(result.pnl)
+
+            longTrade = []
+            shortTrade = []
+
+            tc = len(resultList) - tradeCount
+            if tc:
+                self.output(u'%10s次交易\t%s' % (tc, key))
+
+        return resultList, longTradeList, shortTradeList
+
+    def calculatePosList(self, resultList):
+        """"""
+        resultList1 = sorted(resultList, key=lambda r: r.exitDt)
+        tradeTimeList = []
+        posList = []
+        posIn = 0
+        for result in resultList:
+            tradeTimeList.extend([result.entryDt, result.exitDt])
+
+            posIn += result.volume
+            posOut = 0
+            for r in resultList1:
+                if r.exitDt < result.entryDt:
+                    posOut += r.volume
+                else:
+                    break
+
+            posList.extend([posIn - posOut, 0])
+
+        return tradeTimeList, posList
+
+
+def generate_trades(trade_count: int) -> list:
+    """"""
+    rng = np.random.default_rng(0)
+    start = datetime(2020, 1, 1, 9)
+
+    trades = []
+    for i in range(trade_count):
+        if rng.random() < 0.5:
+            direction = Direction.LONG
+        else:
+            direction = Direction.SHORT
+
+        trade = TradeData(
+            symbol="rb2101",
+            exchange=Exchange.SHFE,
+            orderid=str(i),
+            tradeid=str(i),
+            direction=direction,
+            offset=Offset.NONE,
+            price=4000.0 + rng.integers(-50, 50),
+            volume=int(rng.integers(1, 10)),
+            datetime=start + timedelta(minutes=i),
+            gateway_name="BENCHMARK"
+        )
+        trade.name = STRATEGY_NAMES[rng.integers(len(STRATEGY_NAMES))]
+        trades.append(trade)
+
+    return trades
+
+
+def run_benchmark(engine_class: type, trades: list) -> dict:
+    """"""
+    engine = engine_class()
+    engine.output = lambda msg: None
+
+    engine.set_parameters(
+        vt_symbol="rb2101.SHFE",
+        interval="1m",
+        start=datetime(2020, 1, 1),
+        rate=1 / 10000,
+        slippage=1,
+        size=10,
+        pricetick=1,
+        capital=1_000_000,
+        mode=BacktestingMode.BAR
+    )
+
+    engine.datetime = trades[-1].datetime
+    engine.bar = BarData(
+        symbol="rb2101",
+        exchange=Exchange.SHFE,
+        datetime=engine.datetime,
+        close_price=4000.0,
+        gateway_name="BENCHMARK"
+    )
+
+    start = perf_counter()
+    result = engine.calculateBacktestingResultImp(trades)
+    cost = perf_counter() - start
+
+    return {
+        "time": cost,
+        "results": [
+            (r.entryDt, r.exitDt, r.volume, r.pnl)
+            for r in result["resultList"]
+        ],
+        "posList": result["posList"],
+        "capital": result["capital"],
+    }
+
+
+if __name__ == "__main__":
+    for trade_count in TRADE_COUNTS:
+        trades = generate_trades(trade_count)
+
+        results = {}
+        for engine_class in [LegacyBacktestingEnginePatch, BacktestingEnginePatch]:
+            if engine_class is LegacyBacktestingEnginePatch and trade_count > LEGACY_TRADE_LIMIT:
+                continue
+
+            result = run_benchmark(engine_class, trades)
+            results[engine_class] = result
+
+            print(
+                f"{engine_class.__name__:<32}"
+                f"trades: {trade_count:>8,}  "
+                f"time: {result['time']:>8.3f}s  "
+                f"results: {len(result['results']):>8,}  "
+                f"capital: {result['capital']:>12,.1f}"
+            )
+
+        if LegacyBacktestingEnginePatch in results:
+            legacy = results[LegacyBacktestingEnginePatch]
+            current = results[BacktestingEnginePatch]
+            same = (
+                legacy["results"] == current["results"]
+                and legacy["posList"] == current["posList"]
+            )
+            print(f"identical results: {same}")
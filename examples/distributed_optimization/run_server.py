@@ -0,0 +1,45 @@
+"""
+Run parameter optimization with distributed workers.
+
+Start workers first with run_worker.py on this or other nodes, and make
+sure strategy class can be imported by workers with the same module path.
+"""
+
+from datetime import datetime
+
+from vnpy.app.cta_strategy.backtesting import BacktestingEngine, OptimizationSetting
+from vnpy.app.cta_strategy.distributed import OptimizationServer
+from vnpy.app.cta_strategy.strategies.double_ma_strategy import DoubleMaStrategy
+
+
+if __name__ == "__main__":
+    rep_address = "tcp://*:2014"
+    pub_address = "tcp://*:4102"
+
+    server = OptimizationServer()
+    server.start(rep_address, pub_address)
+
+    engine = BacktestingEngine()
+    engine.set_parameters(
+        vt_symbol="rb2101.SHFE",
+        interval="1m",
+        start=datetime(2020, 1, 1),
+        end=datetime(2020, 6, 30),
+        rate=1 / 10000,
+        slippage=1,
+        size=10,
+        pricetick=1,
+        capital=1_000_000,
+    )
+    engine.add_strategy(DoubleMaStrategy, {})
+
+    setting = OptimizationSetting()
+    setting.set_target("sharpe_ratio")
+    setting.add_parameter("fast_window", 5, 20, 5)
+    setting.add_parameter("slow_window", 20, 60, 10)
+
+    try:
+        engine.run_optimization(setting, pool=server)
+        engine.run_ga_optimization(setting, pool=server)
+    finally:
+        server.close()
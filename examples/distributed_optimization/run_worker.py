@@ -0,0 +1,18 @@
+"""
+Start distributed optimization workers, one for each CPU by default.
+"""
+
+import sys
+
+from vnpy.app.cta_strategy.distributed import run_workers
+
+
+if __name__ == "__main__":
+    server_host = "localhost"
+    if len(sys.argv) > 1:
+        server_host = sys.argv[1]
+
+    req_address = f"tcp://{server_host}:2014"
+    sub_address = f"tcp://{server_host}:4102"
+
+    run_workers(req_address, sub_address)
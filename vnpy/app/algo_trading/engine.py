@@ -106,7 +106,6 @@ class AlgoEngine(BaseEngine):
 
     def register_event(self):
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
         self.event_engine.register(EVENT_TIMER, self.process_timer_event)
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
         self.event_engine.register(EVENT_TRADE, self.process_trade_event)
@@ -190,6 +189,11 @@ class AlgoEngine(BaseEngine):
             )
             self.main_engine.subscribe(req, contract.gateway_name)
 
+            # Only receive tick event of subscribed vt_symbol
+            self.event_engine.register(
+                EVENT_TICK, self.process_tick_event, vt_symbol
+            )
+
         algos.add(algo)
 
     def send_order(
@@ -17,6 +17,8 @@ from vnpy.app.cta_strategy import CtaTemplate
 from vnpy.app.cta_strategy.backtesting import (
     BacktestingEngine, OptimizationSetting, BacktestingMode
 )
+from vnpy.app.cta_strategy.backtestingPatch import BacktestingEnginePatch
+from vnpy.app.cta_strategy.optimization import OptimizationPool, OptimizationCache
 
 
 APP_NAME = "CtaBacktester"
@@ -46,6 +48,10 @@ class BacktesterEngine(BaseEngine):
         # Optimization result
         self.result_values = None
 
+        # Processes and results reused by all optimization runs
+        self.optimization_pool = OptimizationPool()
+        self.optimization_cache = None
+
     def init_engine(self):
         """"""
         self.write_log("初始化CTA回测引擎")
@@ -57,8 +63,14 @@ class BacktesterEngine(BaseEngine):
         self.load_strategy_class()
         self.write_log("策略文件加载完成")
 
+        self.optimization_cache = OptimizationCache()
+
         self.init_rqdata()
 
+    def close(self):
+        """"""
+        self.optimization_pool.close()
+
     def init_rqdata(self):
         """
         Init RQData client.
@@ -122,6 +134,10 @@ class BacktesterEngine(BaseEngine):
         """"""
         self.classes.clear()
         self.load_strategy_class()
+
+        # Restart optimization processes on next run to import new code
+        self.optimization_pool.close()
+
         self.write_log("策略文件重载刷新完成")
 
     def get_strategy_class_names(self):
@@ -268,11 +284,14 @@ class BacktesterEngine(BaseEngine):
         capital: int,
         inverse: bool,
         optimization_setting: OptimizationSetting,
-        use_ga: bool
+        use_ga: bool,
+        use_halving: bool = False
     ):
         """"""
         if use_ga:
             self.write_log("开始遗传算法参数优化")
+        elif use_halving:
+            self.write_log("开始逐次减半参数优化")
         else:
             self.write_log("开始多进程参数优化")
 
@@ -309,12 +328,23 @@ class BacktesterEngine(BaseEngine):
         if use_ga:
             self.result_values = engine.run_ga_optimization(
                 optimization_setting,
-                output=False
+                output=False,
+                cache=self.optimization_cache,
+                pool=self.optimization_pool
+            )
+        elif use_halving:
+            self.result_values = engine.run_halving_optimization(
+                optimization_setting,
+                output=False,
+                pool=self.optimization_pool,
+                cache=self.optimization_cache
             )
         else:
             self.result_values = engine.run_optimization(
                 optimization_setting,
-                output=False
+                output=False,
+                pool=self.optimization_pool,
+                cache=self.optimization_cache
             )
 
         # Clear thread object handler.
@@ -339,7 +369,8 @@ class BacktesterEngine(BaseEngine):
         capital: int,
         inverse: bool,
         optimization_setting: OptimizationSetting,
-        use_ga: bool
+        use_ga: bool,
+        use_halving: bool = False
     ):
         if self.thread:
             self.write_log("已有任务在运行中，请等待完成")
@@ -361,7 +392,8 @@ class BacktesterEngine(BaseEngine):
                 capital,
                 inverse,
                 optimization_setting,
-                use_ga
+                use_ga,
+                use_halving
             )
         )
         self.thread.start()
@@ -409,7 +409,7 @@ class BacktesterManager(QtWidgets.QWidget):
         if i != dialog.Accepted:
             return
 
-        optimization_setting, use_ga = dialog.get_setting()
+        optimization_setting, use_ga, use_halving = dialog.get_setting()
         self.target_display = dialog.target_display
 
         self.backtester_engine.start_optimization(
@@ -425,7 +425,8 @@ class BacktesterManager(QtWidgets.QWidget):
             capital,
             inverse,
             optimization_setting,
-            use_ga
+            use_ga,
+            use_halving
         )
 
         self.result_button.setEnabled(False)
@@ -849,6 +850,7 @@ class OptimizationSettingEditor(QtWidgets.QDialog):
 
         self.optimization_setting = None
         self.use_ga = False
+        self.use_halving = False
 
         self.init_ui()
 
@@ -908,6 +910,11 @@ class OptimizationSettingEditor(QtWidgets.QDialog):
         ga_button.clicked.connect(self.generate_ga_setting)
         grid.addWidget(ga_button, row, 0, 1, 4)
 
+        row += 1
+        halving_button = QtWidgets.QPushButton("逐次减半优化")
+        halving_button.clicked.connect(self.generate_halving_setting)
+        grid.addWidget(halving_button, row, 0, 1, 4)
+
         widget = QtWidgets.QWidget()
         widget.setLayout(grid)
 
@@ -922,11 +929,19 @@ class OptimizationSettingEditor(QtWidgets.QDialog):
     def generate_ga_setting(self):
         """"""
         self.use_ga = True
+        self.use_halving = False
         self.generate_setting()
 
     def generate_parallel_setting(self):
         """"""
         self.use_ga = False
+        self.use_halving = False
+        self.generate_setting()
+
+    def generate_halving_setting(self):
+        """"""
+        self.use_ga = False
+        self.use_halving = True
         self.generate_setting()
 
     def generate_setting(self):
@@ -957,7 +972,7 @@ class OptimizationSettingEditor(QtWidgets.QDialog):
 
     def get_setting(self):
         """"""
-        return self.optimization_setting, self.use_ga
+        return self.optimization_setting, self.use_ga, self.use_halving
 
 
 class OptimizationResultMonitor(QtWidgets.QDialog):
@@ -1,15 +1,19 @@
-from collections import defaultdict
+from bisect import bisect_left, bisect_right, insort
 from datetime import date, datetime, timedelta
-from typing import Callable
-from itertools import product
+from typing import Any, Callable, Dict, Generator, Iterator, List, Tuple
+from itertools import product, repeat
 from functools import lru_cache
 from time import time
-import multiprocessing
+from math import inf
+from multiprocessing.pool import AsyncResult
+from queue import Full, Queue
+from threading import Event, Thread
+from operator import attrgetter, is_, itemgetter
 import random
 import traceback
 
 import numpy as np
-from pandas import DataFrame
+from pandas import DataFrame, concat
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from deap import creator, base, tools, algorithms
@@ -17,7 +21,10 @@ from deap import creator, base, tools, algorithms
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
 from vnpy.trader.database import database_manager
-from vnpy.trader.object import OrderData, TradeData, BarData, TickData
+from vnpy.trader.object import (
+    OrderData, TradeData, BarData, TickData, DataBatch, BarBatch, TickBatch, to_slotted
+)
+from vnpy.trader.profiler import BacktestingProfiler
 from vnpy.trader.utility import round_to
 
 from .base import (
@@ -29,7 +36,40 @@ from .base import (
     INTERVAL_DELTA_MAP
 )
 from .template import CtaTemplate
+from .optimization import (
+    OptimizationPool,
+    OptimizationCache,
+    get_source_hash,
+    get_data_hash,
+    get_cache_key,
+    resolve_shared_folder,
+    shared_data_loaders
+)
+
 
+# Methods timed in profiling mode
+PROFILED_ENGINE_METHODS = [
+    "load_data",
+    "run_backtesting",
+    "run_vector_backtesting",
+    "calculate_result",
+    "calculate_statistics",
+    "new_bar",
+    "new_tick",
+    "cross_limit_order",
+    "cross_stop_order",
+    "update_daily_close",
+]
+PROFILED_STRATEGY_METHODS = [
+    "on_init",
+    "on_start",
+    "on_bar",
+    "on_tick",
+    "on_trade",
+    "on_order",
+    "on_stop_order",
+    "target_position",
+]
 
 # Set deap algo
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
@@ -98,6 +138,63 @@ class OptimizationSetting:
         return settings_ga
 
 
+class PriceIndex:
+    """
+    Active orders sorted by price, so that orders crossed by a price are
+    found with binary search instead of checking every active order.
+
+    Every order is added with a sequence number of submission, which is
+    returned along with the order to keep the original processing order.
+    """
+
+    def __init__(self):
+        """"""
+        self.keys: List[Tuple[float, int]] = []
+        self.orders: Dict[Tuple[float, int], Any] = {}
+        self.orderid_keys: Dict[str, Tuple[float, int]] = {}
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.keys)
+
+    def add(self, orderid: str, price: float, seq: int, order: Any) -> None:
+        """"""
+        key = (price, seq)
+        insort(self.keys, key)
+        self.orders[key] = order
+        self.orderid_keys[orderid] = key
+
+    def remove(self, orderid: str) -> None:
+        """"""
+        key = self.orderid_keys.pop(orderid, None)
+        if not key:
+            return
+
+        ix = bisect_left(self.keys, key)
+        del self.keys[ix]
+        del self.orders[key]
+
+    def get_below(self, price: float) -> List[Tuple[int, Any]]:
+        """
+        Get (seq, order) of orders with price lower than or equal to price.
+        """
+        ix = bisect_right(self.keys, (price, inf))
+        return [(key[1], self.orders[key]) for key in self.keys[:ix]]
+
+    def get_above(self, price: float) -> List[Tuple[int, Any]]:
+        """
+        Get (seq, order) of orders with price higher than or equal to price.
+        """
+        ix = bisect_left(self.keys, (price, -inf))
+        return [(key[1], self.orders[key]) for key in self.keys[ix:]]
+
+    def clear(self) -> None:
+        """"""
+        self.keys.clear()
+        self.orders.clear()
+        self.orderid_keys.clear()
+
+
 class BacktestingEngine:
     """"""
 
@@ -119,6 +216,11 @@ class BacktestingEngine:
         self.risk_free: float = 0.02
         self.mode = BacktestingMode.BAR
         self.inverse = False
+        self.slotted = False
+        self.streaming = False
+        self.chunk_days = 0
+        self.prefetch_chunks = 2
+        self.profiler: BacktestingProfiler = None
 
         self.strategy_class = None
         self.strategy = None
@@ -139,6 +241,13 @@ class BacktestingEngine:
         self.limit_orders = {}
         self.active_limit_orders = {}
 
+        # Active orders indexed by price for fast crossing
+        self.long_limit_index = PriceIndex()
+        self.short_limit_index = PriceIndex()
+        self.long_stop_index = PriceIndex()
+        self.short_stop_index = PriceIndex()
+        self.submitting_orders = []
+
         self.trade_count = 0
         self.trades = {}
 
@@ -164,12 +273,27 @@ class BacktestingEngine:
         self.limit_orders.clear()
         self.active_limit_orders.clear()
 
+        self.clear_order_index()
+
         self.trade_count = 0
         self.trades.clear()
 
         self.logs.clear()
         self.daily_results.clear()
 
+        if self.profiler:
+            self.profiler.clear()
+
+    def clear_order_index(self):
+        """
+        Clear price index of active orders.
+        """
+        self.long_limit_index.clear()
+        self.short_limit_index.clear()
+        self.long_stop_index.clear()
+        self.short_stop_index.clear()
+        self.submitting_orders = []
+
     def set_parameters(
         self,
         vt_symbol: str,
@@ -183,9 +307,25 @@ class BacktestingEngine:
         end: datetime = None,
         mode: BacktestingMode = BacktestingMode.BAR,
         inverse: bool = False,
-        risk_free: float = 0
+        risk_free: float = 0,
+        slotted: bool = False,
+        streaming: bool = False,
+        chunk_days: int = 0,
+        prefetch_chunks: int = 2,
+        profile: bool = False
     ):
-        """"""
+        """
+        Set slotted to store history data as memory-lean slotted objects,
+        which can not hold any extra attribute.
+
+        Set streaming to replay history data chunk by chunk without loading
+        all of it into history_data. Each chunk covers chunk_days (1/10 of
+        the whole range if 0), and at most prefetch_chunks chunks are loaded
+        ahead by background thread while strategy is running.
+
+        Set profile to record time of every backtesting phase and callback
+        into profiler, which is reported with statistics.
+        """
         self.mode = mode
         self.vt_symbol = vt_symbol
         self.interval = Interval(interval)
@@ -203,6 +343,17 @@ class BacktestingEngine:
         self.mode = mode
         self.inverse = inverse
         self.risk_free = risk_free
+        self.slotted = slotted
+        self.streaming = streaming
+        self.chunk_days = chunk_days
+        self.prefetch_chunks = max(prefetch_chunks, 1)
+
+        if profile:
+            self.profiler = BacktestingProfiler()
+            self.profiler.instrument(self, PROFILED_ENGINE_METHODS)
+        else:
+            self.profiler = None
+            BacktestingProfiler.uninstrument(self, PROFILED_ENGINE_METHODS)
 
     def add_strategy(self, strategy_class: type, setting: dict):
         """"""
@@ -211,10 +362,19 @@ class BacktestingEngine:
             self, strategy_class.__name__, self.vt_symbol, setting
         )
 
-    def load_data(self):
-        """"""
+        if self.profiler:
+            self.profiler.instrument_strategy(self.strategy, PROFILED_STRATEGY_METHODS)
+
+    def load_data(self, streaming: bool = None):
+        """
+        Streaming mode of engine can be overridden, for example optimization
+        always loads all data to share with processes.
+        """
         self.output("开始加载历史数据")
 
+        if streaming is None:
+            streaming = self.streaming
+
         if not self.end:
             self.end = datetime.now()
 
@@ -224,50 +384,173 @@ class BacktestingEngine:
 
         self.history_data.clear()       # Clear previously loaded history data
 
-        # Load 30 days of data each time and allow for progress update
+        if streaming:
+            self.output("流式回放模式，历史数据将在回测时分段加载")
+            return
+
+        for progress, data in self.load_history_chunks():
+            progress_bar = "#" * int(progress * 10 + 1)
+            self.output(f"加载进度：{progress_bar} [{progress:.0%}]")
+
+            self.history_data.extend(data)
+
+        self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
+
+    def get_history_ranges(self) -> List[Tuple[datetime, datetime]]:
+        """
+        Split backtesting period into ranges of chunk_days, or 1/10 of
+        the whole period if not set.
+        """
         total_days = (self.end - self.start).days
-        progress_days = max(int(total_days / 10), 1)
+        if self.chunk_days:
+            progress_days = self.chunk_days
+        else:
+            progress_days = max(int(total_days / 10), 1)
+
         progress_delta = timedelta(days=progress_days)
         interval_delta = INTERVAL_DELTA_MAP[self.interval]
 
+        ranges = []
         start = self.start
         end = self.start + progress_delta
-        progress = 0
 
         while start < self.end:
-            progress_bar = "#" * int(progress * 10 + 1)
-            self.output(f"加载进度：{progress_bar} [{progress:.0%}]")
-
             end = min(end, self.end)  # Make sure end time stays within set range
+            ranges.append((start, end))
+
+            start = end + interval_delta
+            end += progress_delta
+
+        return ranges
+
+    def load_history_chunks(self, cached: bool = True) -> Iterator[Tuple[float, list]]:
+        """
+        Load history data range by range, and yield (progress, data) of
+        each range. Set cached to False to skip lru_cache of loading
+        functions, so that loaded data is released after being used.
+        """
+        if self.mode == BacktestingMode.BAR:
+            load_func = load_bar_data
+        else:
+            load_func = load_tick_data
+
+        if not cached:
+            load_func = load_func.__wrapped__
 
+        ranges = self.get_history_ranges()
+
+        for ix, (start, end) in enumerate(ranges):
             if self.mode == BacktestingMode.BAR:
-                data = load_bar_data(
+                data = load_func(
                     self.symbol,
                     self.exchange,
                     self.interval,
                     start,
-                    end
+                    end,
+                    self.slotted
                 )
             else:
-                data = load_tick_data(
+                data = load_func(
                     self.symbol,
                     self.exchange,
                     start,
-                    end
+                    end,
+                    self.slotted
                 )
 
-            self.history_data.extend(data)
+            yield ix / len(ranges), data
 
-            progress += progress_days / total_days
-            progress = min(progress, 1)
+    def prefetch_history_chunks(self) -> Iterator[Tuple[float, list]]:
+        """
+        Yield (progress, data) of history chunks, which are loaded ahead by
+        background thread. At most prefetch_chunks chunks are waiting in
+        queue, so that memory is bounded no matter how long the period is.
+        """
+        queue = Queue(maxsize=self.prefetch_chunks)
+        stopped = Event()
 
-            start = end + interval_delta
-            end += progress_delta
+        def put(item) -> bool:
+            """Put item into queue unless consumer is stopped."""
+            while not stopped.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
 
-        self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
+        def run() -> None:
+            """"""
+            try:
+                for item in self.load_history_chunks(cached=False):
+                    if not put(item):
+                        return
+            except Exception as e:
+                put(e)
+                return
 
-    def run_backtesting(self):
-        """"""
+            put(None)
+
+        thread = Thread(target=run, daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item = queue.get()
+
+                if item is None:
+                    break
+                elif isinstance(item, Exception):
+                    raise item
+
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
+
+    def iter_history_data(self) -> Generator:
+        """
+        Iterate history data one by one, from history_data or chunks
+        prefetched in streaming mode.
+        """
+        if not self.streaming:
+            yield from self.history_data
+            return
+
+        for progress, data in self.prefetch_history_chunks():
+            progress_bar = "=" * int(progress * 10 + 1)
+            self.output(f"回放进度：{progress_bar} [{progress:.0%}]")
+
+            yield from data
+
+    def run_backtesting(self) -> bool:
+        """
+        Return False if replay is terminated by exception or lack of data.
+
+        Strategy is stopped even if replay is terminated, so that resources
+        acquired by strategy (e.g. shared ArrayManager) are always released.
+        """
+        try:
+            finished = self.replay_history_data()
+        except BaseException:
+            # Exception of stopping is only output, not to hide the original
+            try:
+                self.strategy.on_stop()
+            except Exception:
+                self.output(traceback.format_exc())
+            raise
+
+        self.strategy.on_stop()
+
+        if finished:
+            self.output("历史数据回放结束")
+        return finished
+
+    def replay_history_data(self) -> bool:
+        """
+        Initialize strategy with the first [days] of history data, then
+        start it and replay the rest. Return False if replay is terminated.
+        """
         if self.mode == BacktestingMode.BAR:
             func = self.new_bar
         else:
@@ -275,11 +558,18 @@ class BacktestingEngine:
 
         self.strategy.on_init()
 
+        if self.streaming:
+            if not self.end:
+                self.end = datetime.now()
+            data_iter = self.iter_history_data()
+        else:
+            data_iter = iter(self.history_data)
+
         # Use the first [days] of history data for initializing strategy
         day_count = 1
         ix = 0
 
-        for ix, data in enumerate(self.history_data):
+        for ix, data in enumerate(data_iter):
             if self.datetime and data.datetime.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
@@ -292,7 +582,7 @@ class BacktestingEngine:
             except Exception:
                 self.output("触发异常，回测终止")
                 self.output(traceback.format_exc())
-                return
+                return False
 
         self.strategy.inited = True
         self.output("策略初始化完成")
@@ -302,30 +592,147 @@ class BacktestingEngine:
         self.output("开始回放历史数据")
 
         # Use the rest of history data for running backtesting
-        backtesting_data = self.history_data[ix + 1:]
-        if not backtesting_data:
-            self.output("历史数据不足，回测终止")
-            return
-
-        total_size = len(backtesting_data)
-        batch_size = max(int(total_size / 10), 1)
+        if self.streaming:
+            if not self.replay_streaming_data(data_iter, func):
+                return False
+        else:
+            backtesting_data = self.history_data[ix + 1:]
+            if not backtesting_data:
+                self.output("历史数据不足，回测终止")
+                return False
+
+            total_size = len(backtesting_data)
+            batch_size = max(int(total_size / 10), 1)
+
+            for ix, i in enumerate(range(0, total_size, batch_size)):
+                batch_data = backtesting_data[i: i + batch_size]
+                for data in batch_data:
+                    try:
+                        func(data)
+                    except Exception:
+                        self.output("触发异常，回测终止")
+                        self.output(traceback.format_exc())
+                        return False
+
+                progress = min(ix / 10, 1)
+                progress_bar = "=" * (ix + 1)
+                self.output(f"回放进度：{progress_bar} [{progress:.0%}]")
+
+        return True
+
+    def replay_streaming_data(self, data_iter: Generator, func: Callable) -> bool:
+        """
+        Replay the rest of streaming history data, and return False if
+        replay is terminated. Replay progress is output when every chunk
+        is started by iter_history_data.
+        """
+        count = 0
 
-        for ix, i in enumerate(range(0, total_size, batch_size)):
-            batch_data = backtesting_data[i: i + batch_size]
-            for data in batch_data:
+        try:
+            for data in data_iter:
+                count += 1
                 try:
                     func(data)
                 except Exception:
                     self.output("触发异常，回测终止")
                     self.output(traceback.format_exc())
-                    return
+                    return False
+        finally:
+            # Stop prefetching thread if replay ended early
+            data_iter.close()
 
-            progress = min(ix / 10, 1)
-            progress_bar = "=" * (ix + 1)
-            self.output(f"回放进度：{progress_bar} [{progress:.0%}]")
+        if not count:
+            self.output("历史数据不足，回测终止")
+            return False
 
-        self.strategy.on_stop()
-        self.output("历史数据回放结束")
+        return True
+
+    def run_vector_backtesting(self):
+        """
+        Run backtesting in one vectorized pass with target_position of
+        strategy, instead of replaying history data bar by bar.
+
+        Target position returned for every bar is reached at open price
+        of the next bar, and the first [days] of history data is only
+        used for initializing like run_backtesting. Daily result is saved
+        in daily_df (without trades column) for calculate_statistics.
+        """
+        if self.mode != BacktestingMode.BAR:
+            self.output("向量化回测仅支持K线模式")
+            return
+
+        if not len(self.history_data):
+            self.output("历史数据为空，回测终止")
+            return
+
+        self.output("开始向量化回测")
+
+        if isinstance(self.history_data, DataBatch):
+            batch = self.history_data
+        else:
+            batch = self.get_history_batch()
+
+        # Initializing days are set by load_bar in on_init
+        self.strategy.on_init()
+
+        arrays = dict(batch.arrays)
+        arrays["datetime"] = batch.datetime
+
+        try:
+            targets = self.strategy.target_position(arrays)
+        except NotImplementedError:
+            self.output("策略未实现target_position，无法进行向量化回测")
+            return
+
+        targets = np.nan_to_num(np.asarray(targets, dtype=np.float64))
+        if len(targets) != len(batch):
+            self.output("目标仓位数组长度与历史数据不一致，回测终止")
+            return
+
+        # Skip the first [days] of history data and the bar breaking
+        # initialization, same as run_backtesting
+        bar_dates = batch.datetime.astype("datetime64[D]")
+        day_starts = np.flatnonzero(bar_dates[1:] != bar_dates[:-1]) + 1
+        init_ix = max(self.days - 2, 0)
+        if init_ix >= len(day_starts):
+            self.output("历史数据不足，回测终止")
+            return
+        start = day_starts[init_ix] + 1
+
+        bar_dates = bar_dates[start:]
+        open_prices = batch.arrays["open_price"][start:]
+        close_prices = batch.arrays["close_price"][start:]
+        targets = targets[start:]
+
+        # Position held in every bar is the target of previous bar
+        positions = np.zeros(len(targets))
+        positions[1:] = targets[:-1]
+        pos_changes = np.diff(positions, prepend=0)
+
+        trade_ix = np.flatnonzero(pos_changes)
+        volumes = np.abs(pos_changes[trade_ix])
+        prices = open_prices[trade_ix]
+        longs = pos_changes[trade_ix] > 0
+
+        # Close price of every day is the close price of its last bar
+        day_ends = np.append(np.flatnonzero(bar_dates[1:] != bar_dates[:-1]), len(bar_dates) - 1)
+        bar_days = np.zeros(len(bar_dates), dtype=np.int64)
+        bar_days[day_ends[:-1] + 1] = 1
+        bar_days = np.cumsum(bar_days)
+
+        dates = bar_dates[day_ends].tolist()
+
+        self.daily_df = self.calculate_daily_df(
+            dates,
+            close_prices[day_ends],
+            bar_days[trade_ix],
+            volumes,
+            prices,
+            longs
+        )
+
+        self.output("向量化回测完成")
+        return self.daily_df
 
     def calculate_result(self):
         """"""
@@ -335,41 +742,152 @@ class BacktestingEngine:
             self.output("成交记录为空，无法计算")
             return
 
-        # Add trade data into daily reuslt.
-        for trade in self.trades.values():
-            d = trade.datetime.date()
-            daily_result = self.daily_results[d]
-            daily_result.add_trade(trade)
-
-        # Calculate daily result by iteration.
-        pre_close = 0
-        start_pos = 0
-
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_close,
-                start_pos,
-                self.size,
-                self.rate,
-                self.slippage,
-                self.inverse
-            )
+        # Daily close price arrays
+        dates = list(self.daily_results.keys())
+        day_count = len(dates)
 
-            pre_close = daily_result.close_price
-            start_pos = daily_result.end_pos
+        close_prices = np.array(
+            [daily_result.close_price for daily_result in self.daily_results.values()],
+            dtype=np.float64
+        )
 
-        # Generate dataframe
-        results = defaultdict(list)
+        # Trade arrays, sorted by day while keeping trade order in the same day
+        trades = list(self.trades.values())
+        trade_count = len(trades)
 
-        for daily_result in self.daily_results.values():
-            for key, value in daily_result.__dict__.items():
-                results[key].append(value)
+        # Fields are fetched with separate passes of C level iteration, which
+        # creates no container object per trade to trigger garbage collection
+        trade_ordinals = np.fromiter(
+            map(date.toordinal, map(datetime.date, map(attrgetter("datetime"), trades))),
+            np.int64,
+            trade_count
+        )
+        day_ordinals = np.array([d.toordinal() for d in dates], dtype=np.int64)
+
+        trade_days = np.searchsorted(day_ordinals, trade_ordinals)
+        if (
+            trade_days.max() >= day_count
+            or (day_ordinals[trade_days] != trade_ordinals).any()
+        ):
+            raise KeyError("成交日期不在每日结果中")
+
+        volumes = np.array(list(map(attrgetter("volume"), trades)))
+        prices = np.fromiter(map(attrgetter("price"), trades), np.float64, trade_count)
+        longs = np.fromiter(
+            map(is_, map(attrgetter("direction"), trades), repeat(Direction.LONG)),
+            bool,
+            trade_count
+        )
+
+        if (np.diff(trade_days) < 0).any():
+            sort_ix = np.argsort(trade_days, kind="stable")
+            trade_days = trade_days[sort_ix]
+            volumes = volumes[sort_ix]
+            prices = prices[sort_ix]
+            longs = longs[sort_ix]
+            trades = [trades[ix] for ix in sort_ix]
 
-        self.daily_df = DataFrame.from_dict(results).set_index("date")
+        # Trades of every day
+        bounds = np.searchsorted(trade_days, np.arange(day_count + 1)).tolist()
+        daily_trades = [trades[bounds[ix]:bounds[ix + 1]] for ix in range(day_count)]
+
+        self.daily_df = self.calculate_daily_df(
+            dates, close_prices, trade_days, volumes, prices, longs, daily_trades
+        )
 
         self.output("逐日盯市盈亏计算完成")
         return self.daily_df
 
+    def calculate_daily_df(
+        self,
+        dates: List[date],
+        close_prices: np.ndarray,
+        trade_days: np.ndarray,
+        volumes: np.ndarray,
+        prices: np.ndarray,
+        longs: np.ndarray,
+        daily_trades: List[list] = None
+    ) -> DataFrame:
+        """
+        Calculate daily result dataframe from arrays of daily close price
+        and trades, which are sorted by index of trade day in dates.
+        Column of trades is only included if daily_trades is given.
+        """
+        day_count = len(dates)
+
+        # If no pre_close provided on the first day,
+        # use value 1 to avoid zero division error
+        pre_closes = np.ones(day_count)
+        pre_closes[1:] = close_prices[:-1]
+        pre_closes[pre_closes == 0] = 1
+
+        pos_changes = np.where(longs, volumes, -volumes)
+
+        size = self.size
+        trade_closes = close_prices[trade_days]
+
+        # Trading pnl is the pnl from new trade during the day
+        if not self.inverse:    # For normal contract
+            trade_turnovers = volumes * size * prices
+            trade_pnls = pos_changes * (trade_closes - prices) * size
+            trade_slippages = volumes * size * self.slippage
+        else:                   # For crypto currency inverse contract
+            trade_turnovers = volumes * size / prices
+            trade_pnls = pos_changes * (1 / prices - 1 / trade_closes) * size
+            trade_slippages = volumes * size * self.slippage / (prices ** 2)
+
+        trade_commissions = trade_turnovers * self.rate
+
+        # Sum trade values of every day, in the same order as trades added
+        def sum_by_day(values: np.ndarray) -> np.ndarray:
+            return np.bincount(trade_days, weights=values, minlength=day_count)
+
+        trade_counts = np.bincount(trade_days, minlength=day_count)
+        turnovers = sum_by_day(trade_turnovers)
+        commissions = sum_by_day(trade_commissions)
+        slippages = sum_by_day(trade_slippages)
+        trading_pnls = sum_by_day(trade_pnls)
+
+        # Position at day end is the accumulated position of last trade
+        trade_positions = np.zeros(len(pos_changes) + 1, dtype=pos_changes.dtype)
+        np.cumsum(pos_changes, out=trade_positions[1:])
+        trade_ends = np.searchsorted(trade_days, np.arange(day_count), side="right")
+        end_positions = trade_positions[trade_ends]
+        start_positions = np.zeros_like(end_positions)
+        start_positions[1:] = end_positions[:-1]
+
+        # Holding pnl is the pnl from holding position at day start
+        if not self.inverse:
+            holding_pnls = start_positions * (close_prices - pre_closes) * size
+        else:
+            holding_pnls = start_positions * (1 / pre_closes - 1 / close_prices) * size
+
+        # Net pnl takes account of commission and slippage cost
+        total_pnls = trading_pnls + holding_pnls
+        net_pnls = total_pnls - commissions - slippages
+
+        # Generate dataframe
+        df = DataFrame({
+            "date": dates,
+            "close_price": close_prices,
+            "pre_close": pre_closes,
+            "trade_count": trade_counts,
+            "start_pos": start_positions,
+            "end_pos": end_positions,
+            "turnover": turnovers,
+            "commission": commissions,
+            "slippage": slippages,
+            "trading_pnl": trading_pnls,
+            "holding_pnl": holding_pnls,
+            "total_pnl": total_pnls,
+            "net_pnl": net_pnls,
+        })
+
+        if daily_trades is not None:
+            df.insert(3, "trades", daily_trades)
+
+        return df.set_index("date")
+
     def calculate_statistics(self, df: DataFrame = None, output=True):
         """"""
         self.output("开始计算策略统计指标")
@@ -415,10 +933,7 @@ class BacktestingEngine:
             x[x <= 0] = np.nan
             df["return"] = np.log(x).fillna(0)
 
-            df["highlevel"] = (
-                df["balance"].rolling(
-                    min_periods=1, window=len(df), center=False).max()
-            )
+            df["highlevel"] = np.maximum.accumulate(df["balance"].to_numpy())
             df["drawdown"] = df["balance"] - df["highlevel"]
             df["ddpercent"] = df["drawdown"] / df["highlevel"] * 100
 
@@ -427,8 +942,8 @@ class BacktestingEngine:
             end_date = df.index[-1]
 
             total_days = len(df)
-            profit_days = len(df[df["net_pnl"] > 0])
-            loss_days = len(df[df["net_pnl"] < 0])
+            profit_days = int((df["net_pnl"] > 0).sum())
+            loss_days = int((df["net_pnl"] < 0).sum())
 
             end_balance = df["balance"].iloc[-1]
             max_drawdown = df["drawdown"].min()
@@ -540,6 +1055,9 @@ class BacktestingEngine:
                 value = 0
             statistics[key] = np.nan_to_num(value)
 
+        if output and self.profiler:
+            self.profiler.output_report(self.output)
+
         self.output("策略统计指标计算完成")
         return statistics
 
@@ -585,8 +1103,17 @@ class BacktestingEngine:
         fig.update_layout(height=1000, width=1000)
         fig.show()
 
-    def run_optimization(self, optimization_setting: OptimizationSetting, output=True):
-        """"""
+    def run_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        output=True,
+        pool: OptimizationPool = None,
+        cache: OptimizationCache = None
+    ):
+        """
+        Pass a long-lived pool to reuse its processes across runs, and
+        a cache to skip settings with result already saved on disk.
+        """
         # Get optimization setting and target
         settings = optimization_setting.generate_setting()
         target_name = optimization_setting.target_name
@@ -599,36 +1126,70 @@ class BacktestingEngine:
             self.output("优化目标未设置，请检查")
             return
 
+        # Load history data only once, and share it with all processes
+        # as memory mapped arrays
+        self.load_data(streaming=False)
+
+        if not self.history_data:
+            self.output("历史数据为空，请检查")
+            return
+
+        batch = self.get_history_batch()
+
+        # Find results already cached
+        if cache:
+            base_key = self.get_optimization_key(batch)
+            keys = [get_cache_key(base_key, setting) for setting in settings]
+            cached_results = cache.get_many(keys)
+            self.output(f"优化结果缓存命中：{len(cached_results)}/{len(settings)}")
+        else:
+            keys = []
+            cached_results = {}
+
         # Use multiprocessing pool for running backtesting with different setting
-        # Force to use spawn method to create new process (instead of fork on Linux)
-        ctx = multiprocessing.get_context("spawn")
-        pool = ctx.Pool(multiprocessing.cpu_count())
+        if pool:
+            temp_pool = None
+        else:
+            temp_pool = pool = OptimizationPool()
 
+        history_folder = ""
         results = []
-        for setting in settings:
-            result = (pool.apply_async(optimize, (
-                target_name,
-                self.strategy_class,
-                setting,
-                self.vt_symbol,
-                self.interval,
-                self.start,
-                self.rate,
-                self.slippage,
-                self.size,
-                self.pricetick,
-                self.capital,
-                self.end,
-                self.mode,
-                self.inverse
-            )))
-            results.append(result)
-
-        pool.close()
-        pool.join()
+        result_values = []
+        new_results = {}
+
+        # Shared history data and temp pool are released even if any
+        # backtesting failed
+        try:
+            for ix, setting in enumerate(settings):
+                if cached_results:
+                    statistics = cached_results.get(keys[ix], None)
+                    if statistics:
+                        results.append((str(setting), statistics[target_name], statistics))
+                        continue
+
+                if not history_folder:
+                    history_folder = pool.share_data(batch)
+
+                result = self.submit_optimization(pool, target_name, setting, history_folder)
+                results.append(result)
+
+            for ix, result in enumerate(results):
+                if not isinstance(result, tuple):
+                    result = result.get()
+                    if cache:
+                        new_results[keys[ix]] = result[2]
+                result_values.append(result)
+        finally:
+            if history_folder:
+                pool.release_data(history_folder)
+
+            if temp_pool:
+                temp_pool.close()
+
+        if new_results:
+            cache.set_many(new_results)
 
         # Sort results and output
-        result_values = [result.get() for result in results]
         result_values.sort(reverse=True, key=lambda result: result[1])
 
         if output:
@@ -638,11 +1199,418 @@ class BacktestingEngine:
 
         return result_values
 
-    def run_ga_optimization(self, optimization_setting: OptimizationSetting, population_size=100, ngen_size=30, output=True):
-        """"""
-        # Clear lru_cache before running ga optimization
-        _ga_optimize.cache_clear()
+    def run_halving_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        eta: int = 3,
+        min_days: int = 30,
+        output=True,
+        pool: OptimizationPool = None,
+        cache: OptimizationCache = None
+    ):
+        """
+        Successive halving optimization. All settings are backtested with
+        a short slice from the start of history data first, and only the
+        best 1/eta of them are promoted to the next slice, which is eta
+        times longer, until the rest are backtested with all history data.
+
+        Slices are never shorter than min_days, so that strategy can be
+        initialized and trade in the first slice. Results of the last
+        round are returned as run_optimization.
+        """
+        settings = optimization_setting.generate_setting()
+        target_name = optimization_setting.target_name
+
+        if not settings:
+            self.output("优化参数组合为空，请检查")
+            return
+
+        if not target_name:
+            self.output("优化目标未设置，请检查")
+            return
+
+        self.load_data(streaming=False)
+
+        if not self.history_data:
+            self.output("历史数据为空，请检查")
+            return
+
+        batch = self.get_history_batch()
+
+        # Number of rounds is limited by both count of settings and
+        # length of the shortest slice
+        data_start = batch.get_datetime(0)
+        total_days = (batch.get_datetime(-1) - data_start) / timedelta(days=1)
+        rounds = 0
+        while (
+            eta ** (rounds + 1) <= len(settings)
+            and total_days / eta ** (rounds + 1) >= min_days
+        ):
+            rounds += 1
+
+        if cache:
+            base_key = self.get_optimization_key(batch)
+
+        if pool:
+            temp_pool = None
+        else:
+            temp_pool = pool = OptimizationPool()
+
+        history_folder = ""
+        new_results = {}
+
+        # Shared history data and temp pool are released even if any
+        # backtesting failed
+        try:
+            history_folder = pool.share_data(batch)
+
+            for ix in range(rounds, -1, -1):
+                # The last round runs with all history data, and shares cached
+                # results with run_optimization
+                if ix:
+                    days = total_days / eta ** ix
+                    history_range = (data_start, data_start + timedelta(days=days))
+                else:
+                    days = total_days
+                    history_range = None
+
+                self.output(
+                    f"逐次减半第{rounds - ix + 1}轮：参数组合{len(settings)}个，"
+                    f"回测天数{days:.0f}"
+                )
+
+                if cache:
+                    if history_range:
+                        keys = [get_cache_key(base_key, *history_range, setting) for setting in settings]
+                    else:
+                        keys = [get_cache_key(base_key, setting) for setting in settings]
+                    cached_results = cache.get_many(keys)
+                else:
+                    cached_results = {}
+
+                results = []
+                for jx, setting in enumerate(settings):
+                    if cached_results:
+                        statistics = cached_results.get(keys[jx], None)
+                        if statistics:
+                            results.append((str(setting), statistics[target_name], statistics))
+                            continue
+
+                    result = self.submit_optimization(
+                        pool, target_name, setting, history_folder, history_range
+                    )
+                    results.append(result)
+
+                result_values = []
+                for jx, result in enumerate(results):
+                    if not isinstance(result, tuple):
+                        result = result.get()
+                        if cache:
+                            new_results[keys[jx]] = result[2]
+                    result_values.append((settings[jx], result))
+
+                result_values.sort(reverse=True, key=lambda value: get_result_order(value[1]))
+
+                # Promote the best 1/eta settings to the next round
+                if ix:
+                    count = max(int(np.ceil(len(settings) / eta)), 1)
+                    settings = [setting for setting, _ in result_values[:count]]
+        finally:
+            if history_folder:
+                pool.release_data(history_folder)
+
+            if temp_pool:
+                temp_pool.close()
+
+        if new_results:
+            cache.set_many(new_results)
+
+        result_values = [result for _, result in result_values]
+
+        if output:
+            for value in result_values:
+                msg = f"参数：{value[0]}, 目标：{value[1]}"
+                self.output(msg)
+
+        return result_values
+
+    def submit_optimization(
+        self,
+        pool: OptimizationPool,
+        target_name: str,
+        setting: dict,
+        history_folder: str,
+        history_range: Tuple[datetime, datetime] = None
+    ) -> AsyncResult:
+        """
+        Submit backtesting of setting over shared history data to pool.
+        """
+        return pool.apply_async(optimize, (
+            target_name,
+            self.strategy_class,
+            setting,
+            self.vt_symbol,
+            self.interval,
+            self.start,
+            self.rate,
+            self.slippage,
+            self.size,
+            self.pricetick,
+            self.capital,
+            self.end,
+            self.mode,
+            self.inverse,
+            history_folder,
+            history_range
+        ))
+
+    def run_walk_forward(
+        self,
+        optimization_setting: OptimizationSetting,
+        train_days: int,
+        test_days: int,
+        step_days: int = 0,
+        output=True,
+        pool: OptimizationPool = None,
+        cache: OptimizationCache = None
+    ):
+        """
+        Walk forward optimization over rolling windows. Settings are
+        optimized with the first train_days of every window, and the best
+        one is backtested in the following test_days. Windows move forward
+        by step_days (test_days if 0).
+
+        History data is loaded only once, and tasks of all windows are run
+        in the same pool. Out-of-sample daily results of all windows are
+        stitched into daily_df for calculate_statistics and show_chart.
+        """
+        settings = optimization_setting.generate_setting()
+        target_name = optimization_setting.target_name
+
+        if not settings:
+            self.output("优化参数组合为空，请检查")
+            return
+
+        if not target_name:
+            self.output("优化目标未设置，请检查")
+            return
 
+        self.load_data(streaming=False)
+
+        if not self.history_data:
+            self.output("历史数据为空，请检查")
+            return
+
+        # Split rolling windows of (train start, test start, test end)
+        train_delta = timedelta(days=train_days)
+        test_delta = timedelta(days=test_days)
+        step_delta = timedelta(days=step_days or test_days)
+
+        windows = []
+        train_start = self.start
+
+        while train_start + train_delta < self.end:
+            test_start = train_start + train_delta
+            test_end = min(test_start + test_delta, self.end)
+            windows.append((train_start, test_start, test_end))
+            train_start += step_delta
+
+        if not windows:
+            self.output("历史数据区间短于样本内天数，请检查")
+            return
+
+        self.output(f"滚动窗口数量：{len(windows)}，参数组合数量：{len(settings)}")
+
+        batch = self.get_history_batch()
+
+        if cache:
+            base_key = self.get_optimization_key(batch)
+            keys = [
+                [get_cache_key(base_key, train_start, test_start, setting) for setting in settings]
+                for train_start, test_start, _ in windows
+            ]
+            cached_results = cache.get_many([key for window_keys in keys for key in window_keys])
+            self.output(f"优化结果缓存命中：{len(cached_results)}/{len(windows) * len(settings)}")
+        else:
+            keys = []
+            cached_results = {}
+
+        if pool:
+            temp_pool = None
+        else:
+            temp_pool = pool = OptimizationPool()
+
+        engine_parameters = self.get_engine_parameters()
+        history_folder = ""
+        new_results = {}
+        walk_results = []
+        test_dfs = []
+
+        # Shared history data and temp pool are released even if any
+        # backtesting failed
+        try:
+            history_folder = pool.share_data(batch)
+
+            # Submit in-sample tasks of all windows at once
+            window_results = []
+
+            for wx, (train_start, test_start, test_end) in enumerate(windows):
+                results = []
+
+                for ix, setting in enumerate(settings):
+                    if cached_results:
+                        statistics = cached_results.get(keys[wx][ix], None)
+                        if statistics:
+                            results.append((str(setting), statistics[target_name], statistics))
+                            continue
+
+                    result = self.submit_optimization(
+                        pool, target_name, setting, history_folder, (train_start, test_start)
+                    )
+                    results.append(result)
+
+                window_results.append(results)
+
+            # Backtest best setting of every window out of sample as soon as
+            # its in-sample results are finished
+            test_results = []
+
+            for wx, results in enumerate(window_results):
+                train_start, test_start, test_end = windows[wx]
+
+                result_values = []
+                for ix, result in enumerate(results):
+                    if not isinstance(result, tuple):
+                        result = result.get()
+                        if cache:
+                            new_results[keys[wx][ix]] = result[2]
+                    result_values.append(result)
+
+                best_ix = max(range(len(settings)), key=lambda ix: get_result_order(result_values[ix]))
+
+                if test_end >= self.end:
+                    history_end = None
+                else:
+                    history_end = test_end
+
+                test_result = pool.apply_async(backtest_out_of_sample, (
+                    self.strategy_class,
+                    settings[best_ix],
+                    engine_parameters,
+                    history_folder,
+                    (train_start, history_end),
+                    test_start.date()
+                ))
+                test_results.append((settings[best_ix], result_values[best_ix], test_result))
+
+            for wx, (setting, result, test_result) in enumerate(test_results):
+                train_start, test_start, test_end = windows[wx]
+
+                test_df = test_result.get()
+                test_dfs.append(test_df)
+
+                walk_result = {
+                    "train_start": train_start,
+                    "test_start": test_start,
+                    "test_end": test_end,
+                    "setting": setting,
+                    "target": result[1],
+                    "statistics": result[2],
+                    "test_net_pnl": test_df["net_pnl"].sum(),
+                }
+                walk_results.append(walk_result)
+
+                if output:
+                    self.output(
+                        f"窗口：{train_start.date()} ~ {test_start.date()} ~ {test_end.date()}，"
+                        f"参数：{setting}，样本内目标：{result[1]}，"
+                        f"样本外盈亏：{walk_result['test_net_pnl']:,.2f}"
+                    )
+        finally:
+            if history_folder:
+                pool.release_data(history_folder)
+
+            if temp_pool:
+                temp_pool.close()
+
+        if new_results:
+            cache.set_many(new_results)
+
+        # Stitch out-of-sample daily results, the earlier window is kept
+        # for overlapped days
+        df = concat(test_dfs)
+        self.daily_df = df[~df.index.duplicated(keep="first")]
+
+        return walk_results
+
+    def get_engine_parameters(self) -> dict:
+        """
+        Get keyword arguments of set_parameters to create the same engine
+        in other process.
+        """
+        return {
+            "vt_symbol": self.vt_symbol,
+            "interval": self.interval,
+            "start": self.start,
+            "rate": self.rate,
+            "slippage": self.slippage,
+            "size": self.size,
+            "pricetick": self.pricetick,
+            "capital": self.capital,
+            "end": self.end,
+            "mode": self.mode,
+            "inverse": self.inverse,
+            "risk_free": self.risk_free,
+        }
+
+    def get_history_batch(self) -> DataBatch:
+        """
+        Convert loaded history data into columnar batch.
+        """
+        if self.mode == BacktestingMode.BAR:
+            return BarBatch.from_list(self.history_data)
+        else:
+            return TickBatch.from_list(self.history_data)
+
+    def get_optimization_key(self, batch: DataBatch) -> str:
+        """
+        Get cache key of everything except strategy setting which
+        decides optimization result: strategy source code, contract,
+        cost parameters and history data.
+        """
+        return get_cache_key(
+            get_source_hash(self.strategy_class),
+            self.vt_symbol,
+            self.interval,
+            self.rate,
+            self.slippage,
+            self.size,
+            self.pricetick,
+            self.capital,
+            self.mode,
+            self.inverse,
+            get_data_hash(batch)
+        )
+
+    def run_ga_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        population_size=100,
+        ngen_size=30,
+        output=True,
+        cache: OptimizationCache = None,
+        pool: OptimizationPool = None,
+        seed: int = None
+    ):
+        """
+        New individuals of every generation are evaluated in parallel by
+        the pool (or distributed workers) with shared history data, and
+        a temporary pool is created if none is given. Values are saved for
+        later generations, and pass a cache to reuse results saved on disk
+        by previous runs.
+
+        Pass a seed to get the same result from every run.
+        """
         # Get optimization setting and target
         settings = optimization_setting.generate_setting_ga()
         target_name = optimization_setting.target_name
@@ -655,6 +1623,31 @@ class BacktestingEngine:
             self.output("优化目标未设置，请检查")
             return
 
+        self.load_data(streaming=False)
+
+        if not self.history_data:
+            self.output("历史数据为空，请检查")
+            return
+
+        batch = self.get_history_batch()
+
+        if cache:
+            base_key = self.get_optimization_key(batch)
+
+        if pool:
+            temp_pool = None
+        else:
+            temp_pool = pool = OptimizationPool()
+
+        # History data is shared right before running algorithm
+        history_folder = ""
+
+        # DEAP draws all random numbers from random module, so its state
+        # is replaced during optimization when seed is given
+        if seed is not None:
+            random_state = random.getstate()
+            random.seed(seed)
+
         # Define parameter generation function
         def generate_parameter():
             """"""
@@ -669,36 +1662,45 @@ class BacktestingEngine:
                     individual[i] = paramlist[i]
             return individual,
 
-        # Create ga object function
-        global ga_target_name
-        global ga_strategy_class
-        global ga_setting
-        global ga_vt_symbol
-        global ga_interval
-        global ga_start
-        global ga_rate
-        global ga_slippage
-        global ga_size
-        global ga_pricetick
-        global ga_capital
-        global ga_end
-        global ga_mode
-        global ga_inverse
-
-        ga_target_name = target_name
-        ga_strategy_class = self.strategy_class
-        ga_setting = settings[0]
-        ga_vt_symbol = self.vt_symbol
-        ga_interval = self.interval
-        ga_start = self.start
-        ga_rate = self.rate
-        ga_slippage = self.slippage
-        ga_size = self.size
-        ga_pricetick = self.pricetick
-        ga_capital = self.capital
-        ga_end = self.end
-        ga_mode = self.mode
-        ga_inverse = self.inverse
+        # Target values of all individuals evaluated
+        ga_values = {}
+
+        def map_individuals(func: Callable, individuals: list) -> list:
+            """
+            Evaluate all new individuals of generation in pool.
+            """
+            results = {}
+
+            for individual in individuals:
+                parameter_values = tuple(individual)
+                if parameter_values in ga_values or parameter_values in results:
+                    continue
+
+                setting = dict(parameter_values)
+
+                if cache:
+                    statistics = cache.get(get_cache_key(base_key, setting))
+                    if statistics:
+                        ga_values[parameter_values] = statistics[target_name]
+                        continue
+
+                results[parameter_values] = self.submit_optimization(
+                    pool, target_name, setting, history_folder
+                )
+
+            new_results = {}
+            for parameter_values, result in results.items():
+                _, target_value, statistics = result.get()
+                ga_values[parameter_values] = target_value
+
+                if cache:
+                    key = get_cache_key(base_key, dict(parameter_values))
+                    new_results[key] = statistics
+
+            if new_results:
+                cache.set_many(new_results)
+
+            return [(ga_values[tuple(individual)],) for individual in individuals]
 
         # Set up genetic algorithm
         toolbox = base.Toolbox()
@@ -706,9 +1708,12 @@ class BacktestingEngine:
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
         toolbox.register("mate", tools.cxTwoPoint)
         toolbox.register("mutate", mutate_individual, indpb=1)
-        toolbox.register("evaluate", ga_optimize)
         toolbox.register("select", tools.selNSGA2)
 
+        # Individuals are evaluated in pool by map, evaluate is never called
+        toolbox.register("evaluate", tuple)
+        toolbox.register("map", map_individuals)
+
         total_size = len(settings)
         pop_size = population_size                      # number of individuals in each generation
         lambda_ = pop_size                              # number of children to produce at each generation
@@ -728,10 +1733,6 @@ class BacktestingEngine:
         stats.register("min", np.min, axis=0)
         stats.register("max", np.max, axis=0)
 
-        # Multiprocessing is not supported yet.
-        # pool = multiprocessing.Pool(multiprocessing.cpu_count())
-        # toolbox.register("map", pool.map)
-
         # Run ga optimization
         self.output(f"参数优化空间：{total_size}")
         self.output(f"每代族群总数：{pop_size}")
@@ -742,17 +1743,31 @@ class BacktestingEngine:
 
         start = time()
 
-        algorithms.eaMuPlusLambda(
-            pop,
-            toolbox,
-            mu,
-            lambda_,
-            cxpb,
-            mutpb,
-            ngen,
-            stats,
-            halloffame=hof
-        )
+        # Shared history data, temp pool and random state are restored
+        # even if any backtesting failed
+        try:
+            history_folder = pool.share_data(batch)
+
+            algorithms.eaMuPlusLambda(
+                pop,
+                toolbox,
+                mu,
+                lambda_,
+                cxpb,
+                mutpb,
+                ngen,
+                stats,
+                halloffame=hof
+            )
+        finally:
+            if history_folder:
+                pool.release_data(history_folder)
+
+            if temp_pool:
+                temp_pool.close()
+
+            if seed is not None:
+                random.setstate(random_state)
 
         end = time()
         cost = int((end - start))
@@ -764,7 +1779,7 @@ class BacktestingEngine:
 
         for parameter_values in hof:
             setting = dict(parameter_values)
-            target_value = ga_optimize(parameter_values)[0]
+            target_value = ga_values[tuple(parameter_values)]
             results.append((setting, target_value, {}))
 
         return results
@@ -816,7 +1831,13 @@ class BacktestingEngine:
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for order in list(self.active_limit_orders.values()):
+        orders = self.get_crossed_limit_orders(long_cross_price, short_cross_price)
+
+        for order in orders:
+            # Skip order cancelled by strategy callback of previous one.
+            if order.vt_orderid not in self.active_limit_orders:
+                continue
+
             # Push order update with status "not traded" (pending).
             if order.status == Status.SUBMITTING:
                 order.status = Status.NOTTRADED
@@ -843,7 +1864,7 @@ class BacktestingEngine:
             order.status = Status.ALLTRADED
             self.strategy.on_order(order)
 
-            self.active_limit_orders.pop(order.vt_orderid)
+            self.remove_active_limit_order(order.vt_orderid)
 
             # Push trade update
             self.trade_count += 1
@@ -888,7 +1909,13 @@ class BacktestingEngine:
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for stop_order in list(self.active_stop_orders.values()):
+        stop_orders = self.get_crossed_stop_orders(long_cross_price, short_cross_price)
+
+        for stop_order in stop_orders:
+            # Skip stop order cancelled by strategy callback of previous one.
+            if stop_order.stop_orderid not in self.active_stop_orders:
+                continue
+
             # Check whether stop order can be triggered.
             long_cross = (
                 stop_order.direction == Direction.LONG
@@ -951,8 +1978,7 @@ class BacktestingEngine:
             stop_order.vt_orderids.append(order.vt_orderid)
             stop_order.status = StopOrderStatus.TRIGGERED
 
-            if stop_order.stop_orderid in self.active_stop_orders:
-                self.active_stop_orders.pop(stop_order.stop_orderid)
+            self.remove_active_stop_order(stop_order.stop_orderid)
 
             # Push update to strategy.
             self.strategy.on_stop_order(stop_order)
@@ -961,6 +1987,98 @@ class BacktestingEngine:
             self.strategy.pos += pos_change
             self.strategy.on_trade(trade)
 
+    def get_crossed_limit_orders(
+        self,
+        long_cross_price: float,
+        short_cross_price: float
+    ) -> List[OrderData]:
+        """
+        Get limit orders need to be processed in cross_limit_order, which
+        are orders just submitted and orders crossed by price, sorted in
+        order of submission.
+        """
+        orders = self.submitting_orders
+        self.submitting_orders = []
+
+        if long_cross_price > 0:
+            orders.extend(self.long_limit_index.get_above(long_cross_price))
+
+        if short_cross_price > 0:
+            orders.extend(self.short_limit_index.get_below(short_cross_price))
+
+        return self.sort_orders(orders)
+
+    def get_crossed_stop_orders(
+        self,
+        long_cross_price: float,
+        short_cross_price: float
+    ) -> List[StopOrder]:
+        """
+        Get stop orders triggered by price, sorted in order of submission.
+        """
+        stop_orders = self.long_stop_index.get_below(long_cross_price)
+        stop_orders.extend(self.short_stop_index.get_above(short_cross_price))
+        return self.sort_orders(stop_orders)
+
+    def sort_orders(self, orders: List[Tuple[int, Any]]) -> List[Any]:
+        """
+        Sort (seq, order) pairs by seq and remove duplicate orders.
+        """
+        orders.sort(key=itemgetter(0))
+
+        result = []
+        last_seq = 0
+        for seq, order in orders:
+            if seq != last_seq:
+                result.append(order)
+                last_seq = seq
+
+        return result
+
+    def add_active_limit_order(self, order: OrderData):
+        """"""
+        seq = self.limit_order_count
+        self.active_limit_orders[order.vt_orderid] = order
+        self.submitting_orders.append((seq, order))
+
+        if order.direction == Direction.LONG:
+            self.long_limit_index.add(order.vt_orderid, order.price, seq, order)
+        else:
+            self.short_limit_index.add(order.vt_orderid, order.price, seq, order)
+
+    def remove_active_limit_order(self, vt_orderid: str) -> OrderData:
+        """"""
+        order = self.active_limit_orders.pop(vt_orderid)
+
+        if order.direction == Direction.LONG:
+            self.long_limit_index.remove(vt_orderid)
+        else:
+            self.short_limit_index.remove(vt_orderid)
+
+        return order
+
+    def add_active_stop_order(self, stop_order: StopOrder):
+        """"""
+        seq = self.stop_order_count
+        self.active_stop_orders[stop_order.stop_orderid] = stop_order
+
+        if stop_order.direction == Direction.LONG:
+            index = self.long_stop_index
+        else:
+            index = self.short_stop_index
+        index.add(stop_order.stop_orderid, stop_order.price, seq, stop_order)
+
+    def remove_active_stop_order(self, stop_orderid: str) -> StopOrder:
+        """"""
+        stop_order = self.active_stop_orders.pop(stop_orderid)
+
+        if stop_order.direction == Direction.LONG:
+            self.long_stop_index.remove(stop_orderid)
+        else:
+            self.short_stop_index.remove(stop_orderid)
+
+        return stop_order
+
     def load_bar(
         self,
         vt_symbol: str,
@@ -1016,7 +2134,7 @@ class BacktestingEngine:
             strategy_name=self.strategy.strategy_name,
         )
 
-        self.active_stop_orders[stop_order.stop_orderid] = stop_order
+        self.add_active_stop_order(stop_order)
         self.stop_orders[stop_order.stop_orderid] = stop_order
 
         return stop_order.stop_orderid
@@ -1044,7 +2162,7 @@ class BacktestingEngine:
             datetime=self.datetime
         )
 
-        self.active_limit_orders[order.vt_orderid] = order
+        self.add_active_limit_order(order)
         self.limit_orders[order.vt_orderid] = order
 
         return order.vt_orderid
@@ -1062,7 +2180,7 @@ class BacktestingEngine:
         """"""
         if vt_orderid not in self.active_stop_orders:
             return
-        stop_order = self.active_stop_orders.pop(vt_orderid)
+        stop_order = self.remove_active_stop_order(vt_orderid)
 
         stop_order.status = StopOrderStatus.CANCELLED
         self.strategy.on_stop_order(stop_order)
@@ -1071,7 +2189,7 @@ class BacktestingEngine:
         """"""
         if vt_orderid not in self.active_limit_orders:
             return
-        order = self.active_limit_orders.pop(vt_orderid)
+        order = self.remove_active_limit_order(vt_orderid)
 
         order.status = Status.CANCELLED
         self.strategy.on_order(order)
@@ -1145,9 +2263,21 @@ class BacktestingEngine:
 
     def get_all_daily_results(self):
         """
-        Return all daily result data.
+        Return all daily result data, filled with values calculated
+        in daily_df by calculate_result.
         """
-        return list(self.daily_results.values())
+        daily_results = list(self.daily_results.values())
+
+        if self.daily_df is not None and daily_results:
+            columns = [c for c in self.daily_df.columns if c in daily_results[0].__dict__]
+            records = self.daily_df[columns].to_dict("records")
+
+            for d, values in zip(self.daily_df.index, records):
+                daily_result = self.daily_results.get(d, None)
+                if daily_result:
+                    daily_result.__dict__.update(values)
+
+        return daily_results
 
 
 class DailyResult:
@@ -1252,10 +2382,16 @@ def optimize(
     capital: int,
     end: datetime,
     mode: BacktestingMode,
-    inverse: bool
+    inverse: bool,
+    history_folder: str = "",
+    history_range: Tuple[datetime, datetime] = None
 ):
     """
     Function for running in multiprocessing.pool
+
+    History data is memory mapped from history_folder if given,
+    otherwise loaded from database. Set history_range to only use
+    shared data in [start, end).
     """
     engine = BacktestingEngine()
 
@@ -1274,7 +2410,14 @@ def optimize(
     )
 
     engine.add_strategy(strategy_class, setting)
-    engine.load_data()
+
+    if history_folder:
+        engine.history_data = load_shared_data(history_folder, mode)
+        if history_range:
+            engine.history_data = engine.history_data.slice_datetime(*history_range)
+    else:
+        engine.load_data()
+
     engine.run_backtesting()
     engine.calculate_result()
     statistics = engine.calculate_statistics(output=False)
@@ -1283,33 +2426,57 @@ def optimize(
     return (str(setting), target_value, statistics)
 
 
-@lru_cache(maxsize=1000000)
-def _ga_optimize(parameter_values: tuple):
-    """"""
-    setting = dict(parameter_values)
-
-    result = optimize(
-        ga_target_name,
-        ga_strategy_class,
-        setting,
-        ga_vt_symbol,
-        ga_interval,
-        ga_start,
-        ga_rate,
-        ga_slippage,
-        ga_size,
-        ga_pricetick,
-        ga_capital,
-        ga_end,
-        ga_mode,
-        ga_inverse
-    )
-    return (result[1],)
+def get_result_order(result: tuple) -> float:
+    """
+    Get sort key of optimization result, with nan target ordered last.
+    """
+    if result[1] != result[1]:
+        return -inf
+    return result[1]
 
 
-def ga_optimize(parameter_values: list):
-    """"""
-    return _ga_optimize(tuple(parameter_values))
+def backtest_out_of_sample(
+    strategy_class: CtaTemplate,
+    setting: dict,
+    engine_parameters: dict,
+    history_folder: str,
+    history_range: Tuple[datetime, datetime],
+    test_start: date
+) -> DataFrame:
+    """
+    Function for running out-of-sample backtesting of walk forward in
+    multiprocessing.pool
+
+    Strategy runs through both in-sample and out-of-sample period, so
+    that it is initialized with the same data. Only daily result from
+    test_start is returned, without trades column.
+    """
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+
+    engine.set_parameters(**engine_parameters)
+    engine.add_strategy(strategy_class, setting)
+
+    history_data = load_shared_data(history_folder, engine.mode)
+    engine.history_data = history_data.slice_datetime(*history_range)
+
+    engine.run_backtesting()
+
+    if engine.trades:
+        df = engine.calculate_result().drop(columns="trades")
+    else:
+        # Days without any trade still count in stitched daily result
+        dates = list(engine.daily_results.keys())
+        close_prices = np.array(
+            [daily_result.close_price for daily_result in engine.daily_results.values()],
+            dtype=np.float64
+        )
+        empty = np.array([])
+        df = engine.calculate_daily_df(
+            dates, close_prices, empty.astype(np.int64), empty, empty, empty.astype(bool)
+        )
+
+    return df[df.index >= test_start]
 
 
 @lru_cache(maxsize=999)
@@ -1318,38 +2485,49 @@ def load_bar_data(
     exchange: Exchange,
     interval: Interval,
     start: datetime,
-    end: datetime
+    end: datetime,
+    slotted: bool = False
 ):
     """"""
-    return database_manager.load_bar_data(
+    data = database_manager.load_bar_data(
         symbol, exchange, interval, start, end
     )
 
+    if slotted:
+        data = [to_slotted(bar) for bar in data]
+    return data
+
 
 @lru_cache(maxsize=999)
 def load_tick_data(
     symbol: str,
     exchange: Exchange,
     start: datetime,
-    end: datetime
+    end: datetime,
+    slotted: bool = False
 ):
     """"""
-    return database_manager.load_tick_data(
+    data = database_manager.load_tick_data(
         symbol, exchange, start, end
     )
 
+    if slotted:
+        data = [to_slotted(tick) for tick in data]
+    return data
+
+
+@lru_cache(maxsize=4)
+def load_shared_data(folder: str, mode: BacktestingMode):
+    """
+    Memory map history data shared by run_optimization, only once in
+    every process. Data objects are created on demand when iterated.
+    """
+    folder = resolve_shared_folder(folder)
+
+    if mode == BacktestingMode.BAR:
+        return BarBatch.load(folder)
+    else:
+        return TickBatch.load(folder)
+
 
-# GA related global value
-ga_end = None
-ga_mode = None
-ga_target_name = None
-ga_strategy_class = None
-ga_setting = None
-ga_vt_symbol = None
-ga_interval = None
-ga_start = None
-ga_rate = None
-ga_slippage = None
-ga_size = None
-ga_pricetick = None
-ga_capital = None
\ No newline at end of file
+shared_data_loaders.append(load_shared_data)
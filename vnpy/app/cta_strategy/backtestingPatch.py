@@ -29,12 +29,14 @@ from .base import (
 )
 from .template import CtaTemplate
 
-from itertools import groupby
+from bisect import bisect_left
+from collections import deque
+from itertools import accumulate, groupby
 import traceback
-import copy
 import numpy as np
 
 from .backtesting import *
+from .backtesting import load_shared_data
 
 sns.set_style("whitegrid")
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
@@ -70,6 +72,8 @@ class BacktestingEnginePatch(BacktestingEngine):
         self.limit_orders.clear()
         self.active_limit_orders.clear()
 
+        self.clear_order_index()
+
         self.trade_count = 0
         self.trades.clear()
 
@@ -80,214 +84,19 @@ class BacktestingEnginePatch(BacktestingEngine):
     # 结果计算相关
     #------------------------------------------------
     #----------------------------------------------------------------------
-    def calculateBacktestingResult(self):
-        return self.calculateBacktestingResultImp(self.trades.values())
+    def calculateBacktestingResult(self, lifo=False):
+        return self.calculateBacktestingResultImp(self.trades.values(), lifo)
 
     #----------------------------------------------------------------------
-    def calculateBacktestingResultImp(self, tradearray):
+    def calculateBacktestingResultImp(self, tradearray, lifo=False):
         """
         计算回测结果
+
+        lifo为True时，平仓成交优先与最近的开仓成交配对，否则与最早的配对
         """
         # 首先基于回测后的成交记录，计算每笔交易的盈亏
-        resultList = []  # 交易结果列表
-
-        longTradeList = []  # 多头交易列表
-        shortTradeList = []  # 空头交易列表
-
-        longTrade = []  # 未平仓的多头交易
-        shortTrade = []  # 未平仓的空头交易
-
-        tradeTimeList = []  # 每笔成交时间戳
-        posList = [0]  # 每笔成交后的持仓情况
-
-        # 对每个策略实例进行独立核算
-        for key, items in groupby(
-                sorted(tradearray, key=lambda t: t.name), lambda t: t.name):
-
-            tradeCount = len(resultList)
-            for trade in items:
-                # 复制成交对象，因为下面的开平仓交易配对涉及到对成交数量的修改
-                # 若不进行复制直接操作，则计算完后所有成交的数量会变成0
-                trade = copy.deepcopy(trade)
-
-                #无交易量，不计算
-                if trade.volume == 0:
-                    pass
-                # 多头交易
-                elif trade.direction == Direction.LONG:
-                    # 如果尚无空头交易
-                    if not shortTrade:
-                        longTrade.append(trade)
-                    # 当前多头交易为平空
-                    else:
-                        while True:
-
-                            # #多策略混合
-                            # shortTradeIndex = 0
-                            # entryTrade = None
-                            # #找到策略名相对应的交易
-                            # for index,val in enumerate(shortTrade):
-                            #     if val.name == trade.name:
-                            #         shortTradeIndex = index
-                            #         entryTrade = val
-                            #         break
-                            #     else:
-                            #         pass
-
-                            entryTrade = shortTrade[0]
-                            if not entryTrade:
-                                longTrade.append(trade)
-                                break
-                            else:
-                                exitTrade = trade
-
-                                # 清算开平仓交易
-                                closedVolume = min(exitTrade.volume,
-                                                   entryTrade.volume)
-                                result = TradingResult(
-                                    entryTrade.price, entryTrade.datetime,
-                                    exitTrade.price, exitTrade.datetime,
-                                    -closedVolume, self.rate, self.slippage,
-                                    self.size, key)
-                                resultList.append(result)
-                                shortTradeList.append(result.pnl)  # 加入多头交易
-
-                                #posList.extend([-max(exitTrade.volume, entryTrade.volume),0])
-                                #计算当前仓位
-                                # pos = 0
-                                # if longTrade:
-                                #     for t in longTrade:
-                                #         pos += t.volume
-                                # if shortTrade:
-                                #     for t in shortTrade:
-                                #         pos -= t.volume
-                                # posList.extend([pos,0])
-                                # tradeTimeList.extend([result.entryDt, result.exitDt])
-
-                                # 计算未清算部分
-                                entryTrade.volume -= closedVolume
-                                exitTrade.volume -= closedVolume
-
-                                # 如果开仓交易已经全部清算，则从列表中移除
-                                if not entryTrade.volume:
-                                    shortTrade.pop(0)
-
-                                # 如果平仓交易已经全部清算，则退出循环
-                                if not exitTrade.volume:
-                                    break
-
-                                # 如果平仓交易未全部清算，
-                                if exitTrade.volume:
-                                    # 且开仓交易已经全部清算完，则平仓交易剩余的部分
-                                    # 等于新的反向开仓交易，添加到队列中
-                                    if not shortTrade:
-                                        longTrade.append(exitTrade)
-                                        break
-                                    # 如果开仓交易还有剩余，则进入下一轮循环
-                                    else:
-                                        pass
-
-                # 空头交易
-                else:
-                    # 如果尚无多头交易
-                    if not longTrade:
-                        shortTrade.append(trade)
-                    # 当前空头交易为平多
-                    else:
-                        while True:
-
-                            # #多策略混合
-                            # longTradeIndex = 0
-                            # entryTrade = None
-                            # #找到策略名相对应的交易
-                            # for index,val in enumerate(longTrade):
-                            #     if val.name == trade.name:
-                            #         longTradeIndex = index
-                            #         entryTrade = val
-                            #         break
-                            #     else:
-                            #         pass
-
-                            entryTrade = longTrade[0]
-                            if not entryTrade:
-                                shortTrade.append(trade)
-                                break
-                            else:
-                                exitTrade = trade
-
-                                # 清算开平仓交易
-                                closedVolume = min(exitTrade.volume,
-                                                   entryTrade.volume)
-                                result = TradingResult(
-                                    entryTrade.price, entryTrade.datetime,
-                                    exitTrade.price, exitTrade.datetime,
-                                    closedVolume, self.rate, self.slippage,
-                                    self.size, key)
-                                resultList.append(result)
-                                longTradeList.append(result.pnl)  # 加入空头交易
-                                #计算当前仓位
-                                # pos = 0
-                                # if longTrade:
-                                #     for t in longTrade:
-                                #         pos += t.volume
-                                # if shortTrade:
-                                #     for t in shortTrade:
-                                #         pos -= t.volume
-                                # posList.extend([pos,0])
-                                #posList.extend([max(exitTrade.volume, entryTrade.volume),0])
-                                # tradeTimeList.extend([result.entryDt, result.exitDt])
-
-                                # 计算未清算部分
-                                entryTrade.volume -= closedVolume
-                                exitTrade.volume -= closedVolume
-
-                                # 如果开仓交易已经全部清算，则从列表中移除
-                                if not entryTrade.volume:
-                                    longTrade.pop(0)
-
-                                # 如果平仓交易已经全部清算，则退出循环
-                                if not exitTrade.volume:
-                                    break
-
-                                # 如果平仓交易未全部清算，
-                                if exitTrade.volume:
-                                    # 且开仓交易已经全部清算完，则平仓交易剩余的部分
-                                    # 等于新的反向开仓交易，添加到队列中
-                                    if not longTrade:
-                                        shortTrade.append(exitTrade)
-                                        break
-                                    # 如果开仓交易还有剩余，则进入下一轮循环
-                                    else:
-                                        pass
-
-            # 到最后交易日尚未平仓的交易，则以最后价格平仓
-            if self.mode == BacktestingMode.BAR:
-                endPrice = self.bar.close_price
-            else:
-                endPrice = self.tick.last_price
-
-            for trade in longTrade:
-                result = TradingResult(trade.price, trade.datetime, endPrice,
-                                       self.datetime, trade.volume, self.rate,
-                                       self.slippage, self.size, key)
-                resultList.append(result)
-                longTradeList.append(result.pnl)  # 加入空头交易
-
-            for trade in shortTrade:
-                result = TradingResult(trade.price, trade.datetime, endPrice,
-                                       self.datetime, -trade.volume, self.rate,
-                                       self.slippage, self.size, key)
-                resultList.append(result)
-                shortTradeList.append(result.pnl)  # 加入多头交易
-                
-
-            #clear
-            longTrade = []  # 未平仓的多头交易
-            shortTrade = []  # 未平仓的空头交易
-
-            tc = len(resultList) - tradeCount
-            if tc:
-                self.output(u'%10s次交易\t%s' % (tc, key))
+        resultList, longTradeList, shortTradeList = self.matchTradingResults(
+            tradearray, lifo)
 
         # 检查是否有交易
         if not resultList:
@@ -316,23 +125,7 @@ class BacktestingEnginePatch(BacktestingEngine):
 
         # 按时间排序
         resultList = sorted(resultList, key=lambda r: r.entryDt)
-        resultList1 = sorted(resultList, key=lambda r: r.exitDt)
-        tradeTimeList = []
-        posList = []
-        posIn = 0
-        for result in resultList:
-            tradeTimeList.extend([result.entryDt, result.exitDt])
-
-            # 之前进场的+ volume, 之前出场的 - volume
-            posIn += result.volume
-            posOut = 0
-            for r in resultList1:
-                if r.exitDt < result.entryDt:
-                    posOut += r.volume
-                else:
-                    break
-
-            posList.extend([posIn - posOut, 0])
+        tradeTimeList, posList = self.calculatePosList(resultList)
 
         # 然后基于每笔交易的结果，我们可以计算具体的盈亏曲线和最大回撤等
         capital = 0  # 资金
@@ -465,6 +258,135 @@ class BacktestingEnginePatch(BacktestingEngine):
 
         return d
 
+    #----------------------------------------------------------------------
+    def matchTradingResults(self, tradearray, lifo=False):
+        """
+        开平仓交易配对，返回交易结果列表和多空交易盈亏列表
+
+        未平仓的成交以[价格, 时间, 未平数量]的列表记录在队列中，平仓时从
+        队列头部（FIFO）或尾部（LIFO）取出配对，无需复制成交对象
+        """
+        resultList = []  # 交易结果列表
+
+        longTradeList = []  # 多头交易列表
+        shortTradeList = []  # 空头交易列表
+
+        # 对每个策略实例进行独立核算
+        for key, items in groupby(
+                sorted(tradearray, key=lambda t: t.name), lambda t: t.name):
+
+            tradeCount = len(resultList)
+
+            openTrade = deque()  # 未平仓的交易，同一时刻只有一个方向
+            openLong = True  # 未平仓交易是否为多头
+
+            for trade in items:
+                volume = trade.volume
+
+                #无交易量，不计算
+                if not volume:
+                    continue
+
+                isLong = trade.direction == Direction.LONG
+
+                # 同向交易或尚无持仓，则为开仓
+                if not openTrade or isLong == openLong:
+                    openTrade.append([trade.price, trade.datetime, volume])
+                    openLong = isLong
+                    continue
+
+                # 平仓交易，逐笔清算开平仓交易
+                while volume and openTrade:
+                    if lifo:
+                        entryTrade = openTrade[-1]
+                    else:
+                        entryTrade = openTrade[0]
+
+                    closedVolume = min(volume, entryTrade[2])
+                    if openLong:
+                        resultVolume = closedVolume
+                    else:
+                        resultVolume = -closedVolume
+
+                    result = TradingResult(
+                        entryTrade[0], entryTrade[1],
+                        trade.price, trade.datetime,
+                        resultVolume, self.rate, self.slippage,
+                        self.size, key)
+                    resultList.append(result)
+
+                    if openLong:
+                        longTradeList.append(result.pnl)
+                    else:
+                        shortTradeList.append(result.pnl)
+
+                    # 计算未清算部分
+                    entryTrade[2] -= closedVolume
+                    volume -= closedVolume
+
+                    # 如果开仓交易已经全部清算，则从队列中移除
+                    if not entryTrade[2]:
+                        if lifo:
+                            openTrade.pop()
+                        else:
+                            openTrade.popleft()
+
+                # 平仓交易剩余的部分等于新的反向开仓交易
+                if volume:
+                    openTrade.append([trade.price, trade.datetime, volume])
+                    openLong = isLong
+
+            # 到最后交易日尚未平仓的交易，则以最后价格平仓
+            if self.mode == BacktestingMode.BAR:
+                endPrice = self.bar.close_price
+            else:
+                endPrice = self.tick.last_price
+
+            for price, dt, volume in openTrade:
+                if openLong:
+                    result = TradingResult(price, dt, endPrice,
+                                           self.datetime, volume, self.rate,
+                                           self.slippage, self.size, key)
+                    longTradeList.append(result.pnl)
+                else:
+                    result = TradingResult(price, dt, endPrice,
+                                           self.datetime, -volume, self.rate,
+                                           self.slippage, self.size, key)
+                    shortTradeList.append(result.pnl)
+                resultList.append(result)
+
+            tc = len(resultList) - tradeCount
+            if tc:
+                self.output(u'%10s次交易\t%s' % (tc, key))
+
+        return resultList, longTradeList, shortTradeList
+
+    #----------------------------------------------------------------------
+    def calculatePosList(self, resultList):
+        """
+        计算按开仓时间排序的交易结果对应的成交时间和持仓序列
+
+        开仓前已平仓的数量通过平仓时间的二分查找和累计数量得到
+        """
+        exitList = sorted(resultList, key=lambda r: r.exitDt)
+        exitDtList = [r.exitDt for r in exitList]
+        exitPosList = [0]
+        exitPosList.extend(accumulate(r.volume for r in exitList))
+
+        tradeTimeList = []
+        posList = []
+        posIn = 0
+        for result in resultList:
+            tradeTimeList.extend([result.entryDt, result.exitDt])
+
+            # 之前进场的+ volume, 之前出场的 - volume
+            posIn += result.volume
+            posOut = exitPosList[bisect_left(exitDtList, result.entryDt)]
+
+            posList.extend([posIn - posOut, 0])
+
+        return tradeTimeList, posList
+
     #----------------------------------------------------------------------
     def showBacktestingResult(self):
         # 对每个策略实例进行独立核算
@@ -656,7 +578,12 @@ class BacktestingEnginePatch(BacktestingEngine):
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for order in list(self.active_limit_orders.values()):
+        orders = self.get_crossed_limit_orders(long_cross_price, short_cross_price)
+
+        for order in orders:
+            # Skip order cancelled by strategy callback of previous one.
+            if order.vt_orderid not in self.active_limit_orders:
+                continue
 
             #增加多策略测试
             strategy = self.orderStrategyDict[order.vt_orderid]
@@ -687,7 +614,7 @@ class BacktestingEnginePatch(BacktestingEngine):
             order.status = Status.ALLTRADED
             strategy.on_order(order)
 
-            self.active_limit_orders.pop(order.vt_orderid)
+            self.remove_active_limit_order(order.vt_orderid)
 
             # Push trade update
             self.trade_count += 1
@@ -708,10 +635,9 @@ class BacktestingEnginePatch(BacktestingEngine):
                 offset=order.offset,
                 price=trade_price,
                 volume=order.volume,
-                time=self.datetime.strftime("%H:%M:%S"),
+                datetime=self.datetime,
                 gateway_name=self.gateway_name,
             )
-            trade.datetime = self.datetime
             #add trade strategy name, 以便于区别多策略混合效果
             trade.name = strategy.strategy_name
 
@@ -735,7 +661,12 @@ class BacktestingEnginePatch(BacktestingEngine):
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for stop_order in list(self.active_stop_orders.values()):
+        stop_orders = self.get_crossed_stop_orders(long_cross_price, short_cross_price)
+
+        for stop_order in stop_orders:
+            # Skip stop order cancelled by strategy callback of previous one.
+            if stop_order.stop_orderid not in self.active_stop_orders:
+                continue
 
             strategy = self.orderStrategyDict[stop_order.stop_orderid]
 
@@ -790,10 +721,9 @@ class BacktestingEnginePatch(BacktestingEngine):
                 offset=order.offset,
                 price=trade_price,
                 volume=order.volume,
-                time=self.datetime.strftime("%H:%M:%S"),
+                datetime=self.datetime,
                 gateway_name=self.gateway_name,
             )
-            trade.datetime = self.datetime
 
             #add trade strategy name, 以便于区别多策略混合效果
             trade.name = strategy.strategy_name
@@ -804,8 +734,7 @@ class BacktestingEnginePatch(BacktestingEngine):
             stop_order.vt_orderids.append(order.vt_orderid)
             stop_order.status = StopOrderStatus.TRIGGERED
 
-            if stop_order.stop_orderid in self.active_stop_orders:
-                self.active_stop_orders.pop(stop_order.stop_orderid)
+            self.remove_active_stop_order(stop_order.stop_orderid)
 
             # Push update to strategy.
             strategy.on_stop_order(stop_order)
@@ -852,7 +781,7 @@ class BacktestingEnginePatch(BacktestingEngine):
         if strategy != self.orderStrategyDict[vt_orderid]:
             return
 
-        stop_order = self.active_stop_orders.pop(vt_orderid)
+        stop_order = self.remove_active_stop_order(vt_orderid)
 
         stop_order.status = StopOrderStatus.CANCELLED
         strategy.on_stop_order(stop_order)
@@ -866,7 +795,7 @@ class BacktestingEnginePatch(BacktestingEngine):
         if strategy != self.orderStrategyDict[vt_orderid]:
             return
 
-        order = self.active_limit_orders.pop(vt_orderid)
+        order = self.remove_active_limit_order(vt_orderid)
 
         order.status = Status.CANCELLED
         strategy.on_order(order)
@@ -902,3 +831,40 @@ def formatNumber(n):
     rn = round(n, 2)  # 保留两位小数
     return format(rn, ',')  # 加上千分符
 
+
+#----------------------------------------------------------------------
+def backtestingSharedData(strategy_class, setting, engine_parameters, history_folder):
+    """
+    多进程批量回测：从history_folder内存映射共享的历史数据，避免每个组合重复加载
+
+    返回统计指标与逐笔交易结果汇总，用于合并到结果表
+    """
+    # 新引擎对应独立的共享K线注册表，每个任务都从全新的ArrayManager开始
+    engine = BacktestingEnginePatch()
+
+    # 不打印回测过程，但保留输出用于报告回放终止的原因
+    messages = []
+    engine.output = messages.append
+
+    engine.set_parameters(**engine_parameters)
+    engine.add_strategy(strategy_class, setting)
+
+    engine.history_data = load_shared_data(history_folder, engine.mode)
+
+    # 回放异常终止时抛出，避免不完整的统计结果被当作正常结果
+    if not engine.run_backtesting():
+        raise RuntimeError("\n".join(messages[-2:]))
+
+    engine.calculate_result()
+    statistics = engine.calculate_statistics(output=False)
+
+    # 逐笔交易盈亏，与统计指标中的初始资金capital区分
+    d = engine.calculateBacktestingResult()
+    statistics['resultPnl'] = d['capital']
+    for key in ['totalResult', 'winningRate', 'averageWinning',
+                'averageLosing', 'profitLossRatio', 'maxDrawdown']:
+        statistics[key] = d[key]
+    statistics['longTradeCount'] = d.get('longTradeCount', 0)
+    statistics['shortTradeCount'] = d.get('shortTradeCount', 0)
+
+    return statistics
@@ -13,16 +13,92 @@ from vnpy.app.cta_strategy import ArrayManager
 # from zigzag import peak_valley_pivots, max_drawdown, compute_segment_returns, pivots_to_modes
 # from vnpy.trader.app.ctaStrategy.VPINAnalysis import VPINAnalysisImp
 from copy import copy
+from functools import wraps
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+# 共享K线序列，按引擎隔离，避免回测异常终止时泄漏到下次回测
+# key: cta_engine, value: {(vt_symbol, kLineCycle, KLineSeconds, size): am}
+sharedArrayManagers = WeakKeyDictionary()
+sharedLock = Lock()
+
+
+def getSharedArrayManager(cta_engine, vt_symbol, kLineCycle, KLineSeconds, size):
+    """获取同引擎同合约同周期共享的K线序列，引用计数加一"""
+    key = (vt_symbol, kLineCycle, KLineSeconds, size)
+    with sharedLock:
+        registry = sharedArrayManagers.setdefault(cta_engine, {})
+        am = registry.get(key, None)
+        if not am:
+            am = SharedArrayManager(size)
+            am.key = key
+            am.registry = registry
+            registry[key] = am
+        am.refCount += 1
+    return am
+
+
+def releaseSharedArrayManager(am):
+    """释放共享K线序列，引用计数为零时从注册表移除"""
+    if not isinstance(am, SharedArrayManager) or not am.key:
+        return
+
+    with sharedLock:
+        am.refCount -= 1
+        if am.refCount <= 0 and am.registry.get(am.key, None) is am:
+            am.registry.pop(am.key)
+
+
+def cached(func):
+    """指标结果按K线缓存，同一根K线上相同参数的计算只执行一次"""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        cache = self.cache
+        if key in cache:
+            return cache[key]
+
+        result = func(self, *args, **kwargs)
+        cache[key] = result
+        return result
+
+    return wrapper
 
-def getSharedArrayManager(vt_symbol,kLineCycle,KLineSeconds,size):
-    return SharedArrayManager(size)
 
 ########################################################################
 class SharedArrayManager(ArrayManager):
     """
     shared array manager
+
+    同合约同周期的多个策略共享一个实例：每根K线只写入一次，
+    指标结果按K线缓存，共享返回的数组不要原地修改。
     """
+
+    #----------------------------------------------------------------------
+    def __init__(self, size=100):
+        """"""
+        super().__init__(size)
+
+        self.key = None
+        self.registry = None
+        self.refCount = 0
+        self.datetime = None
+        self.cache = {}
+
+    #----------------------------------------------------------------------
+    def update_bar(self, bar):
+        """更新K线，已由其他策略写入的K线直接跳过"""
+        if self.datetime and bar.datetime and bar.datetime <= self.datetime:
+            return
+
+        self.datetime = bar.datetime
+        self.cache.clear()
+        super().update_bar(bar)
+
     #----------------------------------------------------------------------
+    @cached
     def hhv(self, n, array=False):
         """移动最高"""
         result = talib.MAX(self.high, n)
@@ -31,6 +107,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def llv(self, n, array=False):
         """移动最低"""
         result = talib.MAX(self.high, n)
@@ -39,6 +116,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def kdj(self, n, s, f, array=False):
         """KDJ指标"""
         c   = self.close
@@ -55,6 +133,7 @@ class SharedArrayManager(ArrayManager):
 
     #----------------------------------------------------------------------
     
+    @cached
     def sma(self, n, array=False):
         """简单均线"""
         result = talib.SMA(self.close, n)
@@ -64,6 +143,7 @@ class SharedArrayManager(ArrayManager):
 
     #----------------------------------------------------------------------
     
+    @cached
     def std(self, n, array=False):
         """标准差"""
         result = talib.STDDEV(self.close, n)
@@ -72,6 +152,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def cci(self, n, array=False):
         """CCI指标"""
         result = talib.CCI(self.high, self.low, self.close, n)
@@ -80,6 +161,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def kd(self, nf=9, ns=3, array=False):
         """KD指标"""
         slowk, slowd = talib.STOCH(self.high, self.low, self.close,
@@ -93,6 +175,7 @@ class SharedArrayManager(ArrayManager):
         return slowk[-1], slowd[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def vol(self, n, array=False):
         """波动率指标"""
         logrtn = talib.LN(self.high/self.low)
@@ -104,6 +187,7 @@ class SharedArrayManager(ArrayManager):
 
     #----------------------------------------------------------------------
     
+    @cached
     def atr(self, n, array=False):
         """ATR指标"""
         result = talib.ATR(self.high, self.low, self.close, n)
@@ -112,6 +196,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def cmi(self, n, array=False):
         """CMI指标"""
         hhm = max(self.high[-n:])
@@ -121,6 +206,7 @@ class SharedArrayManager(ArrayManager):
         return result
 
     #----------------------------------------------------------------------
+    @cached
     def rsi(self, n, array=False):
         """RSI指标"""
         result = talib.RSI(self.close, n)
@@ -129,6 +215,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def macd(self, fastPeriod, slowPeriod, signalPeriod, array=False):
         """MACD指标"""
         macd, signal, hist = talib.MACD(self.close, fastPeriod,
@@ -138,6 +225,7 @@ class SharedArrayManager(ArrayManager):
         return macd[-1], signal[-1], hist[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def adx(self, n, array=False):
         """ADX指标"""
         result = talib.ADX(self.high, self.low, self.close, n)
@@ -146,6 +234,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def peak(self, lookahead=100, delta=5, array=False):
         """峰值"""
         from .peakdetect import peakdetect
@@ -156,6 +245,7 @@ class SharedArrayManager(ArrayManager):
         return maxP,minP
 
     #----------------------------------------------------------------------
+    @cached
     def boll(self, n, dev, array=False):
         """布林通道"""
         mid = self.sma(n, array)
@@ -167,6 +257,7 @@ class SharedArrayManager(ArrayManager):
         return up, down
 
     #----------------------------------------------------------------------
+    @cached
     def keltner(self, n, dev, array=False):
         """肯特纳通道"""
         mid = self.sma(n, array)
@@ -178,6 +269,7 @@ class SharedArrayManager(ArrayManager):
         return up, down
 
     #----------------------------------------------------------------------
+    @cached
     def donchian(self, n, array=False):
         """唐奇安通道"""
         up = talib.MAX(self.high, n)
@@ -187,6 +279,7 @@ class SharedArrayManager(ArrayManager):
             return up, down
         return up[-1], down[-1]
 
+    @cached
     def aroon(self, n, array=False):
         """
         Aroon indicator.
@@ -198,6 +291,7 @@ class SharedArrayManager(ArrayManager):
         return aroon_up[-1], aroon_down[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def channelIndicator(self):
         """通道指数 atr/std，1 通道水平波动 <0.5 趋势明显 （0.5-0.6) 突破临界区"""
         window = self.size//2
@@ -233,6 +327,7 @@ class SharedArrayManager(ArrayManager):
     如果Hurst指数的值为H <0.5，则表示存在平均回归，当H> 0.5时，存在趋势趋势
     有
     """
+    @cached
     def calcHurstExponent(self,lags_count=100):
         df = self.close
         lags = range(2, lags_count)
@@ -258,6 +353,7 @@ class SharedArrayManager(ArrayManager):
     """
 
     
+    @cached
     def calcHalfLife(self):
         df = self.close
         half_life = 0
@@ -277,6 +373,7 @@ class SharedArrayManager(ArrayManager):
         return success, half_life
 
     #----------------------------------------------------------------------
+    @cached
     def sar(self, array=False):
         result = talib.SAR(self.highArray, self.lowArray)
         if array:
@@ -284,6 +381,7 @@ class SharedArrayManager(ArrayManager):
         return result[-1]
 
     #----------------------------------------------------------------------
+    @cached
     def obv(self, array=False):
         result = talib.OBV(self.closeArray, self.diffVolume)
         if array:
@@ -292,6 +390,7 @@ class SharedArrayManager(ArrayManager):
 
     #----------------------------------------------------------------------
     
+    @cached
     def atrIsUp(self, n = 10, array=False):
         """ATR指标上升"""
         # ATR数值上穿其移动平均线，说明行情短期内波动加大
@@ -343,6 +442,7 @@ class SharedArrayManager(ArrayManager):
 
     #----------------------------------------------------------------------
     
+    @cached
     def getATRSlope(self,volatilityWindow = 15):
         """取ATR斜率"""
         volatilityArray = talib.ATR(self.high, self.low, self.close,
@@ -390,6 +490,7 @@ class SharedArrayManager(ArrayManager):
         return vpinRelative,vpinCDF,vpinCDFPre
 
     #--------------------------------------------------------------------------
+    @cached
     def getTrend(self,fastWindow = 6, slowWindow = 30):
         trendFastArray = talib.LINEARREG_SLOPE(self.close, fastWindow)
         trendSlowArray = talib.LINEARREG_SLOPE(self.close, slowWindow)
@@ -4,14 +4,13 @@
 添加了一些基本的策略属性，变量。不做下单逻辑
 '''
 
-from .SharedArrayManager import getSharedArrayManager
+from .SharedArrayManager import getSharedArrayManager, releaseSharedArrayManager
 # from vnpy.trader.vtFunction import timeit
 
 from vnpy.app.cta_strategy import (
     BarData,
     TickData,
     BarGenerator,
-    ArrayManager,
 )
 
 from .ctaTemplate_5 import CtaTemplate_5
@@ -58,14 +57,27 @@ class CtaTemplate_6(CtaTemplate_5):
 
         self.bm.xsec = self.KLineSeconds  #按指定X秒生成K线
 
-        self.am = ArrayManager(size=self.arraySize)
-        # self.am = getSharedArrayManager(self.vt_symbol, self.kLineCycle,
-        #                                 self.KLineSeconds, self.arraySize)
+        # 同合约同周期的策略共享K线序列和指标计算
+        self.sharedArrayManagers = []
+        self.am = self.acquireArrayManager(self.kLineCycle, self.arraySize)
 
         self.bm60 = BarGenerator(self.on_bar,60,self.on60MinBar)
-        self.am60 = ArrayManager(size=100)
-        # self.am60 = getSharedArrayManager(self.vt_symbol, 60,
-        #                                 self.KLineSeconds, 100)
+        self.am60 = self.acquireArrayManager(60, 100)
+
+    #----------------------------------------------------------------------
+    def acquireArrayManager(self, kLineCycle, size):
+        """获取共享K线序列，记录下来在停止时释放"""
+        am = getSharedArrayManager(self.cta_engine, self.vt_symbol, kLineCycle,
+                                   self.KLineSeconds, size)
+        self.sharedArrayManagers.append(am)
+        return am
+
+    #----------------------------------------------------------------------
+    def releaseArrayManagers(self):
+        """释放获取的全部共享K线序列（子类可能已替换self.am）"""
+        for am in self.sharedArrayManagers:
+            releaseSharedArrayManager(am)
+        self.sharedArrayManagers = []
 
     #----------------------------------------------------------------------
     # @timeit
@@ -100,6 +112,7 @@ class CtaTemplate_6(CtaTemplate_5):
     def on_stop(self):
         """停止策略（必须由用户继承实现）"""
         self.cancel_all()
+        self.releaseArrayManagers()
         self.write_log(u'停止')
         self.put_event()
 
@@ -0,0 +1,335 @@
+"""
+Distributed optimization over vnpy.rpc.
+
+OptimizationServer is used in place of OptimizationPool by optimization
+functions of BacktestingEngine, and OptimizationWorker processes started
+on any node pull tasks from it and send results back.
+"""
+
+import multiprocessing
+import os
+import pickle
+import shutil
+import socket
+import tempfile
+import traceback
+from collections import deque
+from pathlib import Path
+from threading import Event, Lock
+from time import sleep, time
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from vnpy.rpc import RpcClient, RpcServer, RemoteException
+from vnpy.trader.object import DataBatch
+from vnpy.trader.utility import get_folder_path
+
+from . import optimization
+from .optimization import get_history_key
+
+
+HISTORY_FOLDERNAME = "optimization_history"
+
+# Range of seconds to wait before calling server again after failure
+RETRY_INTERVAL_MIN = 1
+RETRY_INTERVAL_MAX = 60
+
+
+class TaskResult:
+    """
+    Result of task run by distributed optimization worker, with the same
+    get method as AsyncResult.
+    """
+
+    def __init__(self):
+        """"""
+        self.event: Event = Event()
+        self.value: Any = None
+        self.error: str = ""
+
+    def set(self, value: Any, error: str) -> None:
+        """"""
+        self.value = value
+        self.error = error
+        self.event.set()
+
+    def ready(self) -> bool:
+        """"""
+        return self.event.is_set()
+
+    def get(self, timeout: float = None) -> Any:
+        """
+        Wait for result, and raise RemoteException if task failed.
+        """
+        if not self.event.wait(timeout):
+            raise TimeoutError("优化任务等待超时")
+
+        if self.error:
+            raise RemoteException(self.error)
+        return self.value
+
+
+class OptimizationServer(RpcServer):
+    """
+    Coordinator of distributed optimization, which can be passed to
+    run_optimization in place of OptimizationPool.
+
+    Tasks are pulled by OptimizationWorker processes, which can run on
+    other nodes. History data shared by share_data is downloaded by
+    workers on first use, and cached locally with key of symbol,
+    interval and range. Task not finished in task_timeout seconds is
+    given to another worker again.
+    """
+
+    def __init__(self, task_timeout: int = 600):
+        """"""
+        super().__init__()
+
+        self.task_timeout: int = task_timeout
+        self.lock: Lock = Lock()
+
+        self.task_count: int = 0
+        self.pending: Deque[int] = deque()
+        self.tasks: Dict[int, bytes] = {}
+        self.running: Dict[int, float] = {}
+        self.results: Dict[int, TaskResult] = {}
+
+        self.history_folders: Dict[str, str] = {}
+        self.workers: Dict[str, float] = {}
+
+        self.register(self.get_task)
+        self.register(self.put_result)
+        self.register(self.get_history)
+
+    def apply_async(self, func: Callable, args: Tuple) -> TaskResult:
+        """
+        Add task into queue. Function and arguments are pickled by
+        reference, so that strategy class must be importable by workers.
+        """
+        result = TaskResult()
+
+        with self.lock:
+            self.task_count += 1
+            task_id = self.task_count
+
+            self.tasks[task_id] = pickle.dumps((func, args))
+            self.results[task_id] = result
+            self.pending.append(task_id)
+
+        return result
+
+    def map(self, func: Callable, iterable: Iterable) -> List:
+        """"""
+        results = [self.apply_async(func, (arg,)) for arg in iterable]
+        return [result.get() for result in results]
+
+    def share_data(self, batch: DataBatch) -> str:
+        """
+        Save history data batch for workers to download, and return its
+        key, which is passed to tasks in place of local folder.
+        """
+        key = get_history_key(batch)
+
+        with self.lock:
+            if key not in self.history_folders:
+                folder = tempfile.mkdtemp(prefix="vnpy_history_")
+                batch.save(folder)
+                self.history_folders[key] = folder
+
+        return key
+
+    def release_data(self, key: str) -> None:
+        """"""
+        with self.lock:
+            folder = self.history_folders.pop(key, "")
+
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def get_task(self, worker_name: str) -> Optional[Tuple[int, bytes]]:
+        """
+        Called by worker to get (task_id, task data), or None if no task
+        is waiting.
+        """
+        now = time()
+
+        with self.lock:
+            self.workers[worker_name] = now
+
+            # Run task again if its worker has no response
+            for task_id, start in list(self.running.items()):
+                if now - start > self.task_timeout:
+                    self.running.pop(task_id)
+                    self.pending.appendleft(task_id)
+
+            while self.pending:
+                task_id = self.pending.popleft()
+                if task_id in self.tasks:
+                    self.running[task_id] = now
+                    return task_id, self.tasks[task_id]
+
+        return None
+
+    def put_result(self, worker_name: str, task_id: int, value: Any, error: str) -> None:
+        """
+        Called by worker to return result of task.
+        """
+        with self.lock:
+            self.workers[worker_name] = time()
+
+            self.running.pop(task_id, None)
+            self.tasks.pop(task_id, None)
+            result = self.results.pop(task_id, None)
+
+        # Result of task finished by other worker is ignored
+        if result:
+            result.set(value, error)
+
+    def get_history(self, key: str) -> Dict[str, bytes]:
+        """
+        Called by worker to download files of shared history data.
+        """
+        with self.lock:
+            folder = self.history_folders[key]
+
+        return {
+            path.name: path.read_bytes()
+            for path in Path(folder).iterdir()
+        }
+
+    def get_worker_count(self, active_seconds: int = 60) -> int:
+        """
+        Get count of workers requested in recent seconds.
+        """
+        now = time()
+
+        with self.lock:
+            return len([t for t in self.workers.values() if now - t <= active_seconds])
+
+    def close(self) -> None:
+        """
+        Stop server, and remove history data not released.
+        """
+        self.stop()
+        self.join()
+
+        for key in list(self.history_folders.keys()):
+            self.release_data(key)
+
+
+class OptimizationWorker(RpcClient):
+    """
+    Worker of distributed optimization, which pulls tasks from
+    OptimizationServer and runs them one by one.
+    """
+
+    def __init__(self, name: str = ""):
+        """"""
+        super().__init__()
+
+        if not name:
+            name = f"{socket.gethostname()}_{os.getpid()}"
+
+        self.worker_name: str = name
+        self.history_path: Path = get_folder_path(HISTORY_FOLDERNAME)
+
+    def callback(self, topic: str, data: Any) -> None:
+        """"""
+        pass
+
+    def get_local_folder(self, key: str) -> str:
+        """
+        Get local folder of shared history data, which is downloaded from
+        server if not cached yet.
+        """
+        folder = self.history_path.joinpath(key)
+        if folder.exists():
+            return str(folder)
+
+        files = self.get_history(key, timeout=600_000)
+
+        # Save into temp folder first, and then rename it, so that other
+        # worker processes never see partial data
+        temp_folder = Path(tempfile.mkdtemp(dir=self.history_path))
+        for name, data in files.items():
+            temp_folder.joinpath(name).write_bytes(data)
+
+        try:
+            temp_folder.rename(folder)
+        except OSError:
+            # Already saved by another worker process
+            shutil.rmtree(temp_folder, ignore_errors=True)
+
+        return str(folder)
+
+    def call_server(self, func: Callable, *args: Any) -> Any:
+        """
+        Call server function until succeeded, waiting longer after every
+        failure, so that worker survives network failure or server restart.
+        """
+        interval = RETRY_INTERVAL_MIN
+
+        while True:
+            try:
+                return func(*args)
+            except RemoteException as e:
+                print(f"Worker {self.worker_name} failed to call server, retry in {interval}s: {e}")
+
+            sleep(interval)
+            interval = min(interval * 2, RETRY_INTERVAL_MAX)
+
+    def run_tasks(self, idle_interval: float = 1) -> None:
+        """
+        Run tasks from server until stopped.
+
+        Task is given to another worker by server if its result is lost,
+        and result put more than once is ignored, so both calls are safe
+        to retry.
+        """
+        optimization.shared_folder_resolver = self.get_local_folder
+
+        while True:
+            task = self.call_server(self.get_task, self.worker_name)
+
+            if not task:
+                sleep(idle_interval)
+                continue
+
+            task_id, data = task
+
+            try:
+                func, args = pickle.loads(data)
+                value = func(*args)
+                error = ""
+            except Exception:
+                value = None
+                error = traceback.format_exc()
+
+            self.call_server(self.put_result, self.worker_name, task_id, value, error)
+
+
+def run_worker(req_address: str, sub_address: str) -> None:
+    """
+    Run distributed optimization worker in current process.
+    """
+    worker = OptimizationWorker()
+    worker.start(req_address, sub_address)
+    worker.run_tasks()
+
+
+def run_workers(req_address: str, sub_address: str, processes: int = 0) -> None:
+    """
+    Start worker processes, one for each CPU by default.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    ctx = multiprocessing.get_context("spawn")
+
+    workers = [
+        ctx.Process(target=run_worker, args=(req_address, sub_address))
+        for _ in range(processes)
+    ]
+
+    for p in workers:
+        p.start()
+
+    for p in workers:
+        p.join()
@@ -117,7 +117,6 @@ class CtaEngine(BaseEngine):
 
     def register_event(self):
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
         self.event_engine.register(EVENT_TRADE, self.process_trade_event)
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
@@ -635,6 +634,10 @@ class CtaEngine(BaseEngine):
 
         # Add vt_symbol to strategy map.
         strategies = self.symbol_strategy_map[vt_symbol]
+        if not strategies:
+            self.event_engine.register(
+                EVENT_TICK, self.process_tick_event, vt_symbol
+            )
         strategies.append(strategy)
 
         # Update to setting file.
@@ -752,6 +755,11 @@ class CtaEngine(BaseEngine):
         strategies = self.symbol_strategy_map[strategy.vt_symbol]
         strategies.remove(strategy)
 
+        if not strategies:
+            self.event_engine.unregister(
+                EVENT_TICK, self.process_tick_event, strategy.vt_symbol
+            )
+
         # Remove from active orderid map
         if strategy_name in self.strategy_orderid_map:
             vt_orderids = self.strategy_orderid_map.pop(strategy_name)
@@ -0,0 +1,296 @@
+"""
+Persistent process pool and on-disk result cache for parameter optimization.
+"""
+
+import gc
+import hashlib
+import multiprocessing
+import pickle
+import shutil
+import sqlite3
+import tempfile
+from inspect import getfile
+from multiprocessing.pool import AsyncResult, Pool
+from threading import Barrier, Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.object import DataBatch
+from vnpy.trader.utility import get_file_path
+
+
+CACHE_FILENAME = "cta_optimization_cache.db"
+
+# Function to get local folder of shared history data, which is set in
+# worker process of distributed optimization.
+shared_folder_resolver: Optional[Callable[[str], str]] = None
+
+# Functions decorated by lru_cache which keep shared history data memory
+# mapped in worker process, cleared before the data folder is removed.
+shared_data_loaders: List[Callable] = []
+
+# Barrier of all processes in OptimizationPool, set in worker process.
+worker_barrier: Optional[Barrier] = None
+
+
+def get_source_hash(cls: type) -> str:
+    """
+    Get hash of source files of class and all its base classes, so that
+    changing strategy code or its templates invalidates cached results.
+    """
+    md5 = hashlib.md5()
+
+    for base in cls.__mro__:
+        if base is object:
+            continue
+
+        try:
+            path = getfile(base)
+            with open(path, "rb") as f:
+                md5.update(f.read())
+        except (TypeError, OSError):
+            # Builtin class or source file not available
+            md5.update(base.__qualname__.encode())
+
+    return md5.hexdigest()
+
+
+def get_cache_key(*args: Any) -> str:
+    """
+    Get hash key of optimization run from its parameters. Dict is
+    converted into sorted items so that key ordering does not matter.
+    """
+    values = []
+    for arg in args:
+        if isinstance(arg, dict):
+            arg = sorted(arg.items())
+        values.append(repr(arg))
+
+    return hashlib.md5("|".join(values).encode()).hexdigest()
+
+
+def get_data_hash(batch: DataBatch) -> str:
+    """
+    Get hash of all arrays in history data batch, which covers both
+    date range and content of data.
+    """
+    md5 = hashlib.md5()
+
+    md5.update(np.ascontiguousarray(batch.datetime).view(np.uint8))
+    for array in batch.arrays.values():
+        md5.update(np.ascontiguousarray(array).view(np.uint8))
+
+    return md5.hexdigest()
+
+
+def get_history_key(batch: DataBatch) -> str:
+    """
+    Get key of history data batch from symbol, interval, range and hash
+    of content, which is used as folder name of history data cached by
+    distributed optimization workers.
+    """
+    interval = batch.get_extra().get("interval", None)
+    if interval:
+        interval_str = interval.value
+    else:
+        interval_str = "tick"
+
+    start = batch.datetime[0].astype("datetime64[m]").item()
+    end = batch.datetime[-1].astype("datetime64[m]").item()
+
+    return "_".join([
+        f"{batch.symbol}.{batch.exchange.value}",
+        interval_str,
+        start.strftime("%Y%m%d%H%M"),
+        end.strftime("%Y%m%d%H%M"),
+        get_data_hash(batch)[:8]
+    ])
+
+
+def init_worker(barrier: Barrier) -> None:
+    """"""
+    global worker_barrier
+    worker_barrier = barrier
+
+
+def clear_shared_data(index: int) -> None:
+    """
+    Close memory mapped history data in worker process, then wait for
+    all other processes, so that every process runs this exactly once.
+    """
+    for loader in shared_data_loaders:
+        loader.cache_clear()
+
+    # Engine and strategy reference each other, collect them to drop
+    # history data still referenced by engines of finished tasks.
+    gc.collect()
+
+    worker_barrier.wait()
+
+
+def resolve_shared_folder(folder: str) -> str:
+    """
+    Get local folder of history data shared by optimization pool.
+    """
+    if shared_folder_resolver:
+        return shared_folder_resolver(folder)
+    return folder
+
+
+class OptimizationPool:
+    """
+    Long-lived pool of spawned processes, which can be reused by many
+    optimization runs to save the cost of starting processes and
+    importing modules every time.
+
+    Call close after strategy modules are reloaded, so that processes
+    are restarted with the new code on next run.
+    """
+
+    def __init__(self, processes: int = 0):
+        """"""
+        self.processes: int = processes or multiprocessing.cpu_count()
+        self.pool: Optional[Pool] = None
+        self.lock: Lock = Lock()
+        self.data_lock: Lock = Lock()
+
+    def get_pool(self) -> Pool:
+        """
+        Get process pool, which is started on first use.
+        """
+        with self.lock:
+            if not self.pool:
+                # Force to use spawn method to create new process (instead of fork on Linux)
+                ctx = multiprocessing.get_context("spawn")
+                barrier = ctx.Barrier(self.processes)
+                self.pool = ctx.Pool(
+                    self.processes,
+                    initializer=init_worker,
+                    initargs=(barrier,)
+                )
+            return self.pool
+
+    def apply_async(self, func: Callable, args: Tuple) -> AsyncResult:
+        """"""
+        return self.get_pool().apply_async(func, args)
+
+    def map(self, func: Callable, iterable: Iterable) -> List:
+        """"""
+        return self.get_pool().map(func, iterable)
+
+    def share_data(self, batch: DataBatch) -> str:
+        """
+        Save history data batch into a temp folder, which can be memory
+        mapped by optimization processes.
+        """
+        folder = tempfile.mkdtemp(prefix="vnpy_history_")
+        batch.save(folder)
+        return folder
+
+    def release_data(self, folder: str) -> None:
+        """
+        Close history data memory mapped by all processes before removing
+        the folder, otherwise it can not be deleted on Windows.
+        """
+        with self.lock:
+            pool = self.pool
+
+        if pool:
+            # Only one broadcast at a time, as processes wait on one barrier
+            with self.data_lock:
+                pool.map(clear_shared_data, range(self.processes), chunksize=1)
+
+        shutil.rmtree(folder, ignore_errors=True)
+
+    def close(self) -> None:
+        """
+        Wait for all tasks finished and stop processes.
+        """
+        with self.lock:
+            if not self.pool:
+                return
+
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+class OptimizationCache:
+    """
+    Results of optimization runs saved in sqlite file, keyed by hash
+    from get_cache_key.
+    """
+
+    def __init__(self, path: str = ""):
+        """"""
+        if not path:
+            path = str(get_file_path(CACHE_FILENAME))
+
+        self.path: str = path
+        self.lock: Lock = Lock()
+
+        self.conn: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS result (key TEXT PRIMARY KEY, value BLOB)"
+        )
+        self.conn.commit()
+
+    def get(self, key: str) -> Any:
+        """
+        Get cached result, or None if not found.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM result WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row:
+            return pickle.loads(row[0])
+        return None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get all cached results of keys.
+        """
+        keys = list(keys)
+        results = {}
+
+        with self.lock:
+            # Query in chunks to stay within sqlite variable limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i: i + 500]
+                sql = "SELECT key, value FROM result WHERE key IN ({})".format(
+                    ",".join("?" * len(chunk))
+                )
+                for key, value in self.conn.execute(sql, chunk):
+                    results[key] = pickle.loads(value)
+
+        return results
+
+    def set(self, key: str, value: Any) -> None:
+        """"""
+        self.set_many({key: value})
+
+    def set_many(self, data: Dict[str, Any]) -> None:
+        """
+        Save results in one transaction.
+        """
+        rows = [(key, pickle.dumps(value)) for key, value in data.items()]
+
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO result (key, value) VALUES (?, ?)", rows
+            )
+            self.conn.commit()
+
+    def clear(self) -> None:
+        """"""
+        with self.lock:
+            self.conn.execute("DELETE FROM result")
+            self.conn.commit()
+
+    def close(self) -> None:
+        """"""
+        with self.lock:
+            self.conn.close()
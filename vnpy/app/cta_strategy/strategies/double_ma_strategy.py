@@ -1,3 +1,6 @@
+import numpy as np
+import talib
+
 from vnpy.app.cta_strategy import (
     CtaTemplate,
     StopOrder,
@@ -97,6 +100,30 @@ class DoubleMaStrategy(CtaTemplate):
 
         self.put_event()
 
+    def target_position(self, arrays: dict) -> np.ndarray:
+        """
+        Target position of every bar for vector backtesting, which holds
+        the direction of last moving average cross.
+        """
+        close = arrays["close_price"]
+        fast_ma = talib.SMA(close, self.fast_window)
+        slow_ma = talib.SMA(close, self.slow_window)
+
+        cross_over = (fast_ma[1:] > slow_ma[1:]) & (fast_ma[:-1] < slow_ma[:-1])
+        cross_below = (fast_ma[1:] < slow_ma[1:]) & (fast_ma[:-1] > slow_ma[:-1])
+
+        signals = np.full(len(close), np.nan)
+        signals[1:][cross_over] = 1
+        signals[1:][cross_below] = -1
+
+        # No signal before ArrayManager is inited
+        signals[:self.am.size - 1] = np.nan
+
+        # Hold position until next cross
+        ix = np.where(np.isnan(signals), 0, np.arange(len(signals)))
+        np.maximum.accumulate(ix, out=ix)
+        return np.nan_to_num(signals[ix])
+
     def on_order(self, order: OrderData):
         """
         Callback of new order data update.
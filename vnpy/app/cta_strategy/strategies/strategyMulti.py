@@ -239,6 +239,9 @@ class MultiStrategy(CtaTemplatePatch):
             if not strategy.className  == self.className:
                 #同步到ctaEngine中
                 self.cta_engine.strategyDict[strategy_name] = strategy
+            else:
+                #嵌套的组合策略只负责载入子策略，不会被停止，释放其共享K线序列
+                strategy.releaseArrayManagers()
 
 
     def load_strategy_class(self):
@@ -1,7 +1,9 @@
 """"""
 from abc import ABC
 from copy import copy
-from typing import Any, Callable
+from typing import Any, Callable, Dict
+
+import numpy as np
 
 from vnpy.trader.constant import Interval, Direction, Offset
 from vnpy.trader.object import BarData, TickData, OrderData, TradeData
@@ -148,6 +150,15 @@ class CtaTemplate(ABC):
         """
         pass
 
+    @virtual
+    def target_position(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Return target position at close of every bar, calculated from
+        whole history arrays of datetime, open/high/low/close price, volume
+        and open_interest. Implement it to run vector backtesting.
+        """
+        raise NotImplementedError
+
     def buy(self, price: float, volume: float, stop: bool = False, lock: bool = False):
         """
         Send buy order to open a long position.
@@ -2,10 +2,12 @@ import csv
 from datetime import datetime
 from typing import List, Tuple
 
+import numpy as np
+
 from vnpy.trader.database import BarOverview, DB_TZ
 from vnpy.trader.engine import BaseEngine, MainEngine, EventEngine
 from vnpy.trader.constant import Interval, Exchange
-from vnpy.trader.object import BarData, HistoryRequest
+from vnpy.trader.object import BarData, BarBatch, HistoryRequest
 from vnpy.trader.rqdata import rqdata_client
 from vnpy.trader.database import database_manager
 
@@ -110,22 +112,28 @@ class ManagerEngine(BaseEngine):
 
         try:
             with open(file_path, "w") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator="\n")
-                writer.writeheader()
-
-                for bar in bars:
-                    d = {
-                        "symbol": bar.symbol,
-                        "exchange": bar.exchange.value,
-                        "datetime": bar.datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                        "open": bar.open_price,
-                        "high": bar.high_price,
-                        "low": bar.low_price,
-                        "close": bar.close_price,
-                        "volume": bar.volume,
-                        "open_interest": bar.open_interest,
-                    }
-                    writer.writerow(d)
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(fieldnames)
+
+                # Write all rows in one go with columnar data
+                if bars:
+                    batch = BarBatch.from_list(bars)
+                    size = len(batch)
+
+                    dt = np.datetime_as_string(batch.datetime, unit="s")
+                    dt = np.char.replace(dt, "T", " ")
+
+                    writer.writerows(zip(
+                        [symbol] * size,
+                        [exchange.value] * size,
+                        dt.tolist(),
+                        batch.open_price.tolist(),
+                        batch.high_price.tolist(),
+                        batch.low_price.tolist(),
+                        batch.close_price.tolist(),
+                        batch.volume.tolist(),
+                        batch.open_interest.tolist(),
+                    ))
 
             return True
         except PermissionError:
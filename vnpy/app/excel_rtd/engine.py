@@ -39,7 +39,7 @@ class RtdEngine(BaseEngine):
         """
         Register event handler.
         """
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register_conflated(EVENT_TICK, self.process_tick_event)
 
     def process_tick_event(self, event: Event) -> None:
         """
@@ -1,8 +1,9 @@
 from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List
 from functools import lru_cache
 from copy import copy
+from operator import attrgetter
 import traceback
 
 import numpy as np
@@ -13,6 +14,7 @@ from pandas import DataFrame
 from vnpy.trader.constant import Direction, Offset, Interval, Status
 from vnpy.trader.database import database_manager
 from vnpy.trader.object import OrderData, TradeData, BarData
+from vnpy.trader.profiler import BacktestingProfiler
 from vnpy.trader.utility import round_to, extract_vt_symbol
 
 from .template import StrategyTemplate
@@ -24,6 +26,24 @@ INTERVAL_DELTA_MAP = {
     Interval.DAILY: timedelta(days=1),
 }
 
+# Methods timed in profiling mode
+PROFILED_ENGINE_METHODS = [
+    "load_data",
+    "run_backtesting",
+    "calculate_result",
+    "calculate_statistics",
+    "new_bars",
+    "cross_limit_order",
+    "update_daily_close",
+]
+PROFILED_STRATEGY_METHODS = [
+    "on_init",
+    "on_start",
+    "on_bars",
+    "update_trade",
+    "update_order",
+]
+
 
 class BacktestingEngine:
     """"""
@@ -43,6 +63,7 @@ class BacktestingEngine:
 
         self.capital: float = 1_000_000
         self.risk_free: float = 0.02
+        self.profiler: BacktestingProfiler = None
 
         self.strategy: StrategyTemplate = None
         self.bars: Dict[str, BarData] = {}
@@ -50,8 +71,12 @@ class BacktestingEngine:
 
         self.interval: Interval = None
         self.days: int = 0
-        self.history_data: Dict[Tuple, BarData] = {}
-        self.dts: Set[datetime] = set()
+
+        # History data aligned by sorted datetime (rows) and vt_symbol (columns),
+        # bar is None and close price is forward filled where data is missing
+        self.dts: List[datetime] = []
+        self.history_data: np.ndarray = np.empty((0, 0), dtype=object)
+        self.close_data: np.ndarray = np.empty((0, 0))
 
         self.limit_order_count = 0
         self.limit_orders = {}
@@ -64,6 +89,8 @@ class BacktestingEngine:
 
         self.daily_results = {}
         self.daily_df = None
+        self.daily_date: date = None
+        self.daily_ix: int = 0
 
     def clear_data(self) -> None:
         """
@@ -83,6 +110,11 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
         self.daily_df = None
+        self.daily_date = None
+        self.daily_ix = 0
+
+        if self.profiler:
+            self.profiler.clear()
 
     def set_parameters(
         self,
@@ -95,9 +127,13 @@ class BacktestingEngine:
         priceticks: Dict[str, float],
         capital: int = 0,
         end: datetime = None,
-        risk_free: float = 0
+        risk_free: float = 0,
+        profile: bool = False
     ) -> None:
-        """"""
+        """
+        Set profile to record time of every backtesting phase and callback
+        into profiler, which is reported with statistics.
+        """
         self.vt_symbols = vt_symbols
         self.interval = interval
 
@@ -111,12 +147,22 @@ class BacktestingEngine:
         self.capital = capital
         self.risk_free = risk_free
 
+        if profile:
+            self.profiler = BacktestingProfiler()
+            self.profiler.instrument(self, PROFILED_ENGINE_METHODS)
+        else:
+            self.profiler = None
+            BacktestingProfiler.uninstrument(self, PROFILED_ENGINE_METHODS)
+
     def add_strategy(self, strategy_class: type, setting: dict) -> None:
         """"""
         self.strategy = strategy_class(
             self, strategy_class.__name__, copy(self.vt_symbols), setting
         )
 
+        if self.profiler:
+            self.profiler.instrument_strategy(self.strategy, PROFILED_STRATEGY_METHODS)
+
     def load_data(self) -> None:
         """"""
         self.output("开始加载历史数据")
@@ -128,21 +174,19 @@ class BacktestingEngine:
             self.output("起始日期必须小于结束日期")
             return
 
-        # Clear previously loaded history data
-        self.history_data.clear()
-        self.dts.clear()
-
         # Load 30 days of data each time and allow for progress update
         progress_delta = timedelta(days=30)
         total_delta = self.end - self.start
         interval_delta = INTERVAL_DELTA_MAP[self.interval]
 
+        history_data: Dict[str, List[BarData]] = {}
+
         for vt_symbol in self.vt_symbols:
             start = self.start
             end = self.start + progress_delta
             progress = 0
 
-            data_count = 0
+            bars = history_data.setdefault(vt_symbol, [])
             while start < self.end:
                 end = min(end, self.end)  # Make sure end time stays within set range
 
@@ -153,10 +197,7 @@ class BacktestingEngine:
                     end
                 )
 
-                for bar in data:
-                    self.dts.add(bar.datetime)
-                    self.history_data[(bar.datetime, vt_symbol)] = bar
-                    data_count += 1
+                bars.extend(data)
 
                 progress += progress_delta / total_delta
                 progress = min(progress, 1)
@@ -166,17 +207,48 @@ class BacktestingEngine:
                 start = end + interval_delta
                 end += (progress_delta + interval_delta)
 
-            self.output(f"{vt_symbol}历史数据加载完成，数据量：{data_count}")
+            self.output(f"{vt_symbol}历史数据加载完成，数据量：{len(bars)}")
+
+        self.set_history_data(history_data)
 
         self.output("所有历史数据加载完成")
 
+    def set_history_data(self, history_data: Dict[str, List[BarData]]) -> None:
+        """
+        Align bars of all vt_symbols into matrix of datetime and vt_symbol,
+        so that replaying every datetime only takes one row.
+        """
+        self.dts = sorted({bar.datetime for bars in history_data.values() for bar in bars})
+        dt_ixs = {dt: ix for ix, dt in enumerate(self.dts)}
+
+        shape = (len(self.dts), len(self.vt_symbols))
+        self.history_data = np.full(shape, None, dtype=object)
+        self.close_data = np.full(shape, np.nan)
+
+        for jx, vt_symbol in enumerate(self.vt_symbols):
+            bars = history_data.get(vt_symbol, [])
+            if not bars:
+                continue
+
+            ixs = np.fromiter(map(dt_ixs.__getitem__, map(attrgetter("datetime"), bars)), int, len(bars))
+
+            column = np.empty(len(bars), dtype=object)
+            column[:] = bars
+            self.history_data[ixs, jx] = column
+
+            self.close_data[ixs, jx] = np.fromiter(map(attrgetter("close_price"), bars), float, len(bars))
+
+        # Forward fill close price with index of last row with data
+        if shape[0]:
+            last_ixs = np.where(~np.isnan(self.close_data), np.arange(shape[0])[:, None], 0)
+            np.maximum.accumulate(last_ixs, axis=0, out=last_ixs)
+            self.close_data = self.close_data[last_ixs, np.arange(shape[1])]
+
     def run_backtesting(self) -> None:
         """"""
         self.strategy.on_init()
 
-        # Generate sorted datetime list
-        dts = list(self.dts)
-        dts.sort()
+        dts = self.dts
 
         # Use the first [days] of history data for initializing strategy
         day_count = 0
@@ -189,8 +261,9 @@ class BacktestingEngine:
                     break
 
             try:
-                self.new_bars(dt)
+                self.new_bars(ix, dt)
             except Exception:
+                self.update_daily_close_prices()
                 self.output("触发异常，回测终止")
                 self.output(traceback.format_exc())
                 return
@@ -203,14 +276,16 @@ class BacktestingEngine:
         self.output("开始回放历史数据")
 
         # Use the rest of history data for running backtesting
-        for dt in dts[ix:]:
+        for ix in range(ix, len(dts)):
             try:
-                self.new_bars(dt)
+                self.new_bars(ix, dts[ix])
             except Exception:
+                self.update_daily_close_prices()
                 self.output("触发异常，回测终止")
                 self.output(traceback.format_exc())
                 return
 
+        self.update_daily_close_prices()
         self.output("历史数据回放结束")
 
     def calculate_result(self) -> None:
@@ -426,6 +501,9 @@ class BacktestingEngine:
                 value = 0
             statistics[key] = np.nan_to_num(value)
 
+        if output and self.profiler:
+            self.profiler.output_report(self.output)
+
         self.output("策略统计指标计算完成")
         return statistics
 
@@ -471,29 +549,52 @@ class BacktestingEngine:
         fig.update_layout(height=1000, width=1000)
         fig.show()
 
-    def update_daily_close(self, bars: Dict[str, BarData], dt: datetime) -> None:
-        """"""
+    def update_daily_close(self, ix: int, dt: datetime) -> None:
+        """
+        Only remember the last row of the day, close prices are updated
+        from that row when the day is finished.
+        """
         d = dt.date()
 
-        close_prices = {}
-        for bar in bars.values():
-            close_prices[bar.vt_symbol] = bar.close_price
+        if d == self.daily_date:
+            self.daily_ix = ix
+            return
 
-        daily_result = self.daily_results.get(d, None)
+        self.update_daily_close_prices()
 
+        self.daily_date = d
+        self.daily_ix = ix
+        self.daily_results[d] = PortfolioDailyResult(d, self.get_close_prices(ix))
+
+    def update_daily_close_prices(self) -> None:
+        """
+        Update close prices of current day with its last row.
+        """
+        daily_result = self.daily_results.get(self.daily_date, None)
         if daily_result:
-            daily_result.update_close_prices(close_prices)
-        else:
-            self.daily_results[d] = PortfolioDailyResult(d, close_prices)
+            daily_result.update_close_prices(self.get_close_prices(self.daily_ix))
+
+    def get_close_prices(self, ix: int) -> Dict[str, float]:
+        """
+        Get forward filled close prices of row, vt_symbols without any
+        bar yet are not included. Keys are kept in the same order as bars
+        pushed to strategy.
+        """
+        row = dict(zip(self.vt_symbols, self.close_data[ix].tolist()))
 
-    def new_bars(self, dt: datetime) -> None:
+        close_prices = {}
+        for vt_symbol in self.bars:
+            close_price = row[vt_symbol]
+            if close_price == close_price:
+                close_prices[vt_symbol] = close_price
+        return close_prices
+
+    def new_bars(self, ix: int, dt: datetime) -> None:
         """"""
         self.datetime = dt
 
         # self.bars.clear()
-        for vt_symbol in self.vt_symbols:
-            bar = self.history_data.get((dt, vt_symbol), None)
-
+        for vt_symbol, bar in zip(self.vt_symbols, self.history_data[ix].tolist()):
             # If bar data of vt_symbol at dt exists
             if bar:
                 self.bars[vt_symbol] = bar
@@ -516,7 +617,7 @@ class BacktestingEngine:
         self.cross_limit_order()
         self.strategy.on_bars(self.bars)
 
-        self.update_daily_close(self.bars, dt)
+        self.update_daily_close(ix, dt)
 
     def cross_limit_order(self) -> None:
         """
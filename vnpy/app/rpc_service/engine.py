@@ -55,6 +55,7 @@ class RpcEngine(BaseEngine):
         self.server.register(self.main_engine.get_all_accounts)
         self.server.register(self.main_engine.get_all_contracts)
         self.server.register(self.main_engine.get_all_active_orders)
+        self.server.register(self.main_engine.get_event_stats)
 
     def load_setting(self):
         """"""
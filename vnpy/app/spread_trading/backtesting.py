@@ -10,11 +10,36 @@ from plotly.subplots import make_subplots
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
 from vnpy.trader.object import TradeData, BarData, TickData
+from vnpy.trader.profiler import BacktestingProfiler
 
 from .template import SpreadStrategyTemplate, SpreadAlgoTemplate
 from .base import SpreadData, BacktestingMode, load_bar_data, load_tick_data
 
 
+# Methods timed in profiling mode
+PROFILED_ENGINE_METHODS = [
+    "load_data",
+    "run_backtesting",
+    "calculate_result",
+    "calculate_statistics",
+    "new_bar",
+    "new_tick",
+    "cross_algo",
+    "update_daily_close",
+]
+PROFILED_STRATEGY_METHODS = [
+    "on_init",
+    "on_start",
+    "on_spread_data",
+    "on_spread_tick",
+    "on_spread_bar",
+    "on_spread_pos",
+    "on_spread_algo",
+    "on_order",
+    "on_trade",
+]
+
+
 class BacktestingEngine:
     """"""
 
@@ -32,6 +57,7 @@ class BacktestingEngine:
         self.pricetick = 0
         self.capital = 1_000_000
         self.mode = BacktestingMode.BAR
+        self.profiler: BacktestingProfiler = None
 
         self.strategy_class: Type[SpreadStrategyTemplate] = None
         self.strategy: SpreadStrategyTemplate = None
@@ -81,6 +107,9 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
 
+        if self.profiler:
+            self.profiler.clear()
+
     def set_parameters(
         self,
         spread: SpreadData,
@@ -92,9 +121,13 @@ class BacktestingEngine:
         pricetick: float,
         capital: int = 0,
         end: datetime = None,
-        mode: BacktestingMode = BacktestingMode.BAR
+        mode: BacktestingMode = BacktestingMode.BAR,
+        profile: bool = False
     ):
-        """"""
+        """
+        Set profile to record time of every backtesting phase and callback
+        into profiler, which is reported with statistics.
+        """
         self.spread = spread
         self.interval = Interval(interval)
         self.rate = rate
@@ -106,6 +139,13 @@ class BacktestingEngine:
         self.end = end
         self.mode = mode
 
+        if profile:
+            self.profiler = BacktestingProfiler()
+            self.profiler.instrument(self, PROFILED_ENGINE_METHODS)
+        else:
+            self.profiler = None
+            BacktestingProfiler.uninstrument(self, PROFILED_ENGINE_METHODS)
+
     def add_strategy(self, strategy_class: type, setting: dict):
         """"""
         self.strategy_class = strategy_class
@@ -117,6 +157,9 @@ class BacktestingEngine:
             setting
         )
 
+        if self.profiler:
+            self.profiler.instrument_strategy(self.strategy, PROFILED_STRATEGY_METHODS)
+
     def load_data(self):
         """"""
         self.output("开始加载历史数据")
@@ -376,6 +419,9 @@ class BacktestingEngine:
             "return_drawdown_ratio": return_drawdown_ratio,
         }
 
+        if output and self.profiler:
+            self.profiler.output_report(self.output)
+
         return statistics
 
     def show_chart(self, df: DataFrame = None):
@@ -213,7 +213,6 @@ class SpreadDataEngine:
 
     def register_event(self) -> None:
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
         self.event_engine.register(EVENT_TRADE, self.process_trade_event)
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
@@ -293,6 +292,11 @@ class SpreadDataEngine:
             leg = LegData(vt_symbol)
             self.legs[vt_symbol] = leg
 
+            # Only receive tick event of leg vt_symbol
+            self.event_engine.register(
+                EVENT_TICK, self.process_tick_event, vt_symbol
+            )
+
             # Subscribe market data
             contract = self.main_engine.get_contract(vt_symbol)
             if contract:
@@ -4,14 +4,23 @@ from typing import List
 import shelve
 
 from influxdb import InfluxDBClient
+from influxdb.resultset import ResultSet
 
 from vnpy.trader.constant import Exchange, Interval
-from vnpy.trader.object import BarData, TickData
+from vnpy.trader.object import (
+    BarData,
+    TickData,
+    BarBatch,
+    TickBatch,
+    BAR_COLUMNS,
+    TICK_COLUMNS
+)
 from vnpy.trader.database import (
     BaseDatabase,
     BarOverview,
     DB_TZ,
-    convert_tz
+    convert_tz,
+    rows_to_batch
 )
 from vnpy.trader.setting import SETTINGS
 from vnpy.trader.utility import (
@@ -278,6 +287,87 @@ class InfluxdbDatabase(BaseDatabase):
 
         return ticks
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarBatch:
+        """
+        Fetch raw values of query result into arrays, with time returned
+        as microseconds since epoch instead of string.
+        """
+        query = (
+            f"select {', '.join(BAR_COLUMNS)} from bar_data"
+            " where vt_symbol=$vt_symbol"
+            " and interval=$interval"
+            f" and time >= '{start.date().isoformat()}'"
+            f" and time <= '{end.date().isoformat()}';"
+        )
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+            "interval": interval.value
+        }
+
+        result = self.client.query(query, bind_params=bind_params, epoch="u")
+        values = get_raw_values(result)
+
+        return rows_to_batch(
+            BarBatch,
+            symbol,
+            exchange,
+            map(tuple, values),
+            count=len(values),
+            interval=interval
+        )
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickBatch:
+        """
+        Fetch raw values of query result into arrays, with time returned
+        as microseconds since epoch instead of string.
+        """
+        condition = (
+            " where vt_symbol=$vt_symbol"
+            f" and time >= '{start.date().isoformat()}'"
+            f" and time <= '{end.date().isoformat()}'"
+        )
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+        }
+
+        # Name is the same for all ticks of symbol
+        result = self.client.query(
+            f"select name from tick_data{condition} limit 1;",
+            bind_params=bind_params
+        )
+        first = next(result.get_points(), {})
+
+        result = self.client.query(
+            f"select {', '.join(TICK_COLUMNS)} from tick_data{condition};",
+            bind_params=bind_params,
+            epoch="u"
+        )
+        values = get_raw_values(result)
+
+        return rows_to_batch(
+            TickBatch,
+            symbol,
+            exchange,
+            map(tuple, values),
+            count=len(values),
+            name=first.get("name", "")
+        )
+
     def delete_bar_data(
         self,
         symbol: str,
@@ -430,4 +520,14 @@ class InfluxdbDatabase(BaseDatabase):
         return dt
 
 
+def get_raw_values(result: ResultSet) -> List[list]:
+    """
+    Get rows of query result as lists of values, with time first.
+    """
+    series = result.raw.get("series", [])
+    if not series:
+        return []
+    return series[0]["values"]
+
+
 database_manager = InfluxdbDatabase()
@@ -1,6 +1,7 @@
 """"""
 from datetime import datetime
-from typing import List
+from operator import itemgetter
+from typing import List, Sequence
 
 from mongoengine import (
     Document,
@@ -14,12 +15,20 @@ from mongoengine import (
 from mongoengine.errors import DoesNotExist
 
 from vnpy.trader.constant import Exchange, Interval
-from vnpy.trader.object import BarData, TickData
+from vnpy.trader.object import (
+    BarData,
+    TickData,
+    BarBatch,
+    TickBatch,
+    BAR_COLUMNS,
+    TICK_COLUMNS
+)
 from vnpy.trader.database import (
     BaseDatabase,
     BarOverview,
     DB_TZ,
-    convert_tz
+    convert_tz,
+    rows_to_batch
 )
 from vnpy.trader.setting import SETTINGS
 
@@ -212,7 +221,6 @@ class MongodbDatabase(BaseDatabase):
 
             d = tick.__dict__
             d["exchange"] = d["exchange"].value
-            d["interval"] = d["interval"].value
             d.pop("gateway_name")
             d.pop("vt_symbol")
             param = to_update_param(d)
@@ -278,6 +286,73 @@ class MongodbDatabase(BaseDatabase):
 
         return ticks
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarBatch:
+        """
+        Fetch documents with raw pymongo cursor into arrays, without
+        creating document objects.
+        """
+        match = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "interval": interval.value,
+            "datetime": {"$gte": convert_tz(start), "$lte": convert_tz(end)},
+        }
+
+        cursor = DbBarData._get_collection().aggregate(
+            get_array_pipeline(match, BAR_COLUMNS)
+        )
+        rows = map(itemgetter("datetime", *BAR_COLUMNS), cursor)
+
+        return rows_to_batch(
+            BarBatch,
+            symbol,
+            exchange,
+            rows,
+            datetime_unit="ms",
+            interval=interval
+        )
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickBatch:
+        """
+        Fetch documents with raw pymongo cursor into arrays, without
+        creating document objects.
+        """
+        match = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "datetime": {"$gte": convert_tz(start), "$lte": convert_tz(end)},
+        }
+
+        collection = DbTickData._get_collection()
+
+        # Name is the same for all ticks of symbol
+        first = collection.find_one(match, {"name": 1}) or {}
+
+        cursor = collection.aggregate(get_array_pipeline(match, TICK_COLUMNS))
+        rows = map(itemgetter("datetime", *TICK_COLUMNS), cursor)
+
+        return rows_to_batch(
+            TickBatch,
+            symbol,
+            exchange,
+            rows,
+            datetime_unit="ms",
+            name=first.get("name", "")
+        )
+
     def delete_bar_data(
         self,
         symbol: str,
@@ -389,4 +464,21 @@ def to_update_param(d: dict) -> dict:
     return param
 
 
+def get_array_pipeline(match: dict, columns: Sequence[str]) -> List[dict]:
+    """
+    Get aggregation pipeline which sorts matched documents by datetime and
+    projects datetime as milliseconds since epoch, which is much faster to
+    convert into array than datetime objects. Missing value is set to zero.
+    """
+    project = {"_id": 0, "datetime": {"$toLong": "$datetime"}}
+    for column in columns:
+        project[column] = {"$ifNull": [f"${column}", 0]}
+
+    return [
+        {"$match": match},
+        {"$sort": {"datetime": 1}},
+        {"$project": project},
+    ]
+
+
 database_manager = MongodbDatabase()
@@ -15,12 +15,20 @@ from peewee import (
 )
 
 from vnpy.trader.constant import Exchange, Interval
-from vnpy.trader.object import BarData, TickData
+from vnpy.trader.object import (
+    BarData,
+    TickData,
+    BarBatch,
+    TickBatch,
+    BAR_COLUMNS,
+    TICK_COLUMNS
+)
 from vnpy.trader.database import (
     BaseDatabase,
     BarOverview,
     DB_TZ,
-    convert_tz
+    convert_tz,
+    rows_to_batch
 )
 from vnpy.trader.setting import SETTINGS
 
@@ -205,7 +213,6 @@ class PostgresqlDatabase(BaseDatabase):
 
             d = tick.__dict__
             d["exchange"] = d["exchange"].value
-            d["interval"] = d["interval"].value
             d.pop("gateway_name")
             d.pop("vt_symbol")
             data.append(d)
@@ -281,6 +288,81 @@ class PostgresqlDatabase(BaseDatabase):
 
         return ticks
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarBatch:
+        """
+        Fetch rows with raw cursor into arrays, without creating model objects.
+        """
+        # Datetime is fetched as microseconds since epoch, which is much
+        # faster to convert into array than datetime objects
+        s: ModelSelect = (
+            DbBarData.select(
+                (fn.date_part("epoch", DbBarData.datetime) * 1_000_000).cast("bigint"),
+                *[getattr(DbBarData, column) for column in BAR_COLUMNS]
+            ).where(
+                (DbBarData.symbol == symbol)
+                & (DbBarData.exchange == exchange.value)
+                & (DbBarData.interval == interval.value)
+                & (DbBarData.datetime >= start)
+                & (DbBarData.datetime <= end)
+            ).order_by(DbBarData.datetime)
+        )
+
+        cursor = self.db.execute(s)
+        return rows_to_batch(
+            BarBatch,
+            symbol,
+            exchange,
+            cursor,
+            datetime_unit="us",
+            interval=interval
+        )
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickBatch:
+        """
+        Fetch rows with raw cursor into arrays, without creating model objects.
+        """
+        condition = (
+            (DbTickData.symbol == symbol)
+            & (DbTickData.exchange == exchange.value)
+            & (DbTickData.datetime >= start)
+            & (DbTickData.datetime <= end)
+        )
+
+        # Datetime is fetched as microseconds since epoch, which is much
+        # faster to convert into array than datetime objects
+        s: ModelSelect = (
+            DbTickData.select(
+                (fn.date_part("epoch", DbTickData.datetime) * 1_000_000).cast("bigint"),
+                *[getattr(DbTickData, column) for column in TICK_COLUMNS]
+            ).where(condition).order_by(DbTickData.datetime)
+        )
+
+        # Name is the same for all ticks of symbol
+        name = DbTickData.select(DbTickData.name).where(condition).limit(1).scalar()
+
+        cursor = self.db.execute(s)
+        return rows_to_batch(
+            TickBatch,
+            symbol,
+            exchange,
+            cursor,
+            datetime_unit="us",
+            name=name or ""
+        )
+
     def delete_bar_data(
         self,
         symbol: str,
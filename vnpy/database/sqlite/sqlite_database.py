@@ -16,13 +16,21 @@ from peewee import (
 )
 
 from vnpy.trader.constant import Exchange, Interval
-from vnpy.trader.object import BarData, TickData
+from vnpy.trader.object import (
+    BarData,
+    TickData,
+    BarBatch,
+    TickBatch,
+    BAR_COLUMNS,
+    TICK_COLUMNS
+)
 from vnpy.trader.utility import get_file_path
 from vnpy.trader.database import (
     BaseDatabase,
     BarOverview,
     DB_TZ,
-    convert_tz
+    convert_tz,
+    rows_to_batch
 )
 
 
@@ -193,7 +201,6 @@ class SqliteDatabase(BaseDatabase):
 
             d = tick.__dict__
             d["exchange"] = d["exchange"].value
-            d["interval"] = d["interval"].value
             d.pop("gateway_name")
             d.pop("vt_symbol")
             data.append(d)
@@ -262,6 +269,75 @@ class SqliteDatabase(BaseDatabase):
 
         return ticks
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarBatch:
+        """
+        Fetch rows with raw cursor into arrays, without creating model objects.
+        """
+        s: ModelSelect = (
+            DbBarData.select(
+                DbBarData.datetime,
+                *[getattr(DbBarData, column) for column in BAR_COLUMNS]
+            ).where(
+                (DbBarData.symbol == symbol)
+                & (DbBarData.exchange == exchange.value)
+                & (DbBarData.interval == interval.value)
+                & (DbBarData.datetime >= start)
+                & (DbBarData.datetime <= end)
+            ).order_by(DbBarData.datetime)
+        )
+
+        cursor = self.db.execute(s)
+        return rows_to_batch(
+            BarBatch,
+            symbol,
+            exchange,
+            cursor,
+            interval=interval
+        )
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickBatch:
+        """
+        Fetch rows with raw cursor into arrays, without creating model objects.
+        """
+        condition = (
+            (DbTickData.symbol == symbol)
+            & (DbTickData.exchange == exchange.value)
+            & (DbTickData.datetime >= start)
+            & (DbTickData.datetime <= end)
+        )
+
+        s: ModelSelect = (
+            DbTickData.select(
+                DbTickData.datetime,
+                *[getattr(DbTickData, column) for column in TICK_COLUMNS]
+            ).where(condition).order_by(DbTickData.datetime)
+        )
+
+        # Name is the same for all ticks of symbol
+        name = DbTickData.select(DbTickData.name).where(condition).limit(1).scalar()
+
+        cursor = self.db.execute(s)
+        return rows_to_batch(
+            TickBatch,
+            symbol,
+            exchange,
+            cursor,
+            name=name or ""
+        )
+
     def delete_bar_data(
         self,
         symbol: str,
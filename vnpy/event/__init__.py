@@ -1 +1,8 @@
-from .engine import Event, EventEngine, EVENT_TIMER
+from .engine import (
+    Event,
+    EventEngine,
+    LaneEventEngine,
+    EVENT_TIMER,
+    EVENT_STATS,
+    LANE_DEFAULT
+)
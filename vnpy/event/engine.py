@@ -2,13 +2,20 @@
 Event-driven framework of vn.py framework.
 """
 
-from collections import defaultdict
+from collections import defaultdict, deque
+from operator import attrgetter
 from queue import Empty, Queue
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, List
+from threading import Lock, Semaphore, Thread
+from time import perf_counter, sleep, time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .stats import EventStats
 
 EVENT_TIMER = "eTimer"
+EVENT_STATS = "eEventStats"
+
+LANE_DEFAULT = "default"
+LANE_QUANTUM = 100
 
 
 class Event:
@@ -16,17 +23,96 @@ class Event:
     Event object consists of a type string which is used
     by event engine for distributing event, and a data
     object which contains the real data.
+
+    An optional routing key (e.g. vt_symbol) can be given, then
+    the event is also distributed to handlers registered with
+    the same type and key.
     """
 
-    def __init__(self, type: str, data: Any = None):
+    key: str = ""
+
+    def __init__(self, type: str, data: Any = None, key: str = ""):
         """"""
         self.type: str = type
         self.data: Any = data
+        self.key: str = key
+
+
+def drain_queue(queue: Queue) -> deque:
+    """
+    Take all pending items out of queue in one go.
+    """
+    with queue.mutex:
+        items = queue.queue
+        queue.queue = deque()
+    return items
+
+
+class ConflatedEvent(Event):
+    """
+    Marker event put into queue when a new key of a conflated event type
+    becomes pending. The data is the key, and the newest event of the key
+    is fetched from conflator when the marker is processed.
+    """
+
+    pass
 
 
 # Defines handler function to be used in event engine.
 HandlerType = Callable[[Event], None]
 
+# Defines function to get conflation key from event.
+KeyType = Callable[[Event], Hashable]
+
+# Conflate events by vt_symbol of event data by default.
+default_key: KeyType = attrgetter("data.vt_symbol")
+
+
+class EventConflator:
+    """
+    Keeps only the newest pending event of each key for a specific
+    event type, and distributes it to conflating handlers.
+    """
+
+    def __init__(self, key: KeyType):
+        """"""
+        self.key: KeyType = key
+        self.handlers: Tuple[HandlerType, ...] = ()
+        self.pending: Dict[Hashable, Event] = {}
+        self.lock: Lock = Lock()
+
+    def update(self, event: Event) -> Optional[Hashable]:
+        """
+        Store event as the newest one of its key. Return the key if it
+        was not pending before, which means a marker should be queued.
+        """
+        key = self.key(event)
+
+        with self.lock:
+            new = key not in self.pending
+            self.pending[key] = event
+
+        if new:
+            return key
+        return None
+
+    def pop(self, key: Hashable) -> Optional[Event]:
+        """
+        Remove and return the newest pending event of key.
+        """
+        with self.lock:
+            return self.pending.pop(key, None)
+
+    def process(self, key: Hashable) -> None:
+        """
+        Distribute the newest event of key to conflating handlers.
+        """
+        event = self.pop(key)
+
+        if event:
+            for handler in self.handlers:
+                handler(event)
+
 
 class EventEngine:
     """
@@ -49,17 +135,31 @@ class EventEngine:
         self._timer: Thread = Thread(target=self._run_timer)
         self._handlers: defaultdict = defaultdict(list)
         self._general_handlers: List = []
+        self._handler_cache: Dict[str, Dict[str, Tuple[HandlerType, ...]]] = {}
+        self._conflators: Dict[str, EventConflator] = {}
+
+        self._stats: Optional[EventStats] = None
+        self._stats_interval: int = 0
+        self._stats_time: float = 0
 
     def _run(self) -> None:
         """
-        Get event from queue and then process it.
+        Get event from queue and then process it, together with all
+        other events pending in queue.
         """
+        queue = self._queue
+
         while self._active:
             try:
-                event = self._queue.get(block=True, timeout=1)
-                self._process(event)
+                event = queue.get(block=True, timeout=1)
             except Empty:
-                pass
+                continue
+
+            self._process(event)
+
+            if queue.qsize():
+                for event in drain_queue(queue):
+                    self._process(event)
 
     def _process(self, event: Event) -> None:
         """
@@ -68,12 +168,92 @@ class EventEngine:
 
         Then distrubute event to those general handlers which listens
         to all types.
+
+        Marker of conflated event is only distributed to conflating
+        handlers of its type.
         """
-        if event.type in self._handlers:
-            [handler(event) for handler in self._handlers[event.type]]
+        if isinstance(event, ConflatedEvent):
+            conflator = self._conflators.get(event.type, None)
+            if conflator:
+                conflator.process(event.data)
+            return
+
+        cache = self._handler_cache.get(event.type, None)
+        if cache:
+            handlers = cache.get(event.key, None)
+        else:
+            handlers = None
 
-        if self._general_handlers:
-            [handler(event) for handler in self._general_handlers]
+        if handlers is None:
+            handlers = self._get_handlers(event.type, event.key)
+
+        for handler in handlers:
+            handler(event)
+
+    def _get_handlers(self, type: str, key: str = "") -> Tuple[HandlerType, ...]:
+        """
+        Get snapshot of handlers of type, then handlers of type and key,
+        followed by general handlers. The snapshot is cached until any
+        handler registered or unregistered.
+        """
+        cache = self._handler_cache.setdefault(type, {})
+        handlers = cache.get(key, None)
+
+        if handlers is None:
+            handlers = tuple(self._handlers.get(type, []))
+            if key:
+                handlers += tuple(self._handlers.get(type + key, []))
+            handlers += tuple(self._general_handlers)
+
+            cache[key] = handlers
+
+        return handlers
+
+    def _process_instrumented(self, event: Event) -> None:
+        """
+        Same as _process, but records dispatch delay and execution
+        time of every handler.
+        """
+        stats = self._stats
+        type = event.type
+
+        put_time = event.__dict__.get("put_time", None)
+        if put_time:
+            stats.record_delay(type, perf_counter() - put_time)
+
+        if isinstance(event, ConflatedEvent):
+            conflator = self._conflators.get(type, None)
+            if not conflator:
+                return
+
+            event = conflator.pop(event.data)
+            if not event:
+                return
+
+            handlers = conflator.handlers
+        else:
+            handlers = self._get_handlers(type, event.key)
+
+        for handler in handlers:
+            start = perf_counter()
+            handler(event)
+            stats.record_handler(type, handler, perf_counter() - start)
+
+        if type == EVENT_TIMER:
+            self._check_stats_report()
+
+    def _check_stats_report(self) -> None:
+        """
+        Put stats event if report interval passed.
+        """
+        now = time()
+        if now - self._stats_time < self._stats_interval:
+            return
+        self._stats_time = now
+
+        self._stats.record_depth(self.get_queue_depth())
+        event = Event(EVENT_STATS, self._stats.get_report(drain=True))
+        self.put(event)
 
     def _run_timer(self) -> None:
         """
@@ -103,26 +283,102 @@ class EventEngine:
     def put(self, event: Event) -> None:
         """
         Put an event object into event queue.
+
+        For event type with conflating handlers, only one marker per
+        pending key is queued for them, and the event itself is skipped
+        if no other handler needs it.
+        """
+        conflator = self._conflators.get(event.type, None)
+
+        if conflator:
+            key = conflator.update(event)
+            if key is not None:
+                self._put(ConflatedEvent(event.type, key))
+
+            if not self._get_handlers(event.type, event.key):
+                return
+
+        self._put(event)
+
+    def _put(self, event: Event) -> None:
+        """
+        Put an event object into event queue without conflation.
         """
         self._queue.put(event)
 
-    def register(self, type: str, handler: HandlerType) -> None:
+    def _put_instrumented(self, event: Event) -> None:
+        """
+        Same as _put, but records put time of event and queue depth.
+        """
+        event.put_time = perf_counter()
+        type(self)._put(self, event)
+        self._stats.record_depth(self.get_queue_depth())
+
+    def get_queue_depth(self) -> int:
+        """
+        Get number of events waiting in queue.
+        """
+        return self._queue.qsize()
+
+    def enable_stats(self, interval: int = 10, budget: float = 0.01) -> None:
+        """
+        Start recording queue depth, dispatch delay and handler execution
+        time. Stats event is put every interval seconds, and handler
+        calls costing more than budget seconds are reported as slow.
+
+        Instrumented functions are only swapped in when enabled, so
+        there is no extra cost when disabled.
+        """
+        self._stats = EventStats(budget)
+        self._stats_interval = interval
+        self._stats_time = time()
+
+        self._put = self._put_instrumented
+        self._process = self._process_instrumented
+
+    def disable_stats(self) -> None:
+        """
+        Stop recording stats.
+        """
+        self.__dict__.pop("_put", None)
+        self.__dict__.pop("_process", None)
+
+        self._stats = None
+
+    def get_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get report of stats recorded, or None if stats not enabled.
+        """
+        if not self._stats:
+            return None
+
+        self._stats.record_depth(self.get_queue_depth())
+        return self._stats.get_report()
+
+    def register(self, type: str, handler: HandlerType, key: str = "") -> None:
         """
         Register a new handler function for a specific event type. Every
         function can only be registered once for each event type.
+
+        If key is given, handler only receives events of this type put
+        with the same key, which is the same as registering for type
+        string of type + key.
         """
-        handler_list = self._handlers[type]
+        handler_list = self._handlers[type + key]
         if handler not in handler_list:
             handler_list.append(handler)
+            self._handler_cache.clear()
 
-    def unregister(self, type: str, handler: HandlerType) -> None:
+    def unregister(self, type: str, handler: HandlerType, key: str = "") -> None:
         """
         Unregister an existing handler function from event engine.
         """
+        type = type + key
         handler_list = self._handlers[type]
 
         if handler in handler_list:
             handler_list.remove(handler)
+            self._handler_cache.clear()
 
         if not handler_list:
             self._handlers.pop(type)
@@ -134,6 +390,7 @@ class EventEngine:
         """
         if handler not in self._general_handlers:
             self._general_handlers.append(handler)
+            self._handler_cache.clear()
 
     def unregister_general(self, handler: HandlerType) -> None:
         """
@@ -141,3 +398,211 @@ class EventEngine:
         """
         if handler in self._general_handlers:
             self._general_handlers.remove(handler)
+            self._handler_cache.clear()
+
+    def register_conflated(
+        self,
+        type: str,
+        handler: HandlerType,
+        key: KeyType = default_key
+    ) -> None:
+        """
+        Register a new conflating handler function for a specific event type.
+
+        When events are put faster than they are processed, a conflating
+        handler only receives the newest pending event of each key (vt_symbol
+        of event data by default), and superseded events are skipped.
+        The key function of the first registration is used for each type.
+        """
+        conflator = self._conflators.get(type, None)
+        if not conflator:
+            conflator = EventConflator(key)
+            self._conflators[type] = conflator
+
+        if handler not in conflator.handlers:
+            conflator.handlers += (handler,)
+
+    def unregister_conflated(self, type: str, handler: HandlerType) -> None:
+        """
+        Unregister an existing conflating handler function.
+        """
+        conflator = self._conflators.get(type, None)
+        if not conflator:
+            return
+
+        if handler in conflator.handlers:
+            conflator.handlers = tuple(
+                h for h in conflator.handlers if h != handler
+            )
+
+        if not conflator.handlers:
+            self._conflators.pop(type)
+
+
+class EventLane:
+    """
+    Lane of a LaneEventEngine, which holds events routed into it.
+
+    Events in the same lane are processed in the order they were put.
+    """
+
+    def __init__(self, name: str, priority: int, quantum: int):
+        """
+        Lower priority value means higher priority. Quantum is the
+        number of events processed from the lane in every round.
+        """
+        self.name: str = name
+        self.priority: int = priority
+        self.quantum: int = quantum
+
+        self.queue: deque = deque()
+        self.credit: int = quantum
+
+
+class LaneEventEngine(EventEngine):
+    """
+    Event engine which routes events into several lanes by type prefix,
+    so that events in a lane with higher priority (e.g. order and trade)
+    are not queued behind a burst of events in another lane (e.g. market
+    data).
+
+    Threading contract is the same as EventEngine: all handlers are called
+    from the single event thread, one event at a time, so components
+    (OmsEngine, CtaEngine, strategies, etc.) need no extra locking. Lanes
+    only decide the processing order of pending events.
+
+    Pending events are processed in rounds. In every round, each lane can
+    process up to its quantum of events, and the next event is always
+    taken from the lane with the highest priority among those with both
+    pending events and credit left. So a lane with higher priority jumps
+    ahead of the backlog of lower lanes, while lower lanes (e.g. timer and
+    log) still make progress in every round and are never starved.
+    """
+
+    def __init__(
+        self,
+        interval: int = 1,
+        lanes: Dict[str, int] = None,
+        routes: Dict[str, str] = None,
+        default_lane: str = LANE_DEFAULT,
+        quantum: int = LANE_QUANTUM
+    ):
+        """
+        lanes: dict of lane name and priority, lower value has higher priority.
+        routes: dict of event type prefix and lane name.
+        default_lane: lane for events not matching any route.
+        quantum: number of events processed from each lane in every round.
+        """
+        super().__init__(interval)
+
+        self._quantum: int = quantum
+        self._lanes: Dict[str, EventLane] = {}
+        self._lane_order: List[EventLane] = []
+        self._routes: Dict[str, str] = {}
+        self._route_cache: Dict[str, EventLane] = {}
+        self._default_lane: str = default_lane
+
+        # Count of pending events in all lanes
+        self._pending: Semaphore = Semaphore(0)
+
+        if lanes:
+            for name, priority in lanes.items():
+                self.add_lane(name, priority)
+
+        if default_lane not in self._lanes:
+            lowest = max([lane.priority for lane in self._lanes.values()], default=0)
+            self.add_lane(default_lane, lowest + 1)
+
+        if routes:
+            for prefix, name in routes.items():
+                self.add_route(prefix, name)
+
+    def add_lane(self, name: str, priority: int = 0, quantum: int = 0) -> None:
+        """
+        Add a new lane. Lanes can only be added before engine started.
+        Quantum of engine is used if not specified.
+        """
+        if self._active:
+            raise RuntimeError("Cannot add lane after event engine started")
+
+        self._lanes[name] = EventLane(name, priority, quantum or self._quantum)
+        self._lane_order = sorted(
+            self._lanes.values(),
+            key=attrgetter("priority")
+        )
+
+    def add_route(self, prefix: str, name: str) -> None:
+        """
+        Route all event types starting with prefix into lane.
+        The longest matching prefix decides the lane of an event type.
+        """
+        if name not in self._lanes:
+            raise KeyError(f"Event lane {name} not found")
+
+        self._routes[prefix] = name
+        self._route_cache.clear()
+
+    def get_lane(self, type: str) -> EventLane:
+        """
+        Get the lane which event type is routed into.
+        """
+        lane = self._route_cache.get(type, None)
+
+        if not lane:
+            name = self._default_lane
+            matched = ""
+
+            for prefix, lane_name in self._routes.items():
+                if type.startswith(prefix) and len(prefix) > len(matched):
+                    name = lane_name
+                    matched = prefix
+
+            lane = self._lanes[name]
+            self._route_cache[type] = lane
+
+        return lane
+
+    def _run(self) -> None:
+        """
+        Wait for pending event, then take it from the lane chosen and
+        process it.
+        """
+        pending = self._pending
+
+        while self._active:
+            if not pending.acquire(timeout=1):
+                continue
+
+            event = self._next_event()
+            self._process(event)
+
+    def _next_event(self) -> Event:
+        """
+        Take next event from the lane with the highest priority among
+        those with both pending events and credit left. Start a new
+        round when all lanes with pending events used up their credit.
+
+        Called only after a pending event is acquired, so that there is
+        always an event in some lane.
+        """
+        while True:
+            for lane in self._lane_order:
+                if lane.queue and lane.credit > 0:
+                    lane.credit -= 1
+                    return lane.queue.popleft()
+
+            for lane in self._lane_order:
+                lane.credit = lane.quantum
+
+    def _put(self, event: Event) -> None:
+        """
+        Put an event object into queue of the lane it is routed into.
+        """
+        self.get_lane(event.type).queue.append(event)
+        self._pending.release()
+
+    def get_queue_depth(self) -> int:
+        """
+        Get number of events waiting in queues of all lanes.
+        """
+        return sum([len(lane.queue) for lane in self._lanes.values()])
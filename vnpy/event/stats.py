@@ -0,0 +1,188 @@
+"""
+Instrumentation of event engine.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+# Number of log2 microsecond buckets, the last one covers about 35 minutes.
+HISTOGRAM_BUCKETS = 32
+
+# Max number of slow handler calls kept between two reports.
+SLOW_CALLS_LIMIT = 1000
+
+
+def get_handler_name(handler: Callable) -> str:
+    """
+    Get qualified name of handler function.
+    """
+    name = getattr(handler, "__qualname__", None)
+    if not name:
+        return repr(handler)
+
+    module = getattr(handler, "__module__", None)
+    if module:
+        return f"{module}.{name}"
+    return name
+
+
+class LatencyHistogram:
+    """
+    Histogram of latency with log2 buckets in microseconds.
+
+    Bucket 0 counts latency below 1us, and bucket n counts latency
+    in [2^(n-1), 2^n) us.
+    """
+
+    def __init__(self):
+        """"""
+        self.buckets: List[int] = [0] * HISTOGRAM_BUCKETS
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+
+    def add(self, seconds: float) -> None:
+        """
+        Add one latency sample in seconds.
+        """
+        index = int(seconds * 1_000_000).bit_length()
+        if index >= HISTOGRAM_BUCKETS:
+            index = HISTOGRAM_BUCKETS - 1
+
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get upper bound of the bucket which contains the percentile, in seconds.
+        """
+        if not self.count:
+            return 0
+
+        target = self.count * percent / 100
+        accumulated = 0
+
+        for index, count in enumerate(self.buckets):
+            accumulated += count
+            if accumulated >= target:
+                return min((1 << index) / 1_000_000, self.max)
+
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert histogram into plain dict.
+        """
+        if self.count:
+            mean = self.total / self.count
+        else:
+            mean = 0
+
+        return {
+            "count": self.count,
+            "mean": mean,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": list(self.buckets),
+        }
+
+
+class EventStats:
+    """
+    Records queue depth, enqueue-to-dispatch delay and handler execution
+    time of event engine.
+
+    Records are updated without lock, so counts may be slightly inaccurate
+    when events are processed by several threads.
+    """
+
+    def __init__(self, budget: float):
+        """
+        Handler call costing more than budget seconds is recorded as slow.
+        """
+        self.budget: float = budget
+        self.start_time: datetime = datetime.now()
+
+        self.event_count: int = 0
+        self.queue_depth: int = 0
+        self.max_queue_depth: int = 0
+
+        self.delays: Dict[str, LatencyHistogram] = {}
+        self.handlers: Dict[Tuple[str, Callable], LatencyHistogram] = {}
+        self.slow_calls: List[Dict[str, Any]] = []
+
+    def record_depth(self, depth: int) -> None:
+        """"""
+        self.queue_depth = depth
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def record_delay(self, type: str, seconds: float) -> None:
+        """"""
+        self.event_count += 1
+
+        histogram = self.delays.get(type, None)
+        if not histogram:
+            histogram = self.delays.setdefault(type, LatencyHistogram())
+        histogram.add(seconds)
+
+    def record_handler(self, type: str, handler: Callable, seconds: float) -> None:
+        """"""
+        key = (type, handler)
+        histogram = self.handlers.get(key, None)
+        if not histogram:
+            histogram = self.handlers.setdefault(key, LatencyHistogram())
+        histogram.add(seconds)
+
+        if seconds > self.budget and len(self.slow_calls) < SLOW_CALLS_LIMIT:
+            self.slow_calls.append({
+                "type": type,
+                "handler": get_handler_name(handler),
+                "cost": seconds,
+                "datetime": datetime.now(),
+            })
+
+    def get_report(self, drain: bool = False) -> Dict[str, Any]:
+        """
+        Generate report of all records as plain dict, which can be
+        transferred over RPC.
+
+        Slow calls recorded since last drain are included. Only the
+        periodic stats report should drain them, so that polling report
+        never takes slow calls away from it.
+        """
+        if drain:
+            slow_calls = self.slow_calls
+            self.slow_calls = []
+        else:
+            slow_calls = list(self.slow_calls)
+
+        delays = {
+            type: histogram.to_dict()
+            for type, histogram in list(self.delays.items())
+        }
+
+        handlers = []
+        for (type, handler), histogram in list(self.handlers.items()):
+            d = histogram.to_dict()
+            d["type"] = type
+            d["handler"] = get_handler_name(handler)
+            handlers.append(d)
+
+        handlers.sort(key=lambda d: d["count"] * d["mean"], reverse=True)
+
+        return {
+            "start_time": self.start_time,
+            "datetime": datetime.now(),
+            "budget": self.budget,
+            "event_count": self.event_count,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "delays": delays,
+            "handlers": handlers,
+            "slow_calls": slow_calls,
+        }
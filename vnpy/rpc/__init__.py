@@ -205,6 +205,10 @@ class RpcClient:
         # Request socket (Request–reply pattern)
         self.__socket_req: zmq.Socket = self.__context.socket(zmq.REQ)
 
+        # Allow new request after timeout, and drop reply of the old one
+        self.__socket_req.setsockopt(zmq.REQ_RELAXED, 1)
+        self.__socket_req.setsockopt(zmq.REQ_CORRELATE, 1)
+
         # Subscribe socket (Publish–subscribe pattern)
         self.__socket_sub: zmq.Socket = self.__context.socket(zmq.SUB)
 
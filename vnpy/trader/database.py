@@ -1,12 +1,14 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List
+from typing import Iterable, List
 from pytz import timezone
 from dataclasses import dataclass
 from importlib import import_module
 
+import numpy as np
+
 from .constant import Interval, Exchange
-from .object import BarData, TickData
+from .object import BarData, TickData, DataBatch, BarBatch, TickBatch
 from .setting import SETTINGS
 
 
@@ -21,6 +23,43 @@ def convert_tz(dt: datetime) -> datetime:
     return dt.replace(tzinfo=None)
 
 
+def rows_to_batch(
+    batch_class: type,
+    symbol: str,
+    exchange: Exchange,
+    rows: Iterable[tuple],
+    datetime_unit: str = "us",
+    count: int = -1,
+    **kwargs
+) -> DataBatch:
+    """
+    Create batch from rows of (datetime, *batch_class.columns) fetched by
+    raw database cursor, without creating any data object.
+
+    Datetime is wall time in DB_TZ, either as ISO format string or as
+    integer since epoch in datetime_unit. Null value is filled with zero.
+    """
+    dtype = [("datetime", f"datetime64[{datetime_unit}]")]
+    dtype.extend((column, np.float64) for column in batch_class.columns)
+
+    records = np.fromiter(rows, dtype=dtype, count=count)
+
+    arrays = {}
+    for column in batch_class.columns:
+        array = np.ascontiguousarray(records[column])
+        arrays[column] = np.nan_to_num(array, copy=False)
+
+    return batch_class(
+        symbol=symbol,
+        exchange=exchange,
+        datetime=np.ascontiguousarray(records["datetime"]),
+        arrays=arrays,
+        tz=DB_TZ,
+        gateway_name="DB",
+        **kwargs
+    )
+
+
 @dataclass
 class BarOverview:
     """
@@ -81,6 +120,45 @@ class BaseDatabase(ABC):
         """
         pass
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarBatch:
+        """
+        Load bar data from database into columnar batch.
+
+        Database should override it to fetch rows into arrays directly,
+        the default one converts result of load_bar_data.
+        """
+        bars = self.load_bar_data(symbol, exchange, interval, start, end)
+
+        if not bars:
+            return rows_to_batch(BarBatch, symbol, exchange, [], interval=interval)
+        return BarBatch.from_list(bars, interval=interval)
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickBatch:
+        """
+        Load tick data from database into columnar batch.
+
+        Database should override it to fetch rows into arrays directly,
+        the default one converts result of load_tick_data.
+        """
+        ticks = self.load_tick_data(symbol, exchange, start, end)
+
+        if not ticks:
+            return rows_to_batch(TickBatch, symbol, exchange, [])
+        return TickBatch.from_list(ticks)
+
     @abstractmethod
     def delete_bar_data(
         self,
@@ -12,7 +12,7 @@ from queue import Empty, Queue
 from threading import Thread
 from typing import Any, Sequence, Type, Dict, List, Optional
 
-from vnpy.event import Event, EventEngine
+from vnpy.event import Event, EventEngine, LaneEventEngine
 from .app import BaseApp
 from .event import (
     EVENT_TICK,
@@ -21,7 +21,10 @@ from .event import (
     EVENT_POSITION,
     EVENT_ACCOUNT,
     EVENT_CONTRACT,
-    EVENT_LOG
+    EVENT_LOG,
+    EVENT_STATS,
+    EVENT_LANES,
+    EVENT_ROUTES
 )
 from .gateway import BaseGateway
 from .object import (
@@ -52,8 +55,19 @@ class MainEngine:
         """"""
         if event_engine:
             self.event_engine: EventEngine = event_engine
+        elif SETTINGS["event.lanes"]:
+            self.event_engine = LaneEventEngine(
+                lanes=EVENT_LANES,
+                routes=EVENT_ROUTES
+            )
         else:
             self.event_engine = EventEngine()
+
+        if SETTINGS["event.stats"]:
+            self.event_engine.enable_stats(
+                SETTINGS["event.stats_interval"],
+                SETTINGS["event.stats_budget"]
+            )
         self.event_engine.start()
 
         self.gateways: Dict[str, BaseGateway] = {}
@@ -157,6 +171,12 @@ class MainEngine:
         """
         return self.exchanges
 
+    def get_event_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get stats report of event engine, None if stats not enabled.
+        """
+        return self.event_engine.get_stats()
+
     def connect(self, setting: dict, gateway_name: str) -> None:
         """
         Start connection of a specific gateway.
@@ -319,6 +339,7 @@ class LogEngine(BaseEngine):
     def register_event(self) -> None:
         """"""
         self.event_engine.register(EVENT_LOG, self.process_log_event)
+        self.event_engine.register(EVENT_STATS, self.process_stats_event)
 
     def process_log_event(self, event: Event) -> None:
         """
@@ -327,6 +348,19 @@ class LogEngine(BaseEngine):
         log = event.data
         self.logger.log(log.level, log.msg)
 
+    def process_stats_event(self, event: Event) -> None:
+        """
+        Output handlers exceeding budget in event stats report.
+        """
+        report = event.data
+
+        for call in report["slow_calls"]:
+            msg = (
+                f"事件处理超时：{call['handler']}，类型{call['type']}，"
+                f"耗时{call['cost'] * 1000:.3f}ms"
+            )
+            self.logger.warning(msg)
+
 
 class OmsEngine(BaseEngine):
     """
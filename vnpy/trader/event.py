@@ -2,7 +2,7 @@
 Event type string used in VN Trader.
 """
 
-from vnpy.event import EVENT_TIMER  # noqa
+from vnpy.event import EVENT_TIMER, EVENT_STATS, LANE_DEFAULT  # noqa
 
 EVENT_TICK = "eTick."
 EVENT_TRADE = "eTrade."
@@ -11,3 +11,21 @@ EVENT_POSITION = "ePosition."
 EVENT_ACCOUNT = "eAccount."
 EVENT_CONTRACT = "eContract."
 EVENT_LOG = "eLog"
+
+# Lanes and routes used by LaneEventEngine in VN Trader.
+LANE_TRADING = "trading"
+LANE_MARKET = "market"
+
+EVENT_LANES = {
+    LANE_TRADING: 0,
+    LANE_MARKET: 1,
+    LANE_DEFAULT: 2,
+}
+
+EVENT_ROUTES = {
+    EVENT_ORDER: LANE_TRADING,
+    EVENT_TRADE: LANE_TRADING,
+    EVENT_POSITION: LANE_TRADING,
+    EVENT_ACCOUNT: LANE_TRADING,
+    EVENT_TICK: LANE_MARKET,
+}
@@ -0,0 +1,446 @@
+"""
+Streaming technical indicators with O(1) update for every new bar.
+
+Values are the same as talib functions calculated over the whole bar
+history, and are nan until enough bars have been updated.
+
+Indicators only depending on the last n bars (SMA, Boll, Donchian) also
+match ArrayManager. Recursive ones (EMA, ATR, RSI, MACD, Keltner) do not
+match am.ema, am.atr, am.rsi etc., which run talib over the ArrayManager
+window only and so are seeded from a different bar. The difference
+shrinks as size of ArrayManager grows.
+"""
+
+from collections import deque
+from math import nan, sqrt
+from typing import Deque, List, Tuple
+
+from .object import BarData
+
+
+class Indicator:
+    """
+    Base class of streaming indicator.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.inited: bool = False
+
+    def update_bar(self, bar: BarData) -> None:
+        """
+        Update new bar data into indicator.
+        """
+        raise NotImplementedError
+
+    @property
+    def value(self):
+        """
+        Get latest indicator value.
+        """
+        raise NotImplementedError
+
+
+class RollingSum:
+    """
+    Sum and sum of squares of the latest n values.
+
+    Sums are recalculated from the window every n updates, so that
+    floating point error does not accumulate.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        self.n: int = n
+        self.window: List[float] = [0.0] * n
+        self.ix: int = 0
+        self.count: int = 0
+        self.sum: float = 0
+        self.square_sum: float = 0
+
+    def update(self, value: float) -> None:
+        """"""
+        old = self.window[self.ix]
+        self.window[self.ix] = value
+
+        self.sum += value - old
+        self.square_sum += value * value - old * old
+        self.count += 1
+
+        self.ix += 1
+        if self.ix == self.n:
+            self.ix = 0
+            self.sum = sum(self.window)
+            self.square_sum = sum([v * v for v in self.window])
+
+    @property
+    def full(self) -> bool:
+        """"""
+        return self.count >= self.n
+
+    @property
+    def mean(self) -> float:
+        """"""
+        if not self.full:
+            return nan
+        return self.sum / self.n
+
+    @property
+    def std(self) -> float:
+        """
+        Population standard deviation, same as talib.STDDEV.
+        """
+        if not self.full:
+            return nan
+
+        mean = self.sum / self.n
+        variance = self.square_sum / self.n - mean * mean
+        if variance <= 0:
+            return 0
+        return sqrt(variance)
+
+
+class SmaIndicator(Indicator):
+    """
+    Simple moving average of close price, same as talib.SMA.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.rolling: RollingSum = RollingSum(n)
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.update(bar.close_price)
+
+    def update(self, value: float) -> None:
+        """"""
+        self.count += 1
+        self.rolling.update(value)
+        self.inited = self.rolling.full
+
+    @property
+    def value(self) -> float:
+        """"""
+        return self.rolling.mean
+
+
+class EmaIndicator(Indicator):
+    """
+    Exponential moving average of close price, same as talib.EMA, which
+    is seeded with the simple average of first n values.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.n: int = n
+        self.k: float = 2 / (n + 1)
+        self.seed_sum: float = 0
+        self.ema: float = nan
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.update(bar.close_price)
+
+    def update(self, value: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.inited:
+            self.ema += (value - self.ema) * self.k
+        else:
+            self.seed_sum += value
+            if self.count == self.n:
+                self.ema = self.seed_sum / self.n
+                self.inited = True
+
+    @property
+    def value(self) -> float:
+        """"""
+        return self.ema
+
+
+class WilderAverage:
+    """
+    Wilder's smoothing used by ATR and RSI, seeded with the simple
+    average of first n values.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        self.n: int = n
+        self.count: int = 0
+        self.seed_sum: float = 0
+        self.average: float = nan
+
+    def update(self, value: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.count > self.n:
+            self.average = (self.average * (self.n - 1) + value) / self.n
+        else:
+            self.seed_sum += value
+            if self.count == self.n:
+                self.average = self.seed_sum / self.n
+
+    @property
+    def full(self) -> bool:
+        """"""
+        return self.count >= self.n
+
+
+class AtrIndicator(Indicator):
+    """
+    Average true range, same as talib.ATR. The first bar is only used
+    as previous close of true range.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.average: WilderAverage = WilderAverage(n)
+        self.pre_close: float = nan
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.count += 1
+
+        if self.count > 1:
+            tr = max(
+                bar.high_price - bar.low_price,
+                abs(bar.high_price - self.pre_close),
+                abs(bar.low_price - self.pre_close)
+            )
+            self.average.update(tr)
+            self.inited = self.average.full
+
+        self.pre_close = bar.close_price
+
+    @property
+    def value(self) -> float:
+        """"""
+        return self.average.average
+
+
+class RsiIndicator(Indicator):
+    """
+    Relative strength index, same as talib.RSI.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.gain: WilderAverage = WilderAverage(n)
+        self.loss: WilderAverage = WilderAverage(n)
+        self.pre_close: float = nan
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.update(bar.close_price)
+
+    def update(self, value: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.count > 1:
+            diff = value - self.pre_close
+            self.gain.update(max(diff, 0))
+            self.loss.update(max(-diff, 0))
+            self.inited = self.gain.full
+
+        self.pre_close = value
+
+    @property
+    def value(self) -> float:
+        """"""
+        if not self.inited:
+            return nan
+
+        total = self.gain.average + self.loss.average
+        if not total:
+            return 0
+        return 100 * self.gain.average / total
+
+
+class MacdIndicator(Indicator):
+    """
+    MACD, same as talib.MACD. Value is tuple of (macd, signal, hist).
+
+    Like talib, both fast and slow EMA start at the bar when slow EMA is
+    seeded, and fast EMA is seeded with average of the latest fast values.
+    """
+
+    def __init__(self, fast_period: int, slow_period: int, signal_period: int):
+        """"""
+        super().__init__()
+
+        # Talib swaps the periods if fast period is larger
+        if slow_period < fast_period:
+            fast_period, slow_period = slow_period, fast_period
+
+        self.slow_period: int = slow_period
+        self.closes: Deque[float] = deque(maxlen=slow_period)
+
+        self.fast: EmaIndicator = EmaIndicator(fast_period)
+        self.slow: EmaIndicator = EmaIndicator(slow_period)
+        self.signal: EmaIndicator = EmaIndicator(signal_period)
+
+        self.macd: float = nan
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.update(bar.close_price)
+
+    def update(self, value: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.count < self.slow_period:
+            self.closes.append(value)
+            return
+        elif self.count == self.slow_period:
+            self.closes.append(value)
+
+            fast_values = list(self.closes)[-self.fast.n:]
+            for v in fast_values:
+                self.fast.update(v)
+            for v in self.closes:
+                self.slow.update(v)
+
+            self.closes.clear()
+        else:
+            self.fast.update(value)
+            self.slow.update(value)
+
+        self.macd = self.fast.value - self.slow.value
+        self.signal.update(self.macd)
+        self.inited = self.signal.inited
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        """"""
+        if not self.inited:
+            return nan, nan, nan
+
+        signal = self.signal.value
+        return self.macd, signal, self.macd - signal
+
+
+class BollIndicator(Indicator):
+    """
+    Bollinger band, same as ArrayManager.boll. Value is tuple of (up, down).
+    """
+
+    def __init__(self, n: int, dev: float):
+        """"""
+        super().__init__()
+        self.dev: float = dev
+        self.rolling: RollingSum = RollingSum(n)
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.count += 1
+        self.rolling.update(bar.close_price)
+        self.inited = self.rolling.full
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        """"""
+        mid = self.rolling.mean
+        std = self.rolling.std
+        return mid + std * self.dev, mid - std * self.dev
+
+
+class RollingExtreme:
+    """
+    Max or min of the latest n values with monotonic deque, which is
+    O(1) amortized for every update.
+    """
+
+    def __init__(self, n: int, maximum: bool):
+        """"""
+        self.n: int = n
+        self.maximum: bool = maximum
+        self.count: int = 0
+        self.queue: Deque[Tuple[int, float]] = deque()
+
+    def update(self, value: float) -> None:
+        """"""
+        queue = self.queue
+
+        if self.maximum:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+
+        queue.append((self.count, value))
+        self.count += 1
+
+        if queue[0][0] <= self.count - 1 - self.n:
+            queue.popleft()
+
+    @property
+    def value(self) -> float:
+        """"""
+        if self.count < self.n:
+            return nan
+        return self.queue[0][1]
+
+
+class DonchianIndicator(Indicator):
+    """
+    Donchian channel, same as ArrayManager.donchian. Value is tuple of (up, down).
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.n: int = n
+        self.high: RollingExtreme = RollingExtreme(n, True)
+        self.low: RollingExtreme = RollingExtreme(n, False)
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.count += 1
+        self.high.update(bar.high_price)
+        self.low.update(bar.low_price)
+        self.inited = self.count >= self.n
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        """"""
+        return self.high.value, self.low.value
+
+
+class KeltnerIndicator(Indicator):
+    """
+    Keltner channel, calculated as ArrayManager.keltner but with ATR over
+    all bars updated. Value is tuple of (up, down).
+    """
+
+    def __init__(self, n: int, dev: float):
+        """"""
+        super().__init__()
+        self.dev: float = dev
+        self.sma: SmaIndicator = SmaIndicator(n)
+        self.atr: AtrIndicator = AtrIndicator(n)
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.count += 1
+        self.sma.update_bar(bar)
+        self.atr.update_bar(bar)
+        self.inited = self.sma.inited and self.atr.inited
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        """"""
+        mid = self.sma.value
+        atr = self.atr.value
+        return mid + atr * self.dev, mid - atr * self.dev
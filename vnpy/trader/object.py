@@ -2,14 +2,40 @@
 Basic data structure used for general trading function in VN Trader.
 """
 
-from dataclasses import dataclass
+import pickle
+import sys
+from dataclasses import dataclass, fields
 from datetime import datetime
 from logging import INFO
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
 
 from .constant import Direction, Exchange, Interval, Offset, Status, Product, OptionType, OrderType
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 ACTIVE_STATUSES = set([Status.SUBMITTING, Status.NOTTRADED, Status.PARTTRADED])
 
+# Interned vt_symbol strings shared by all data objects.
+vt_symbols: Dict[Tuple[str, Exchange], str] = {}
+
+
+def get_vt_symbol(symbol: str, exchange: Exchange) -> str:
+    """
+    Get interned vt_symbol of symbol and exchange, so that a new string
+    is not created for every tick and bar.
+    """
+    vt_symbol = vt_symbols.get((symbol, exchange), None)
+
+    if not vt_symbol:
+        vt_symbol = sys.intern(f"{symbol}.{exchange.value}")
+        vt_symbols[(symbol, exchange)] = vt_symbol
+
+    return vt_symbol
+
 
 @dataclass
 class BaseData:
@@ -73,7 +99,7 @@ class TickData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -96,7 +122,7 @@ class BarData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -122,7 +148,7 @@ class OrderData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
         self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
 
     def is_active(self) -> bool:
@@ -164,7 +190,7 @@ class TradeData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
         self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
         self.vt_tradeid = f"{self.gateway_name}.{self.tradeid}"
 
@@ -187,7 +213,7 @@ class PositionData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
         self.vt_positionid = f"{self.vt_symbol}.{self.direction.value}"
 
 
@@ -250,7 +276,7 @@ class ContractData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -264,7 +290,7 @@ class SubscribeRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -284,7 +310,7 @@ class OrderRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
     def create_order_data(self, orderid: str, gateway_name: str) -> OrderData:
         """
@@ -317,7 +343,7 @@ class CancelRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -334,4 +360,425 @@ class HistoryRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
+
+
+def create_slotted(data_class: type, extra: Sequence[str]) -> type:
+    """
+    Create a memory-lean variant of data class, which stores fields and
+    extra attributes (e.g. vt_symbol) in __slots__ instead of __dict__.
+
+    The variant keeps the same attribute API and methods, but no other
+    attribute can be added to its objects.
+    """
+    names = tuple([f.name for f in fields(data_class)])
+    name = "Slot" + data_class.__name__
+
+    namespace = {
+        k: v for k, v in data_class.__dict__.items()
+        if k not in names and k not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names + tuple(extra)
+    namespace["__qualname__"] = name
+
+    return type(name, (object,), namespace)
+
+
+SlotTickData = create_slotted(TickData, ("vt_symbol",))
+SlotBarData = create_slotted(BarData, ("vt_symbol",))
+SlotOrderData = create_slotted(OrderData, ("vt_symbol", "vt_orderid"))
+SlotTradeData = create_slotted(TradeData, ("vt_symbol", "vt_orderid", "vt_tradeid"))
+
+SLOTTED_CLASSES: Dict[type, type] = {
+    TickData: SlotTickData,
+    BarData: SlotBarData,
+    OrderData: SlotOrderData,
+    TradeData: SlotTradeData,
+}
+
+
+def to_slotted(data: Any) -> Any:
+    """
+    Convert data object into its slotted variant.
+    """
+    slotted_class = SLOTTED_CLASSES[type(data)]
+
+    slotted = slotted_class.__new__(slotted_class)
+    for name in slotted_class.__slots__:
+        setattr(slotted, name, getattr(data, name))
+
+    # Strings loaded from database are different objects for every row
+    slotted.symbol = sys.intern(data.symbol)
+    slotted.gateway_name = sys.intern(data.gateway_name)
+
+    return slotted
+
+
+TICK_COLUMNS: Tuple[str, ...] = (
+    "volume", "open_interest", "last_price", "last_volume",
+    "limit_up", "limit_down",
+    "open_price", "high_price", "low_price", "pre_close",
+    "bid_price_1", "bid_price_2", "bid_price_3", "bid_price_4", "bid_price_5",
+    "ask_price_1", "ask_price_2", "ask_price_3", "ask_price_4", "ask_price_5",
+    "bid_volume_1", "bid_volume_2", "bid_volume_3", "bid_volume_4", "bid_volume_5",
+    "ask_volume_1", "ask_volume_2", "ask_volume_3", "ask_volume_4", "ask_volume_5",
+)
+
+BAR_COLUMNS: Tuple[str, ...] = (
+    "volume", "open_interest",
+    "open_price", "high_price", "low_price", "close_price",
+)
+
+
+# Number of rows converted at a time when iterating DataBatch.
+ITER_CHUNK_SIZE = 10_000
+
+
+def localize(dt: datetime, tz: Any) -> datetime:
+    """
+    Attach timezone to naive datetime, supporting both pytz and
+    standard tzinfo objects.
+    """
+    if not tz:
+        return dt
+    elif hasattr(tz, "localize"):
+        return tz.localize(dt)
+    else:
+        return dt.replace(tzinfo=tz)
+
+
+class DataBatch:
+    """
+    Columnar container of data of one symbol, which stores datetime
+    as naive datetime64 array (wall time in tz) and every other field
+    as float64 array.
+
+    Slicing with a slice returns a new batch sharing the same arrays
+    (zero-copy), while indexing with an integer creates the data object
+    of that row on demand.
+    """
+
+    data_class: type = None
+    columns: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        datetime: np.ndarray,
+        arrays: Dict[str, np.ndarray] = None,
+        tz: Any = None,
+        gateway_name: str = "",
+    ):
+        """
+        Missing columns in arrays are filled with zero.
+        """
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.vt_symbol: str = get_vt_symbol(symbol, exchange)
+        self.gateway_name: str = gateway_name
+        self.tz: Any = tz
+
+        self.datetime: np.ndarray = np.asarray(datetime, dtype="datetime64[us]")
+        self.arrays: Dict[str, np.ndarray] = {}
+
+        size = len(self.datetime)
+        arrays = arrays or {}
+
+        for column in self.columns:
+            array = arrays.get(column, None)
+            if array is None:
+                array = np.zeros(size)
+            else:
+                array = np.asarray(array, dtype=np.float64)
+            self.arrays[column] = array
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        """
+        Access column array as attribute, e.g. batch.close_price.
+        """
+        arrays = self.__dict__.get("arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.datetime)
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterate data objects of every row. Arrays are converted into
+        lists chunk by chunk, which is much faster than indexing rows.
+        """
+        data_class = self.data_class
+        symbol = self.symbol
+        exchange = self.exchange
+        gateway_name = self.gateway_name
+        tz = self.tz
+        extra = self.get_extra()
+        columns = list(self.arrays.keys())
+
+        for start in range(0, len(self), ITER_CHUNK_SIZE):
+            end = start + ITER_CHUNK_SIZE
+            dt_list = self.datetime[start:end].tolist()
+            value_lists = [array[start:end].tolist() for array in self.arrays.values()]
+
+            for dt, values in zip(dt_list, zip(*value_lists)):
+                kwargs = dict(zip(columns, values))
+                kwargs.update(extra)
+
+                yield data_class(
+                    symbol=symbol,
+                    exchange=exchange,
+                    datetime=localize(dt, tz),
+                    gateway_name=gateway_name,
+                    **kwargs
+                )
+
+    def __getitem__(self, key: Union[int, slice]) -> Any:
+        """"""
+        if isinstance(key, slice):
+            return self.slice(key)
+        return self.get_data(key)
+
+    def get_extra(self) -> Dict[str, Any]:
+        """
+        Get extra keyword arguments for creating data object or batch.
+        """
+        return {}
+
+    def slice(self, key: slice) -> "DataBatch":
+        """
+        Get a zero-copy view batch of rows in slice.
+        """
+        arrays = {column: array[key] for column, array in self.arrays.items()}
+
+        return self.__class__(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=self.datetime[key],
+            arrays=arrays,
+            tz=self.tz,
+            gateway_name=self.gateway_name,
+            **self.get_extra()
+        )
+
+    def slice_datetime(self, start: datetime = None, end: datetime = None) -> "DataBatch":
+        """
+        Get a zero-copy view batch of rows with datetime in [start, end),
+        None means no limit on that side.
+        """
+        if start:
+            ix_start = np.searchsorted(self.datetime, self.to_datetime64(start))
+        else:
+            ix_start = 0
+
+        if end:
+            ix_end = np.searchsorted(self.datetime, self.to_datetime64(end))
+        else:
+            ix_end = len(self.datetime)
+
+        return self.slice(slice(ix_start, ix_end))
+
+    def to_datetime64(self, dt: datetime) -> np.datetime64:
+        """
+        Convert datetime into the timezone free value used in datetime array.
+        """
+        if dt.tzinfo and self.tz:
+            dt = dt.astimezone(self.tz)
+        return np.datetime64(dt.replace(tzinfo=None), "us")
+
+    def get_datetime(self, ix: int) -> datetime:
+        """
+        Get datetime of row as datetime object with timezone.
+        """
+        dt = self.datetime[ix].item()
+        return localize(dt, self.tz)
+
+    def get_data(self, ix: int) -> Any:
+        """
+        Create data object of row.
+        """
+        kwargs = {column: float(array[ix]) for column, array in self.arrays.items()}
+        kwargs.update(self.get_extra())
+
+        return self.data_class(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=self.get_datetime(ix),
+            gateway_name=self.gateway_name,
+            **kwargs
+        )
+
+    def to_list(self) -> List[Any]:
+        """
+        Create data objects of all rows.
+        """
+        return list(self)
+
+    def to_dataframe(self) -> "DataFrame":
+        """
+        Convert into pandas DataFrame with datetime column.
+        """
+        # Pandas is only imported when used for faster start-up
+        import pandas as pd
+
+        dt = pd.to_datetime(self.datetime)
+        if self.tz:
+            dt = dt.tz_localize(self.tz)
+
+        data = {"datetime": dt}
+        data.update(self.arrays)
+        return pd.DataFrame(data)
+
+    def save(self, folder: Union[str, Path]) -> None:
+        """
+        Save batch into folder, with every array as a .npy file which
+        can be memory mapped by load, e.g. from other processes.
+        """
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+
+        np.save(folder.joinpath("datetime.npy"), self.datetime)
+        for column, array in self.arrays.items():
+            np.save(folder.joinpath(f"{column}.npy"), array)
+
+        info = {
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "tz": self.tz,
+            "gateway_name": self.gateway_name,
+        }
+        info.update(self.get_extra())
+
+        with open(folder.joinpath("info.pkl"), "wb") as f:
+            pickle.dump(info, f)
+
+    @classmethod
+    def load(cls, folder: Union[str, Path], mmap_mode: str = "r") -> "DataBatch":
+        """
+        Load batch saved in folder. Arrays are memory mapped read-only by
+        default, so that pages are shared by all processes loading it.
+        """
+        folder = Path(folder)
+
+        with open(folder.joinpath("info.pkl"), "rb") as f:
+            info = pickle.load(f)
+
+        dt = np.load(folder.joinpath("datetime.npy"), mmap_mode=mmap_mode)
+        arrays = {
+            column: np.load(folder.joinpath(f"{column}.npy"), mmap_mode=mmap_mode)
+            for column in cls.columns
+        }
+
+        return cls(datetime=dt, arrays=arrays, **info)
+
+    @classmethod
+    def from_list(cls, data_list: Sequence[Any], **kwargs) -> "DataBatch":
+        """
+        Create batch from list of data objects of the same symbol.
+        """
+        first = data_list[0]
+
+        tz = first.datetime.tzinfo
+        dt = [data.datetime.replace(tzinfo=None) for data in data_list]
+
+        arrays = {
+            column: np.fromiter(
+                (getattr(data, column) for data in data_list),
+                dtype=np.float64,
+                count=len(data_list)
+            )
+            for column in cls.columns
+        }
+
+        return cls(
+            symbol=first.symbol,
+            exchange=first.exchange,
+            datetime=np.array(dt, dtype="datetime64[us]"),
+            arrays=arrays,
+            tz=tz,
+            gateway_name=first.gateway_name,
+            **kwargs
+        )
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: "DataFrame",
+        symbol: str,
+        exchange: Exchange,
+        gateway_name: str = "",
+        **kwargs
+    ) -> "DataBatch":
+        """
+        Create batch from pandas DataFrame with datetime column.
+        """
+        dt = df["datetime"]
+        tz = getattr(dt.dt, "tz", None)
+        if tz:
+            dt = dt.dt.tz_localize(None)
+
+        arrays = {
+            column: df[column].to_numpy(dtype=np.float64)
+            for column in cls.columns if column in df
+        }
+
+        return cls(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt.to_numpy(dtype="datetime64[us]"),
+            arrays=arrays,
+            tz=tz,
+            gateway_name=gateway_name,
+            **kwargs
+        )
+
+
+class TickBatch(DataBatch):
+    """
+    Columnar container of tick data, including 5 levels of bid/ask.
+    """
+
+    data_class: type = TickData
+    columns: Tuple[str, ...] = TICK_COLUMNS
+
+    def __init__(self, *args, name: str = "", **kwargs):
+        """"""
+        super().__init__(*args, **kwargs)
+        self.name: str = name
+
+    def get_extra(self) -> Dict[str, Any]:
+        """"""
+        return {"name": self.name}
+
+    @classmethod
+    def from_list(cls, data_list: Sequence[TickData], **kwargs) -> "TickBatch":
+        """"""
+        kwargs.setdefault("name", data_list[0].name)
+        return super().from_list(data_list, **kwargs)
+
+
+class BarBatch(DataBatch):
+    """
+    Columnar container of bar data with the same interval.
+    """
+
+    data_class: type = BarData
+    columns: Tuple[str, ...] = BAR_COLUMNS
+
+    def __init__(self, *args, interval: Interval = None, **kwargs):
+        """"""
+        super().__init__(*args, **kwargs)
+        self.interval: Interval = interval
+
+    def get_extra(self) -> Dict[str, Any]:
+        """"""
+        return {"interval": self.interval}
+
+    @classmethod
+    def from_list(cls, data_list: Sequence[BarData], **kwargs) -> "BarBatch":
+        """"""
+        kwargs.setdefault("interval", data_list[0].interval)
+        return super().from_list(data_list, **kwargs)
@@ -0,0 +1,211 @@
+"""
+Profiler of backtesting hot path.
+"""
+
+from collections import defaultdict
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+from .utility import ArrayManager, BarGenerator
+
+
+class BacktestingProfiler:
+    """
+    Records wall time and call count of backtesting phases and callbacks,
+    by replacing methods of engine, strategy and its ArrayManager/BarGenerator
+    objects with timing wrappers.
+
+    Time is recorded for every call stack, so that both a flat report of
+    every name and a folded stack dump for flamegraph can be generated.
+    """
+
+    def __init__(self):
+        """"""
+        self.stack: List[str] = []
+        self.starts: List[float] = []
+
+        # Call stack: [total time, time of children, call count]
+        self.records: Dict[Tuple[str, ...], List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+
+    def clear(self) -> None:
+        """
+        Clear all records.
+        """
+        self.records.clear()
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Wrap function to record its time with name.
+        """
+        stack = self.stack
+        starts = self.starts
+        records = self.records
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            """"""
+            stack.append(name)
+            starts.append(perf_counter())
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cost = perf_counter() - starts.pop()
+
+                record = records[tuple(stack)]
+                record[0] += cost
+                record[2] += 1
+
+                stack.pop()
+                if stack:
+                    records[tuple(stack)][1] += cost
+
+        wrapper.__profiled__ = func
+        return wrapper
+
+    def instrument(self, obj: Any, names: Sequence[str], prefix: str = "") -> None:
+        """
+        Replace methods of object with wrappers. Methods are taken from
+        class, so that instrumenting the same object again does not wrap
+        any method twice.
+        """
+        for name in names:
+            func = getattr(type(obj), name, None)
+            if not callable(func):
+                continue
+
+            setattr(obj, name, self.wrap(prefix + name, func.__get__(obj)))
+
+    def instrument_strategy(self, strategy: Any, names: Sequence[str]) -> None:
+        """
+        Instrument strategy callbacks, and ArrayManager/BarGenerator objects
+        kept by strategy either directly or in dict.
+        """
+        self.instrument(strategy, names)
+
+        for value in list(vars(strategy).values()):
+            if isinstance(value, dict):
+                values = list(value.values())
+            else:
+                values = [value]
+
+            for obj in values:
+                if isinstance(obj, ArrayManager):
+                    self.instrument(obj, ["update_bar"], "ArrayManager.")
+                elif isinstance(obj, BarGenerator):
+                    self.instrument_bar_generator(obj, strategy)
+
+    def instrument_bar_generator(self, generator: BarGenerator, strategy: Any) -> None:
+        """
+        Instrument BarGenerator, and also its callbacks into strategy, which
+        are bound before strategy is instrumented.
+        """
+        self.instrument(generator, ["update_tick", "update_bar"], "BarGenerator.")
+
+        for attr in ["on_bar", "on_window_bar"]:
+            callback = getattr(generator, attr, None)
+            if getattr(callback, "__self__", None) is not strategy:
+                continue
+
+            name = callback.__name__
+            current = getattr(strategy, name, None)
+
+            if getattr(current, "__profiled__", None) == callback:
+                setattr(generator, attr, current)
+            else:
+                setattr(generator, attr, self.wrap(name, callback))
+
+    @staticmethod
+    def uninstrument(obj: Any, names: Sequence[str]) -> None:
+        """
+        Restore methods of object replaced by instrument.
+        """
+        for name in names:
+            if hasattr(obj.__dict__.get(name, None), "__profiled__"):
+                obj.__dict__.pop(name)
+
+    def get_records(self) -> Dict[Tuple[str, ...], List[float]]:
+        """
+        Get records including calls still running, e.g. when report is
+        generated inside a profiled phase.
+        """
+        records = defaultdict(lambda: [0.0, 0.0, 0])
+        for key, record in self.records.items():
+            records[key] = list(record)
+
+        now = perf_counter()
+        for ix, start in enumerate(self.starts):
+            cost = now - start
+
+            record = records[tuple(self.stack[:ix + 1])]
+            record[0] += cost
+            record[2] += 1
+
+            if ix:
+                records[tuple(self.stack[:ix])][1] += cost
+
+        return records
+
+    def get_report(self) -> List[Dict[str, Any]]:
+        """
+        Get total time, self time (excluding profiled calls inside) and call
+        count of every name, sorted by total time.
+        """
+        records = self.get_records()
+        total = sum(record[0] for key, record in records.items() if len(key) == 1)
+
+        results = {}
+        for key, (cost, child_cost, count) in records.items():
+            name = key[-1]
+            result = results.get(name, None)
+
+            if not result:
+                result = {"name": name, "count": 0, "time": 0.0, "self_time": 0.0}
+                results[name] = result
+
+            result["count"] += count
+            result["self_time"] += cost - child_cost
+
+            # Time of recursive call is already included by outer call
+            if name not in key[:-1]:
+                result["time"] += cost
+
+        report = sorted(results.values(), key=lambda result: result["time"], reverse=True)
+
+        for result in report:
+            if total:
+                result["percent"] = result["time"] / total * 100
+            else:
+                result["percent"] = 0
+            result["per_call"] = result["time"] / result["count"] if result["count"] else 0
+
+        return report
+
+    def output_report(self, output: Callable = print) -> None:
+        """
+        Output report line by line.
+        """
+        output("-" * 30)
+
+        for result in self.get_report():
+            output(
+                f"{result['name']}：\t"
+                f"调用{result['count']:,}次\t"
+                f"总耗时{result['time']:,.4f}秒\t"
+                f"自身耗时{result['self_time']:,.4f}秒\t"
+                f"单次{result['per_call'] * 1_000_000:,.2f}微秒\t"
+                f"占比{result['percent']:.1f}%"
+            )
+
+    def save_folded(self, path: Union[str, Path]) -> None:
+        """
+        Save self time of every call stack in microseconds with folded
+        format, which can be rendered by flamegraph.pl or speedscope.
+        """
+        with open(path, "w") as f:
+            for key, (cost, child_cost, _) in self.get_records().items():
+                value = int((cost - child_cost) * 1_000_000)
+                if value > 0:
+                    f.write(f"{';'.join(key)} {value}\n")
@@ -17,6 +17,11 @@ SETTINGS: Dict[str, Any] = {
     "log.console": True,
     "log.file": True,
 
+    "event.lanes": False,
+    "event.stats": False,
+    "event.stats_interval": 10,
+    "event.stats_budget": 0.01,
+
     "email.server": "smtp.qq.com",
     "email.port": 465,
     "email.username": "",
@@ -5,6 +5,7 @@ Basic widgets for VN Trader.
 import csv
 import platform
 from enum import Enum
+from operator import attrgetter
 from typing import Any, Dict
 from copy import copy
 from tzlocal import get_localzone
@@ -192,6 +193,7 @@ class BaseMonitor(QtWidgets.QTableWidget):
     event_type: str = ""
     data_key: str = ""
     sorting: bool = False
+    conflated: bool = False
     headers: Dict[str, dict] = {}
 
     signal: QtCore.pyqtSignal = QtCore.pyqtSignal(Event)
@@ -251,7 +253,16 @@ class BaseMonitor(QtWidgets.QTableWidget):
         """
         if self.event_type:
             self.signal.connect(self.process_event)
-            self.event_engine.register(self.event_type, self.signal.emit)
+
+            # Only the newest data of each key is displayed if conflated.
+            if self.conflated and self.data_key:
+                self.event_engine.register_conflated(
+                    self.event_type,
+                    self.signal.emit,
+                    attrgetter("data." + self.data_key)
+                )
+            else:
+                self.event_engine.register(self.event_type, self.signal.emit)
 
     def process_event(self, event: Event) -> None:
         """
@@ -374,6 +385,7 @@ class TickMonitor(BaseMonitor):
     event_type = EVENT_TICK
     data_key = "vt_symbol"
     sorting = True
+    conflated = True
 
     headers = {
         "symbol": {"display": "代码", "cell": BaseCell, "update": False},
@@ -15,6 +15,7 @@ import talib
 
 from .object import BarData, TickData
 from .constant import Exchange, Interval
+from .indicator import Indicator
 
 
 log_formatter = logging.Formatter('[%(asctime)s] %(message)s')
@@ -430,6 +431,11 @@ class ArrayManager(object):
     For:
     1. time series container of bar data
     2. calculating technical indicator value
+
+    Data is stored in a ring buffer of double size, every value is written
+    twice at position ix and ix + size. So that updating a new bar is O(1),
+    while the latest [size] values are always available as a contiguous
+    and ordered view buffer[ix: ix + size] for talib.
     """
 
     def __init__(self, size: int = 100):
@@ -438,12 +444,15 @@ class ArrayManager(object):
         self.size: int = size
         self.inited: bool = False
 
-        self.open_array: np.ndarray = np.zeros(size)
-        self.high_array: np.ndarray = np.zeros(size)
-        self.low_array: np.ndarray = np.zeros(size)
-        self.close_array: np.ndarray = np.zeros(size)
-        self.volume_array: np.ndarray = np.zeros(size)
-        self.open_interest_array: np.ndarray = np.zeros(size)
+        self.open_buffer: np.ndarray = np.zeros(size * 2)
+        self.high_buffer: np.ndarray = np.zeros(size * 2)
+        self.low_buffer: np.ndarray = np.zeros(size * 2)
+        self.close_buffer: np.ndarray = np.zeros(size * 2)
+        self.volume_buffer: np.ndarray = np.zeros(size * 2)
+        self.open_interest_buffer: np.ndarray = np.zeros(size * 2)
+        self.ix: int = 0
+
+        self.indicators: Dict[str, Indicator] = {}
 
     def update_bar(self, bar: BarData) -> None:
         """
@@ -453,61 +462,86 @@ class ArrayManager(object):
         if not self.inited and self.count >= self.size:
             self.inited = True
 
-        self.open_array[:-1] = self.open_array[1:]
-        self.high_array[:-1] = self.high_array[1:]
-        self.low_array[:-1] = self.low_array[1:]
-        self.close_array[:-1] = self.close_array[1:]
-        self.volume_array[:-1] = self.volume_array[1:]
-        self.open_interest_array[:-1] = self.open_interest_array[1:]
+        ix = self.ix
+        jx = ix + self.size
+
+        self.open_buffer[ix] = self.open_buffer[jx] = bar.open_price
+        self.high_buffer[ix] = self.high_buffer[jx] = bar.high_price
+        self.low_buffer[ix] = self.low_buffer[jx] = bar.low_price
+        self.close_buffer[ix] = self.close_buffer[jx] = bar.close_price
+        self.volume_buffer[ix] = self.volume_buffer[jx] = bar.volume
+        self.open_interest_buffer[ix] = self.open_interest_buffer[jx] = bar.open_interest
 
-        self.open_array[-1] = bar.open_price
-        self.high_array[-1] = bar.high_price
-        self.low_array[-1] = bar.low_price
-        self.close_array[-1] = bar.close_price
-        self.volume_array[-1] = bar.volume
-        self.open_interest_array[-1] = bar.open_interest
+        ix += 1
+        if ix == self.size:
+            ix = 0
+        self.ix = ix
+
+        for indicator in self.indicators.values():
+            indicator.update_bar(bar)
+
+    def add_indicator(self, name: str, indicator: Indicator) -> Indicator:
+        """
+        Add streaming indicator which is updated with every new bar, and
+        its latest value can be read by indicators[name].value without
+        calculating over the whole array.
+
+        Indicator should be added before any bar is updated. Recursive
+        indicators (e.g. EMA, ATR) are calculated over all bars updated,
+        so their values differ from functions calculated over the window.
+        """
+        self.indicators[name] = indicator
+        return indicator
 
     @property
     def open(self) -> np.ndarray:
         """
         Get open price time series.
         """
-        return self.open_array
+        return self.open_buffer[self.ix: self.ix + self.size]
 
     @property
     def high(self) -> np.ndarray:
         """
         Get high price time series.
         """
-        return self.high_array
+        return self.high_buffer[self.ix: self.ix + self.size]
 
     @property
     def low(self) -> np.ndarray:
         """
         Get low price time series.
         """
-        return self.low_array
+        return self.low_buffer[self.ix: self.ix + self.size]
 
     @property
     def close(self) -> np.ndarray:
         """
         Get close price time series.
         """
-        return self.close_array
+        return self.close_buffer[self.ix: self.ix + self.size]
 
     @property
     def volume(self) -> np.ndarray:
         """
         Get trading volume time series.
         """
-        return self.volume_array
+        return self.volume_buffer[self.ix: self.ix + self.size]
 
     @property
     def open_interest(self) -> np.ndarray:
         """
         Get trading volume time series.
         """
-        return self.open_interest_array
+        return self.open_interest_buffer[self.ix: self.ix + self.size]
+
+    # Keep array attributes of old version available
+    open_array = open
+    high_array = high
+    low_array = low
+    close_array = close
+    volume_array = volume
+    open_interest_array = open_interest
 
     def sma(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
         """